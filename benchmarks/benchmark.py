@@ -0,0 +1,348 @@
+"""
+Benchmark suite for the physics, aiming and rendering hot paths. Needs no display. Run from this directory:
+
+    python benchmark.py run --output results.json
+    python benchmark.py compare baseline.json results.json
+    python benchmark.py scaling --sizes 10,100,1000,10000
+
+Each scenario is timed over several repeats, reporting the median and inter-quartile range of the wall time,
+and work units (time steps, or aim angles) per second. A separate pass under tracemalloc measures the transient
+peak of memory allocated within each unit of work (mean and median over the units), and the memory blocks still
+allocated per unit at the end. compare flags slower medians and growth in the median allocation per unit.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, Tuple
+
+import numpy as np
+
+sys.path.append('../src')
+
+from physics.coordinates import Coordinates
+from pool.game_type import GameType
+from pool.pool_table import PoolTable
+from pool.profiler import Profiler, BALL_TIME_STEP, BROAD_PHASE, WALL_COLLISIONS, BALL_COLLISIONS, POCKET_BALLS
+from pool.scenario import make_scenario, LAYOUTS, UNIFORM
+from pool.shot import Shot, BREAK_FORCE, STRIKE_FORCE
+
+NW, SE = Coordinates(100, 900), Coordinates(900, 500)
+
+MAX_STEPS = 10000
+
+# Median slowdown, beyond noise, reported as a regression by compare; also the relative growth in the median
+# allocation per unit reported as one
+DEFAULT_THRESHOLD = 0.10
+
+# Growth in the median allocation per unit below this many bytes is never a regression
+ALLOCATION_SLACK = 1024
+
+"""
+Scenarios. Each builds its state outside the timed region and returns a generator function that does the work,
+yielding after every unit of work.
+"""
+
+Scenario = Callable[[], Iterator[None]]
+
+
+def run_to_rest(table: PoolTable) -> Iterator[None]:
+    steps = 0
+    while steps < MAX_STEPS and not table.is_at_rest():
+        table.time_step(aim=False)
+        steps += 1
+        yield
+
+
+def nine_ball_break() -> Scenario:
+    table = PoolTable(NW, SE, game=GameType.NINE_BALL)
+    Shot(0.0, BREAK_FORCE).apply(table)
+    return lambda: run_to_rest(table)
+
+
+def gentle_shot() -> Scenario:
+    # Cue ball alone, rolling away from the rack
+    table = PoolTable(NW, SE, game=GameType.NINE_BALL)
+    Shot(100.0, STRIKE_FORCE).apply(table)
+    return lambda: run_to_rest(table)
+
+
+def aim_sweep() -> Scenario:
+    table = PoolTable(NW, SE, game=GameType.NINE_BALL)
+    angles = (np.arange(3600) / 10).tolist()
+
+    def run():
+        for angle in angles:
+            table.cue_angle = angle
+            table.get_cue_ball_path()
+            yield
+
+    return run
+
+
+def stress_500() -> Scenario:
+    table = make_scenario(500, UNIFORM)
+
+    def run():
+        for _ in range(50):
+            table.time_step(aim=False)
+            yield
+
+    return run
+
+
+def render() -> Scenario:
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import main
+
+    main.init()
+    table = PoolTable(NW, SE)
+    balls = list(table.balls.values())
+
+    def run():
+        for _ in range(100):
+            main.draw_pool_table(table)
+            for ball in balls:
+                main.draw_pool_ball(ball)
+            yield
+
+    return run
+
+
+SCENARIOS: Dict[str, Callable[[], Scenario]] = {
+    'nine_ball_break': nine_ball_break,
+    'gentle_shot': gentle_shot,
+    'aim_sweep': aim_sweep,
+    'stress_500': stress_500,
+    'render': render,
+}
+
+"""
+Measurement.
+"""
+
+
+def time_scenario(setup: Callable[[], Scenario], repeat: int) -> Tuple[list, int]:
+    samples = []
+    units = 0
+    for _ in range(repeat):
+        run = setup()
+        start = time.perf_counter()
+        units = 0
+        for _ in run():
+            units += 1
+        samples.append(time.perf_counter() - start)
+
+    return samples, units
+
+
+def measure_allocations(setup: Callable[[], Scenario]) -> dict:
+    """
+    Run a scenario under tracemalloc, taking the peak of memory allocated within each unit of work: a unit that
+    allocates and frees many temporaries shows up here even though it leaves nothing behind.
+    """
+
+    units = setup()()
+    peaks = []
+
+    tracemalloc.start()
+    try:
+        current, _ = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks()
+
+        while True:
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            if next(units, StopIteration) is StopIteration:
+                break
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - start)
+
+        end, _ = tracemalloc.get_traced_memory()
+        net_blocks = sys.getallocatedblocks() - blocks
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'peak_bytes_per_unit_mean': float(np.mean(peaks)) if peaks else None,
+        'peak_bytes_per_unit_median': float(np.median(peaks)) if peaks else None,
+        'net_blocks_per_unit': net_blocks / len(peaks) if peaks else None,
+        'net_bytes_per_unit': (end - current) / len(peaks) if peaks else None,
+    }
+
+
+def run_benchmarks(names, repeat: int) -> dict:
+    results = {}
+    for name in names:
+        setup = SCENARIOS[name]
+        try:
+            samples, units = time_scenario(setup, repeat)
+        except ImportError as e:
+            # Optional dependency (pygame) missing
+            results[name] = {'skipped': str(e)}
+            print('{:<16} skipped: {}'.format(name, e), file=sys.stderr)
+            continue
+
+        q25, median, q75 = np.percentile(samples, [25, 50, 75])
+        result = {
+            'units': units,
+            'median_seconds': float(median),
+            'iqr_seconds': float(q75 - q25),
+            'units_per_second': units / median if median > 0 else None,
+            'samples': samples,
+        }
+        result.update(measure_allocations(setup))
+        results[name] = result
+
+        print('{:<16} {:10.4f} s  IQR {:8.4f} s  {:12.1f} units/s  {:10.0f} B/unit'.format(
+            name, median, q75 - q25, result['units_per_second'], result['peak_bytes_per_unit_median']),
+            file=sys.stderr)
+
+    return results
+
+
+def run_scaling(sizes, layouts, steps: int) -> list:
+    """
+    Step generated tables of growing size, timing each phase of the step and tracing the memory one step takes.
+
+    :return: one row per (layout, size)
+    """
+
+    rows = []
+    for layout in layouts:
+        for n_balls in sizes:
+            table = make_scenario(n_balls, layout)
+            profiler = table.profiler = Profiler()
+
+            start = time.perf_counter()
+            for _ in range(steps):
+                profiler.begin_frame()
+                table.time_step(aim=False)
+            seconds = (time.perf_counter() - start) / steps
+
+            # One more step under tracemalloc, which would otherwise slow the timed ones
+            tracemalloc.start()
+            try:
+                current, _ = tracemalloc.get_traced_memory()
+                table.time_step(aim=False)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            row = {
+                'layout': layout,
+                'balls': n_balls,
+                'seconds_per_step': seconds,
+                'peak_bytes_per_step': peak - current,
+                'pocketed': len(table.pocket_events),
+                'substeps': table.substeps,
+                # Median milliseconds per phase
+                'phases_ms': {phase: profiler.get_percentiles(phase, [50])[0] * 1e3 for phase in
+                              (BALL_TIME_STEP, BROAD_PHASE, WALL_COLLISIONS, BALL_COLLISIONS, POCKET_BALLS)
+                              if phase in profiler.durations},
+            }
+            rows.append(row)
+
+            print('{:<8} {:>6} balls {:10.4f} s/step {:12d} B peak  {}'.format(
+                layout, n_balls, seconds, row['peak_bytes_per_step'],
+                ' '.join('{}={:.2f}'.format(phase, ms) for phase, ms in row['phases_ms'].items())), file=sys.stderr)
+
+    return rows
+
+
+def get_metadata() -> dict:
+    return {
+        'time': time.time(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    :return: (scenario, baseline median, current median, ratio, baseline median bytes per unit, current median
+             bytes per unit, regressed) for every scenario run in both; bytes are None if either run lacks them
+    """
+
+    rows = []
+    for name, new in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None or 'skipped' in old or 'skipped' in new:
+            continue
+
+        ratio = new['median_seconds'] / old['median_seconds']
+        noise = max(old['iqr_seconds'], new['iqr_seconds'])
+        regressed = ratio > 1 + threshold and new['median_seconds'] - old['median_seconds'] > noise
+
+        old_bytes = old.get('peak_bytes_per_unit_median')
+        new_bytes = new.get('peak_bytes_per_unit_median')
+        if old_bytes is None or new_bytes is None:
+            old_bytes = new_bytes = None
+        elif new_bytes > old_bytes * (1 + threshold) and new_bytes - old_bytes > ALLOCATION_SLACK:
+            regressed = True
+
+        rows.append((name, old['median_seconds'], new['median_seconds'], ratio, old_bytes, new_bytes, regressed))
+
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmark.py')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run the benchmarks and write the results as JSON')
+    run.add_argument('--output', default='results.json')
+    run.add_argument('--repeat', type=int, default=7)
+    run.add_argument('--scenario', action='append', choices=list(SCENARIOS),
+                     help='scenario to run (repeatable; default: all)')
+
+    diff = commands.add_parser('compare', help='compare two result files; exit status 1 on a regression')
+    diff.add_argument('baseline')
+    diff.add_argument('current')
+    diff.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                      help='relative slowdown of the median beyond the IQR, or growth of the median allocation per '
+                           'unit, counted as a regression')
+
+    scaling = commands.add_parser('scaling', help='step generated tables of growing size and write per-phase times '
+                                                  'and memory as JSON')
+    scaling.add_argument('--output', default='scaling.json')
+    scaling.add_argument('--sizes', default='10,100,1000,3000', help='comma-separated ball counts (up to 10000)')
+    scaling.add_argument('--layout', action='append', choices=LAYOUTS, help='layout (repeatable; default: all)')
+    scaling.add_argument('--steps', type=int, default=5, help='time steps per table')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'scaling':
+        sizes = [int(size) for size in args.sizes.split(',')]
+        results = {'meta': get_metadata(), 'results': run_scaling(sizes, args.layout or list(LAYOUTS), args.steps)}
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        return 0
+
+    if args.command == 'run':
+        results = {'meta': get_metadata(), 'results': run_benchmarks(args.scenario or list(SCENARIOS), args.repeat)}
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    for name, old, new, ratio, old_bytes, new_bytes, regressed in rows:
+        allocation = '{:10.0f} B -> {:10.0f} B'.format(old_bytes, new_bytes) if old_bytes is not None else ''
+        print('{:<16} {:10.4f} s -> {:10.4f} s  {:6.2f}x  {}  {}'.format(name, old, new, ratio, allocation,
+                                                                       'REGRESSION' if regressed else 'ok'))
+
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
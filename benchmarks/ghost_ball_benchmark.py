@@ -0,0 +1,90 @@
+"""
+Ghost-ball solver micro-benchmark: the closed-form contact point against the law-of-sines path through
+trianglesolver that it replaced. Run from this directory:
+
+    python ghost_ball_benchmark.py
+"""
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append('../src')
+
+from physics.coordinates import Coordinates
+from physics.utility import get_distance, get_angle, get_point_on_line_distance_from_point, \
+    get_points_on_lines_distance_from_points
+from physics.vector import Vector
+
+RADIUS = 10
+CASES = 1000
+
+
+def trianglesolver_point_on_line_distance_from_point(line_start, line_end, point, distance) -> Coordinates:
+    """
+    The previous implementation, kept here as the baseline.
+    """
+    from physics.trianglesolver import solve
+
+    c_side = get_distance(line_start, point)
+
+    v_point = Vector(point.x - line_start.x, point.y - line_start.y)
+    v_line = Vector(line_end.x - line_start.x, line_end.y - line_start.y)
+    a_angle = np.arccos(v_point.dot_product(v_line) / v_point.get_magnitude() / v_line.get_magnitude())
+
+    _, b_side, _, _, _, _ = solve(a=distance, c=c_side, A=a_angle, ssa_flag='obtuse')
+
+    angle = np.radians(get_angle(line_end, line_start))
+    return Coordinates(line_start.x + b_side * np.cos(angle), line_start.y + b_side * np.sin(angle))
+
+
+def get_cases(n: int, seed: int = 0):
+    """
+    Aim lines from the origin that pass within 2r of an object ball ahead of the cue ball.
+    """
+
+    rng = np.random.default_rng(seed)
+    angle = rng.uniform(0, 2 * np.pi, n)
+    direction = np.stack([np.cos(angle), np.sin(angle)], axis=-1)
+    normal = np.stack([-direction[:, 1], direction[:, 0]], axis=-1)
+
+    along = rng.uniform(50, 500, n)
+    across = rng.uniform(-1.9 * RADIUS, 1.9 * RADIUS, n)
+    point = direction * along[:, np.newaxis] + normal * across[:, np.newaxis]
+
+    return direction, point
+
+
+def main():
+    direction, point = get_cases(CASES)
+    start = Coordinates(0, 0)
+    lines = [(Coordinates(*(100 * d)), Coordinates(*p)) for d, p in zip(direction, point)]
+
+    # Both solvers must agree before timing them
+    for end, p in lines:
+        expected = trianglesolver_point_on_line_distance_from_point(start, end, p, 2 * RADIUS)
+        result = get_point_on_line_distance_from_point(start, end, p, 2 * RADIUS)
+        assert get_distance(result, expected) < 1e-6, (result, expected)
+
+    def run_trianglesolver():
+        for end, p in lines:
+            trianglesolver_point_on_line_distance_from_point(start, end, p, 2 * RADIUS)
+
+    def run_closed_form():
+        for end, p in lines:
+            get_point_on_line_distance_from_point(start, end, p, 2 * RADIUS)
+
+    def run_batched():
+        get_points_on_lines_distance_from_points(np.zeros(2), direction, point, 2 * RADIUS)
+
+    baseline = None
+    for name, run in (('trianglesolver', run_trianglesolver),
+                      ('closed form', run_closed_form),
+                      ('closed form, batched', run_batched)):
+        seconds = min(timeit.repeat(run, number=10, repeat=5)) / 10 / CASES
+        baseline = baseline or seconds
+        print('{:<22} {:8.3f} us/solve  {:7.1f}x'.format(name, seconds * 1e6, baseline / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,52 @@
+import json
+import logging
 import sys
+import time
 
-import numpy as np
 import pygame
 import pygame.gfxdraw
 
-from physics.collisions import *
+from physics.coordinates import Coordinates
 from physics.utility import get_angle
-from pool.ball_type import BallType
+from pool import log
 from pool.pool_ball import PoolBall
 from pool.pool_table import PoolTable
+from pool.profiler import Profiler, CUE_BALL_PATH, DRAW_TABLE, DRAW_AIM, DRAW_BALLS, DISPLAY_UPDATE
+from pool.shot import Shot, BREAK_FORCE, STRIKE_FORCE
+from pool.trajectory_recorder import TrajectoryRecorder
 
 SCREEN_DIMENSIONS = WIDTH, HEIGHT = 1000, 1000
 TABLE_LENGTH = 800
 TABLE_OFFSET_X, TABLE_OFFSET_Y = 100, 100
 SCREEN = None
 
+RENDER_LOG = log.get_logger(log.RENDER)
+
+# Pre-rendered table cloth and pockets, and the table geometry it was drawn for
+BACKGROUND = None
+BACKGROUND_KEY = None
+
+# The background with the aim lines drawn over it (what the screen holds under the balls), the geometry of that
+# background, and the aim lines drawn
+AIM_LAYER = None
+AIM_LAYER_KEY = None
+AIM_LAYER_LINES = []
+
+# Long lines are dirtied as one small rectangle per this many pixels, rather than by their whole bounding box
+LINE_SEGMENT = 32
+
+# Physics runs at a fixed rate, independent of how fast frames are drawn
+PHYSICS_RATE = 60  # time steps per second of simulated time
+RENDER_FPS = 60  # upper limit on drawn frames per second
+SIMULATION_SPEED = 1.0  # simulated seconds per wall-clock second; adjust with +/-
+MAX_STEPS_PER_FRAME = 20  # beyond this, drop time instead of falling further behind
+
+# Chrome trace written when profiling (toggled with T) is switched off
+TRACE_PATH = 'pool_trace.json'
+
+# Recording made while recording (toggled with V) is switched on
+RECORDING_PATH = 'pool_recording.traj'
+
 """
 Helper functions.
 """
@@ -37,6 +69,34 @@ def coords_from_pygame(xy: (float, float), height: float) -> Coordinates:
     return Coordinates(xy[0], height - xy[1])
 
 
+def circle_rect(x: int, y: int, r: int) -> pygame.Rect:
+    """
+    Screen area covered by a drawn circle (with a pixel of margin for anti-aliasing).
+    """
+
+    return pygame.Rect(x - r - 1, y - r - 1, 2 * r + 3, 2 * r + 3)
+
+
+def line_rect(x1: int, y1: int, x2: int, y2: int) -> pygame.Rect:
+    """
+    Screen area covered by a drawn line.
+    """
+
+    return pygame.Rect(min(x1, x2), min(y1, y2), abs(x2 - x1) + 1, abs(y2 - y1) + 1)
+
+
+def line_rects(x1: int, y1: int, x2: int, y2: int) -> list:
+    """
+    Screen area covered by a drawn line, as one rectangle per LINE_SEGMENT pixels of it (with a pixel of margin for
+    rounding), so a long diagonal line dirties little more than the pixels it is drawn on.
+    """
+
+    count = max(abs(x2 - x1), abs(y2 - y1)) // LINE_SEGMENT + 1
+    points = [(x1 + round((x2 - x1) * k / count), y1 + round((y2 - y1) * k / count)) for k in range(count + 1)]
+
+    return [line_rect(*a, *b).inflate(2, 2) for a, b in zip(points, points[1:])]
+
+
 """
 PyGame functions.
 """
@@ -53,9 +113,30 @@ def clear_screen():
     SCREEN.fill((0, 0, 0))
 
 
-def draw_pool_table(table: PoolTable):
+def get_background(table: PoolTable) -> pygame.Surface:
+    """
+    Screen-sized surface with the table already drawn; only re-rendered when the table geometry changes.
+    """
+    global BACKGROUND, BACKGROUND_KEY
+
+    key = (table.left, table.top, table.right, table.bottom, table.hole_radius)
+    if BACKGROUND is None or BACKGROUND_KEY != key:
+        BACKGROUND = pygame.Surface(SCREEN.get_size()).convert()
+        BACKGROUND.fill((0, 0, 0))
+        draw_pool_table(table, BACKGROUND)
+        BACKGROUND_KEY = key
+
+    return BACKGROUND
+
+
+def draw_pool_table(table: PoolTable, surface: pygame.Surface = None):
+    """
+    :param table: table to draw
+    :param surface: surface to draw on, the screen by default
+    """
     global SCREEN
 
+    surface = surface if surface is not None else SCREEN
     table_color = (0, 200, 0)
 
     nw = coords_to_pygame(Coordinates(table.left, table.top), HEIGHT)
@@ -66,108 +147,160 @@ def draw_pool_table(table: PoolTable):
 
 
     # Draw table cloth
-    pygame.draw.rect(SCREEN, table_color, pygame.Rect(left, top, width, height), 0)
+    pygame.draw.rect(surface, table_color, pygame.Rect(left, top, width, height), 0)
 
     # Draw table pockets
     for hole_center in table.hole_centers:
         pocket_color = (0, 0, 0)
         p = coords_to_pygame(hole_center, HEIGHT)
         x, y, r = int(p.x), int(p.y), int(table.hole_radius)
-        pygame.draw.circle(SCREEN, pocket_color, (x, y), r)
+        pygame.draw.circle(surface, pocket_color, (x, y), r)
 
 
-def draw_cue_stick_line(table: PoolTable):
-    global SCREEN
-    # TODO
+def get_aim_lines(table: PoolTable) -> list:
+    """
+    Aim lines to draw, each ending in a ghost ball: the cue stick line, then the cue ball and object ball
+    deflection lines, as (x1, y1, x2, y2, r) screen coordinates and ghost ball radius.
+    """
 
-    if table.cue_line_end is None:
-        return
+    ends = []
+    if table.cue_line_end is not None:
+        ends.append((table.cue_ball.pos, table.cue_line_end))
+        if table.cue_deflect_line_end is not None:
+            ends.append((table.cue_line_end, table.cue_deflect_line_end))
+    if table.object_deflect_line_start is not None and table.object_deflect_line_end is not None:
+        ends.append((table.object_deflect_line_start, table.object_deflect_line_end))
 
-    p1 = coords_to_pygame(table.cue_ball.pos, HEIGHT)
-    p2 = coords_to_pygame(table.cue_line_end, HEIGHT)
+    lines = []
+    for start, end in ends:
+        p1, p2 = coords_to_pygame(start, HEIGHT), coords_to_pygame(end, HEIGHT)
+        lines.append((int(p1.x), int(p1.y), int(p2.x), int(p2.y), int(table.cue_ball.radius)))
 
-    x1, y1 = int(p1.x), int(p1.y)
-    x2, y2 = int(p2.x), int(p2.y)
-    color = (255, 255, 255)
+    return lines
 
-    pygame.gfxdraw.line(SCREEN, x1, y1, x2, y2, color)
 
-    # DRAW GHOST BALL
-    p = coords_to_pygame(table.cue_line_end, HEIGHT)
+def get_aim_rects(lines: list) -> list:
+    """
+    :return: screen areas covered by the given aim lines and their ghost balls
+    """
 
-    x, y, r = int(p.x), int(p.y), int(table.cue_ball.radius)
-    color = table.cue_ball.ball_type.color
+    rects = []
+    for x1, y1, x2, y2, r in lines:
+        rects += line_rects(x1, y1, x2, y2)
+        rects.append(circle_rect(x2, y2, r))
 
-    # Draw a circle
-    pygame.gfxdraw.aacircle(SCREEN, x, y, r, color)
+    return rects
 
 
-def draw_cue_ghost_ball(table: PoolTable):
-    global SCREEN
-    # TODO
+def draw_aim_line(surface: pygame.Surface, line: tuple, color):
+    """
+    Draw an aim line from get_aim_lines(), with an outline of the ghost ball at its end.
+    """
 
+    x1, y1, x2, y2, r = line
+    pygame.gfxdraw.line(surface, x1, y1, x2, y2, (255, 255, 255))
+    pygame.gfxdraw.aacircle(surface, x2, y2, r, color)
 
-def draw_cue_ball_deflection_line(table: PoolTable):
-    global SCREEN
 
-    if table.cue_deflect_line_end is None:
-        return
+def get_aim_layer(table: PoolTable, lines: list) -> pygame.Surface:
+    """
+    Screen-sized surface with the table and the given aim lines drawn on it. Only the areas of the old and new aim
+    lines are restored from the background and drawn on, so moving the aim costs little.
+    """
+    global AIM_LAYER, AIM_LAYER_KEY, AIM_LAYER_LINES
 
-    p1 = coords_to_pygame(table.cue_line_end, HEIGHT)
-    p2 = coords_to_pygame(table.cue_deflect_line_end, HEIGHT)
+    background = get_background(table)
+    if AIM_LAYER is None or AIM_LAYER_KEY != BACKGROUND_KEY:
+        AIM_LAYER = background.copy()
+        AIM_LAYER_KEY = BACKGROUND_KEY
+        AIM_LAYER_LINES = []
 
-    x1, y1 = int(p1.x), int(p1.y)
-    x2, y2 = int(p2.x), int(p2.y)
-    color = (255, 255, 255)
+    if lines != AIM_LAYER_LINES:
+        # Lines that stay put are erased and drawn again too, so anti-aliased pixels are never blended twice
+        for rect in get_aim_rects(AIM_LAYER_LINES) + get_aim_rects(lines):
+            AIM_LAYER.blit(background, rect, rect)
+        for line in lines:
+            draw_aim_line(AIM_LAYER, line, table.cue_ball.ball_type.color)
+        AIM_LAYER_LINES = lines
 
-    pygame.gfxdraw.line(SCREEN, x1, y1, x2, y2, color)
+    return AIM_LAYER
 
-    # # DRAW GHOST BALL
-    p = coords_to_pygame(table.cue_deflect_line_end, HEIGHT)
 
-    x, y, r = int(p.x), int(p.y), int(table.cue_ball.radius)
-    color = table.cue_ball.ball_type.color
-    pygame.gfxdraw.aacircle(SCREEN, x, y, r, color)
+def draw_cue_ghost_ball(table: PoolTable):
+    global SCREEN
+    # TODO
 
 
-def draw_object_ball_deflection_line(table: PoolTable):
+def draw_pool_ball(ball: PoolBall, pos: Coordinates = None) -> pygame.Rect:
+    """
+    :param ball: ball to draw
+    :param pos: where to draw it, if not at ball.pos (e.g. interpolated between time steps)
+    :return: screen area drawn on
+    """
     global SCREEN
 
-    if table.object_deflect_line_start is None or table.object_deflect_line_end is None:
-        return
+    p = coords_to_pygame(pos if pos is not None else ball.pos, HEIGHT)
 
-    p1 = coords_to_pygame(table.object_deflect_line_start, HEIGHT)
-    p2 = coords_to_pygame(table.object_deflect_line_end, HEIGHT)
+    x, y, r = int(p.x), int(p.y), int(ball.radius)
+    color = ball.ball_type.color
 
-    x1, y1 = int(p1.x), int(p1.y)
-    x2, y2 = int(p2.x), int(p2.y)
-    color = (255, 255, 255)
+    # Draw a circle
+    pygame.gfxdraw.aacircle(SCREEN, x, y, r, color)
+    pygame.gfxdraw.filled_circle(SCREEN, x, y, r, color)
 
-    pygame.gfxdraw.line(SCREEN, x1, y1, x2, y2, color)
+    return circle_rect(x, y, r)
 
-    # # DRAW GHOST BALL
-    p = coords_to_pygame(table.object_deflect_line_end, HEIGHT)
 
-    x, y, r = int(p.x), int(p.y), int(table.cue_ball.radius)
-    color = table.cue_ball.ball_type.color
-    pygame.gfxdraw.aacircle(SCREEN, x, y, r, color)
+def get_ball_rect(ball: PoolBall, pos: Coordinates) -> pygame.Rect:
+    """
+    Screen area draw_pool_ball() covers when drawing a ball at pos.
+    """
 
+    p = coords_to_pygame(pos, HEIGHT)
+    return circle_rect(int(p.x), int(p.y), int(ball.radius))
 
 
-def draw_pool_ball(ball: PoolBall):
+def redraw_areas(layer: pygame.Surface, rects: list, balls: list, positions: list, ball_rects: list):
+    """
+    Repaint screen areas one at a time: restore the area from the layer under the balls, then draw the balls
+    overlapping it again, clipped to it, so every pixel ends up as a full redraw would leave it.
+
+    :param layer: table and aim lines, from get_aim_layer()
+    :param rects: screen areas to repaint
+    :param balls: balls on the table, in drawing order
+    :param positions: where to draw each ball
+    :param ball_rects: screen area of each ball, from get_ball_rect()
+    """
     global SCREEN
 
-    p = coords_to_pygame(ball.pos, HEIGHT)
+    for rect in rects:
+        SCREEN.set_clip(rect)
+        SCREEN.blit(layer, rect, rect)
+        for k in rect.collidelistall(ball_rects):
+            draw_pool_ball(balls[k], positions[k])
 
-    x, y, r = int(p.x), int(p.y), int(ball.radius)
-    color = ball.ball_type.color
+    SCREEN.set_clip(None)
 
-    # Draw a circle
-    pygame.gfxdraw.aacircle(SCREEN, x, y, r, color)
-    pygame.gfxdraw.filled_circle(SCREEN, x, y, r, color)
+
+def get_positions(table: PoolTable) -> dict:
+    """
+    Copy of every ball's position, keyed by ball.
+    """
+
+    return {ball: Coordinates(ball.pos.x, ball.pos.y) for ball in table.balls.values()}
+
+
+def interpolate(prev: Coordinates, curr: Coordinates, alpha: float) -> Coordinates:
+    """
+    Point alpha of the way from prev to curr.
+    """
+
+    return Coordinates(prev.x + (curr.x - prev.x) * alpha, prev.y + (curr.y - prev.y) * alpha)
 
 
 def main():
+    global SIMULATION_SPEED
+    log.configure()
     init()
 
     # Create pool table
@@ -175,12 +308,38 @@ def main():
     se = coords_from_pygame((TABLE_OFFSET_X + TABLE_LENGTH, TABLE_OFFSET_Y + TABLE_LENGTH / 2), HEIGHT)
     table = PoolTable(nw, se)
 
+    clock = pygame.time.Clock()
+    step_time = 1.0 / PHYSICS_RATE
+    accumulator = 0.0
+
+    # Positions before and after the latest time step, for interpolation
+    prev_positions = curr_positions = get_positions(table)
+
+    # Real-time factor: simulated seconds per wall-clock second, smoothed
+    real_time_factor = 1.0
+
+    # Screen area of each ball and the aim lines as last drawn; only what changes is redrawn
+    drawn_rects = {}
+    drawn_aim_lines = []
+    full_redraw = True
+
+    # Phase timings, while profiling is switched on
+    profiler = None
+
+    # Every time step, while recording is switched on
+    recorder = None
+
     while 1:
+        # Wait for the next frame; this also keeps the loop from spinning a CPU core
+        frame_time = clock.tick(RENDER_FPS) / 1000.0
+        accumulator += frame_time * SIMULATION_SPEED
+
+        if profiler is not None:
+            profiler.begin_frame()
+
         # Get just the list of balls to iterate easily
         balls = list(table.balls.values())
 
-        clear_screen()
-
         # Check Pygame events
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -191,22 +350,16 @@ def main():
                 cue_pos = table.cue_ball.pos
 
                 table.cue_angle = get_angle(target_pos, cue_pos)
-                print('AFTER SETTING cue_angle', table.cue_angle)
+                log.log_event(RENDER_LOG, logging.DEBUG, 'cue_angle', cue_angle=table.cue_angle)
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_q:
                     sys.exit()
                 elif event.key == pygame.K_b:
                     # BREAK cue ball
-                    mag = 500.0
-                    force = Vector(mag * np.cos(np.radians(table.cue_angle)),
-                                   mag * np.sin(np.radians(table.cue_angle)))
-                    table.balls[BallType.CUE].apply_force(force)
+                    Shot(table.cue_angle, BREAK_FORCE).apply(table)
                 elif event.key == pygame.K_SPACE:
                     # Strike cue ball
-                    mag = 25.0
-                    force = Vector(mag * np.cos(np.radians(table.cue_angle)),
-                                   mag * np.sin(np.radians(table.cue_angle)))
-                    table.balls[BallType.CUE].apply_force(force)
+                    Shot(table.cue_angle, STRIKE_FORCE).apply(table)
                 elif event.key == pygame.K_p:
                     # DEBUG set all speeds to 0
                     for ball in balls:
@@ -217,24 +370,121 @@ def main():
                     nw = coords_from_pygame((TABLE_OFFSET_X, TABLE_OFFSET_Y), HEIGHT)
                     se = coords_from_pygame((TABLE_OFFSET_X + TABLE_LENGTH, TABLE_OFFSET_Y + TABLE_LENGTH / 2), HEIGHT)
                     table = PoolTable(nw, se)
+                    table.profiler = profiler
+                    # A recording covers one table
+                    if recorder is not None:
+                        recorder.close()
+                        log.log_event(RENDER_LOG, logging.INFO, 'recording', path=RECORDING_PATH,
+                                      frames=recorder.count)
+                        recorder = None
+                    prev_positions = curr_positions = get_positions(table)
+                    balls = list(table.balls.values())
+                    full_redraw = True
+                elif event.key == pygame.K_t:
+                    # Toggle profiling; switching it off writes the timeline of the latest frames
+                    if profiler is None:
+                        profiler = table.profiler = Profiler()
+                    else:
+                        profiler.write_chrome_trace(TRACE_PATH)
+                        log.log_event(RENDER_LOG, logging.INFO, 'profile', trace=TRACE_PATH,
+                                      summary=json.dumps(profiler.get_summary()))
+                        profiler = table.profiler = None
+                elif event.key == pygame.K_v:
+                    # Toggle recording of every time step
+                    if recorder is None:
+                        recorder = table.recorder = TrajectoryRecorder(RECORDING_PATH, list(table.balls))
+                        recorder.record(table)
+                    else:
+                        recorder.close()
+                        log.log_event(RENDER_LOG, logging.INFO, 'recording', path=RECORDING_PATH,
+                                      frames=recorder.count)
+                        recorder = table.recorder = None
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    SIMULATION_SPEED *= 2
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    SIMULATION_SPEED /= 2
+            elif event.type == pygame.VIDEOEXPOSE:
+                full_redraw = True
+
+        # Table time steps, at a fixed rate
+        steps = 0
+        while accumulator >= step_time and steps < MAX_STEPS_PER_FRAME:
+            table.time_step(aim=False)
+            prev_positions, curr_positions = curr_positions, get_positions(table)
+            accumulator -= step_time
+            steps += 1
+
+        if steps == MAX_STEPS_PER_FRAME:
+            # Too slow to keep up: let the simulation fall behind real time rather than stall rendering
+            accumulator = min(accumulator, step_time)
+
+        if frame_time > 0:
+            real_time_factor = 0.9 * real_time_factor + 0.1 * (steps * step_time / frame_time)
+            pygame.display.set_caption('Pool ({:.2f}x real time, {:.0f} fps)'.format(real_time_factor,
+                                                                                   clock.get_fps()))
+
+        # Aim lines only need to be updated once per drawn frame
+        if profiler is not None:
+            start = time.perf_counter_ns()
+        table.get_cue_ball_path()
+        if profiler is not None:
+            profiler.mark(CUE_BALL_PATH, start)
+        balls = list(table.balls.values())
+        alpha = accumulator / step_time
 
-        # Table time step
-        table.time_step()
-
-        # Draw pool table
-        draw_pool_table(table)
-
-        draw_cue_stick_line(table)
-        draw_cue_ghost_ball(table)
-        draw_cue_ball_deflection_line(table)
-        draw_object_ball_deflection_line(table)
-
-        # Draw all pool balls
+        # Interpolated ball positions, between their last two physics states
+        draw_positions = []
         for ball in balls:
-            draw_pool_ball(ball)
-
-        pygame.display.flip()
-
+            prev, curr = prev_positions.get(ball), curr_positions.get(ball)
+            draw_positions.append(interpolate(prev, curr, alpha) if prev is not None and curr is not None else ball.pos)
+
+        # Screen areas that change: where moved (or pocketed) balls were and now are, and where the old and new aim
+        # lines are if the aim changed. Nothing to redraw if no ball lands on new pixels and the aim is unchanged
+        aim_lines = get_aim_lines(table)
+        ball_rects = [get_ball_rect(ball, pos) for ball, pos in zip(balls, draw_positions)]
+        rects = dict(zip(balls, ball_rects))
+        if not full_redraw:
+            dirty = [rect for ball, rect in drawn_rects.items() if rects.get(ball) != rect]
+            dirty += [rect for ball, rect in rects.items() if drawn_rects.get(ball) != rect]
+            if aim_lines != drawn_aim_lines:
+                dirty += get_aim_rects(drawn_aim_lines) + get_aim_rects(aim_lines)
+            if not dirty:
+                continue
+
+        if profiler is not None:
+            start = time.perf_counter_ns()
+
+        layer = get_aim_layer(table, aim_lines)
+
+        if profiler is not None:
+            start = profiler.mark(DRAW_AIM, start)
+
+        if full_redraw:
+            clear_screen()
+            SCREEN.blit(layer, (0, 0))
+
+            if profiler is not None:
+                start = profiler.mark(DRAW_TABLE, start)
+
+            for ball, pos in zip(balls, draw_positions):
+                draw_pool_ball(ball, pos)
+        else:
+            redraw_areas(layer, dirty, balls, draw_positions, ball_rects)
+
+        if profiler is not None:
+            start = profiler.mark(DRAW_BALLS, start)
+
+        if full_redraw:
+            pygame.display.flip()
+            full_redraw = False
+        else:
+            pygame.display.update(dirty)
+
+        if profiler is not None:
+            profiler.mark(DISPLAY_UPDATE, start)
+
+        drawn_rects = rects
+        drawn_aim_lines = aim_lines
 
 if __name__ == '__main__':
     main()
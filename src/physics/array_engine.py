@@ -0,0 +1,226 @@
+"""
+Struct-of-arrays physics engine.
+
+Every ball's position, velocity, radius and mass lives in one contiguous NumPy array, so integration, friction,
+the dead-stop rule and wall/ball collisions run as whole-array operations instead of per-PoolBall Python calls.
+"""
+from typing import List
+
+import numpy as np
+
+from physics.broad_phase import get_colliding_pairs
+from physics.coordinates import CoordinatesView
+from physics.vector import VectorView
+from pool.pool_ball import PoolBall, DEAD_STOP_SPEED, FRICTION
+
+
+class ArrayEngine:
+    """
+    Steps a fixed set of balls stored as arrays.
+
+    After construction each PoolBall's pos/vel are views into the engine arrays, so code reading or writing
+    ball.pos / ball.vel keeps working unchanged.
+    """
+
+    def __init__(self, balls: List[PoolBall], use_grid: bool = False):
+        """
+        :param balls: balls to simulate; their pos/vel are rebound to the engine arrays
+        :param use_grid: use the uniform-grid broad phase for ball-ball collisions
+        """
+        n = len(balls)
+        self.use_grid = use_grid
+
+        self.balls = list(balls)
+        self.indices = {ball: i for i, ball in enumerate(self.balls)}
+
+        self.pos = np.empty((n, 2))
+        self.vel = np.empty((n, 2))
+        self.radius = np.empty(n)
+        self.mass = np.empty(n)
+
+        # Balls still in play (pocketed balls are deactivated)
+        self.active = np.ones(n, dtype=bool)
+
+        for i, ball in enumerate(self.balls):
+            self.pos[i] = ball.pos.x, ball.pos.y
+            self.vel[i] = ball.vel.x, ball.vel.y
+            self.radius[i] = ball.radius
+            self.mass[i] = ball.mass
+
+            ball.bind(CoordinatesView(self.pos[i]), VectorView(self.vel[i]))
+
+    def deactivate(self, ball: PoolBall):
+        """
+        Remove a ball from play; it is no longer moved or collided.
+
+        :param ball: ball to remove
+        """
+
+        i = self.indices[ball]
+        self.active[i] = False
+        self.vel[i] = 0.0
+
+    def time_step(self, top: float, left: float, bottom: float, right: float, dt: float = 1.0):
+        """
+        Advance every active ball by one time step (or a fraction dt of one), then detect and resolve collisions.
+
+        Mirrors PoolTable's per-ball path, except that simultaneous contacts are all resolved from the same
+        pre-collision velocities rather than one pair after another.
+
+        :param top: y-coordinate of the top cushion
+        :param left: x-coordinate of the left cushion
+        :param bottom: y-coordinate of the bottom cushion
+        :param right: x-coordinate of the right cushion
+        :param dt: fraction of a time step to advance by
+        """
+
+        self.integrate(dt)
+        self.resolve_wall_collisions(top, left, bottom, right, dt)
+        self.resolve_ball_collisions(dt)
+
+    def integrate(self, dt: float = 1.0):
+        """
+        Dead-stop slow velocity components, move every ball by its velocity and apply friction.
+        """
+
+        integrate(self.pos, self.vel, dt)
+
+    def resolve_wall_collisions(self, top: float, left: float, bottom: float, right: float, dt: float = 1.0):
+        """
+        Reflect the velocity of every ball about to hit a wall.
+        """
+
+        resolve_wall_collisions(self.pos, self.vel, self.radius, self.active, top, left, bottom, right, dt)
+
+    def get_colliding_pairs(self, dt: float = 1.0) -> (np.ndarray, np.ndarray):
+        """
+        Find every pair of active balls that will overlap after their next move.
+
+        :param dt: how far ahead to look, in time steps
+        :return: index arrays (i, j) of colliding pairs, i < j
+        """
+
+        in_play = np.flatnonzero(self.active)
+
+        # Look ahead by one velocity step, as check_ball_ball_collision() does
+        ahead = self.pos[in_play] + self.vel[in_play] * dt
+        i, j = get_colliding_pairs(ahead, self.radius[in_play], self.use_grid)
+
+        return in_play[i], in_play[j]
+
+    def resolve_ball_collisions(self, dt: float = 1.0):
+        """
+        Apply the elastic collision response from resolve_ball_ball_collision() to every colliding pair.
+        """
+
+        i, j = self.get_colliding_pairs(dt)
+        if len(i):
+            resolve_ball_collisions(self.pos, self.vel, self.mass, i, j)
+
+
+"""
+Array kernels.
+
+Besides the (n, ...) arrays used by ArrayEngine, these accept any number of leading batch axes, e.g. (tables, n, 2)
+positions, so many independent tables can be stepped at once.
+"""
+
+
+def integrate(pos: np.ndarray, vel: np.ndarray, dt: float = 1.0):
+    """
+    Dead-stop slow velocity components, move every ball by its velocity and apply friction, in place.
+
+    :param pos: (..., n, 2) positions
+    :param vel: (..., n, 2) velocities
+    :param dt: fraction of a time step to advance by
+    """
+
+    vel[np.abs(vel) < DEAD_STOP_SPEED] = 0.0
+    if dt == 1.0:
+        pos += vel
+    else:
+        pos += vel * dt
+    vel *= FRICTION ** dt
+
+
+def resolve_wall_collisions(pos: np.ndarray, vel: np.ndarray, radius: np.ndarray, active: np.ndarray,
+                            top: float, left: float, bottom: float, right: float, dt: float = 1.0):
+    """
+    Reflect the velocity of every active ball about to hit a wall, in place.
+    Like check_ball_wall_collision(), at most one wall is resolved per ball, checked N, E, S, W.
+
+    :param pos: (..., n, 2) positions
+    :param vel: (..., n, 2) velocities
+    :param radius: (n,) radii
+    :param active: (..., n) balls in play
+    :param dt: how far ahead to look, in time steps
+    """
+
+    ahead = pos + vel * dt
+    x, y = ahead[..., 0], ahead[..., 1]
+
+    north = active & (y + radius >= top)
+    east = active & ~north & (x - radius <= left)
+    south = active & ~(north | east) & (y - radius <= bottom)
+    west = active & ~(north | east | south) & (x + radius >= right)
+
+    vel[..., 1][north | south] *= -1
+    vel[..., 0][east | west] *= -1
+
+
+def get_colliding_mask(pos: np.ndarray, vel: np.ndarray, radius: np.ndarray, active: np.ndarray,
+                       i: np.ndarray, j: np.ndarray, dt: float = 1.0) -> np.ndarray:
+    """
+    Narrow phase: which of the candidate pairs (i, j) will overlap after their next move.
+
+    :param pos: (..., n, 2) positions
+    :param vel: (..., n, 2) velocities
+    :param radius: (n,) radii
+    :param active: (..., n) balls in play
+    :param i: (p,) first ball of each pair
+    :param j: (p,) second ball of each pair
+    :param dt: how far ahead to look, in time steps
+    :return: (..., p) whether each pair collides
+    """
+
+    # Look ahead by one velocity step, as check_ball_ball_collision() does
+    ahead = pos + vel * dt
+    d = ahead[..., i, :] - ahead[..., j, :]
+    reach = radius[i] + radius[j]
+
+    return (np.einsum('...i,...i->...', d, d) <= reach * reach) & active[..., i] & active[..., j]
+
+
+def resolve_ball_collisions(pos: np.ndarray, vel: np.ndarray, mass: np.ndarray, i: np.ndarray, j: np.ndarray,
+                            colliding: np.ndarray = None):
+    """
+    Apply the elastic collision response from resolve_ball_ball_collision() to pairs (i, j), in place.
+    All pairs are resolved from the same pre-collision velocities.
+
+    :param pos: (..., n, 2) positions
+    :param vel: (..., n, 2) velocities
+    :param mass: (n,) masses
+    :param i: (p,) first ball of each pair
+    :param j: (p,) second ball of each pair
+    :param colliding: (..., p) mask of the pairs to resolve; all pairs if None
+    """
+
+    dx = pos[..., i, :] - pos[..., j, :]
+    dv = vel[..., i, :] - vel[..., j, :]
+    dist_sq = np.einsum('...i,...i->...', dx, dx)
+
+    # Concentric balls have no collision normal
+    valid = dist_sq > 0
+    if colliding is not None:
+        valid &= colliding
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.where(valid, np.einsum('...i,...i->...', dv, dx) / dist_sq, 0.0)
+    impulse = scale[..., np.newaxis] * dx
+
+    m_i, m_j = mass[i][:, np.newaxis], mass[j][:, np.newaxis]
+
+    delta = np.zeros_like(vel)
+    np.add.at(delta, (Ellipsis, i, slice(None)), -(2 * m_j / (m_i + m_j)) * impulse)
+    np.add.at(delta, (Ellipsis, j, slice(None)), (2 * m_i / (m_i + m_j)) * impulse)
+    vel += delta
@@ -0,0 +1,189 @@
+"""
+Broad phase for ball-ball collision detection.
+
+Instead of testing every pair of balls, balls are binned into a uniform grid and only balls in the same or
+neighbouring cells are handed on to the (exact) narrow phase.
+"""
+import numpy as np
+
+# Half of the 3x3 neighbourhood of a cell, as (dx, dy). With the cell itself this visits each
+# unordered pair of neighbouring cells exactly once.
+FORWARD_NEIGHBOURS = ((0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def get_all_pairs(n: int) -> (np.ndarray, np.ndarray):
+    """
+    Brute-force broad phase: every unordered pair.
+
+    :param n: number of balls
+    :return: index arrays (i, j) with i < j
+    """
+
+    return np.triu_indices(n, 1)
+
+
+def get_grid_pairs(pos: np.ndarray, cell_size: float) -> (np.ndarray, np.ndarray):
+    """
+    Uniform-grid broad phase: every pair of points lying in the same or adjacent grid cells.
+    Any two points closer than cell_size are guaranteed to be returned.
+
+    :param pos: (n, 2) array of points
+    :param cell_size: side length of a grid cell
+    :return: index arrays (i, j) with i < j, sorted by i then j
+    """
+
+    n = len(pos)
+    if n < 2:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    cells = np.floor((pos - pos.min(axis=0)) / cell_size).astype(np.int64)
+
+    # Flatten (cx, cy) into one key; cy is shifted so that cy - 1 and cy + 1 never alias another column
+    height = cells[:, 1].max() + 3
+    keys = cells[:, 0] * height + cells[:, 1] + 1
+
+    # Group balls by cell
+    order = np.argsort(keys, kind='stable')
+    cell_keys, cell_start, cell_count = np.unique(keys[order], return_index=True, return_counts=True)
+    ball_cell = np.repeat(np.arange(len(cell_keys)), cell_count)
+    sorted_index = np.arange(n)
+
+    pairs_i, pairs_j = [], []
+
+    # Pairs within the same cell: each ball with the balls after it in that cell
+    lo = sorted_index + 1
+    hi = cell_start[ball_cell] + cell_count[ball_cell]
+    _append_ranges(pairs_i, pairs_j, sorted_index, lo, hi)
+
+    # Pairs between neighbouring cells
+    for dx, dy in FORWARD_NEIGHBOURS:
+        target = cell_keys + dx * height + dy
+        loc = np.minimum(np.searchsorted(cell_keys, target), len(cell_keys) - 1)
+        found = cell_keys[loc] == target
+
+        has_neighbour = found[ball_cell]
+        src = sorted_index[has_neighbour]
+        neighbour = loc[ball_cell[has_neighbour]]
+        lo = cell_start[neighbour]
+        _append_ranges(pairs_i, pairs_j, src, lo, lo + cell_count[neighbour])
+
+    if not pairs_i:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    i = order[np.concatenate(pairs_i)]
+    j = order[np.concatenate(pairs_j)]
+    i, j = np.minimum(i, j), np.maximum(i, j)
+
+    by_pair = np.lexsort((j, i))
+    return i[by_pair], j[by_pair]
+
+
+def _append_ranges(pairs_i: list, pairs_j: list, src: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+    """
+    Pair each src[k] with every index in range(lo[k], hi[k]).
+    """
+
+    count = np.maximum(hi - lo, 0)
+    total = count.sum()
+    if total == 0:
+        return
+
+    # Offset of each pair within its range
+    range_start = np.cumsum(count) - count
+    offset = np.arange(total) - np.repeat(range_start, count)
+
+    pairs_i.append(np.repeat(src, count))
+    pairs_j.append(np.repeat(lo, count) + offset)
+
+
+def get_colliding_pairs(pos: np.ndarray, radius: np.ndarray, use_grid: bool) -> (np.ndarray, np.ndarray):
+    """
+    Find every pair of circles that touch or overlap.
+    The grid and brute-force broad phases return exactly the same pairs.
+
+    :param pos: (n, 2) array of circle centers
+    :param radius: (n,) array of circle radii
+    :param use_grid: use the uniform-grid broad phase instead of testing all pairs
+    :return: index arrays (i, j) of colliding pairs, i < j, sorted by i then j
+    """
+
+    if use_grid:
+        # Two circles can only touch if their centers are within the largest possible sum of radii
+        # (padded slightly so rounding can never push touching circles two cells apart)
+        i, j = get_grid_pairs(pos, 2 * radius.max() * (1 + 1e-9)) if len(radius) else get_all_pairs(0)
+    else:
+        i, j = get_all_pairs(len(pos))
+
+    d = pos[i] - pos[j]
+    reach = radius[i] + radius[j]
+    colliding = np.einsum('ij,ij->i', d, d) <= reach * reach
+
+    return i[colliding], j[colliding]
+
+
+class CircleQuery:
+    """
+    Broad phase for one circle at a time, e.g. one whose radius has grown: centers are sorted along x once, so a
+    query only tests the circles within reach along x instead of every circle.
+    """
+
+    def __init__(self, pos: np.ndarray, radius: np.ndarray):
+        """
+        :param pos: (n, 2) array of circle centers
+        :param radius: (n,) array of circle radii; kept, and updated in place by set_radius()
+        """
+        self.pos = pos
+        self.radius = radius
+        self.order = np.argsort(pos[:, 0], kind='stable')
+        self.x = pos[self.order, 0]
+
+        # Never shrinks, so queries stay conservative
+        self.max_radius = float(radius.max()) if len(radius) else 0.0
+
+    def set_radius(self, k: int, radius: float):
+        self.radius[k] = radius
+        self.max_radius = max(self.max_radius, radius)
+
+    def get_touching(self, k: int) -> np.ndarray:
+        """
+        :param k: index of a circle
+        :return: indices of the circles touching or overlapping circle k, itself excluded
+        """
+
+        x = self.pos[k, 0]
+        reach = self.radius[k] + self.max_radius
+        lo = np.searchsorted(self.x, x - reach, side='left')
+        hi = np.searchsorted(self.x, x + reach, side='right')
+        candidates = self.order[lo:hi]
+
+        d = self.pos[candidates] - self.pos[k]
+        reach = self.radius[candidates] + self.radius[k]
+        touching = candidates[np.einsum('ij,ij->i', d, d) <= reach * reach]
+
+        return touching[touching != k]
+
+
+def get_islands(n: int, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """
+    Connected components of a graph given as an edge list, e.g. balls linked by possible contacts.
+
+    :param n: number of nodes
+    :param i: first node of each edge
+    :param j: second node of each edge
+    :return: (n,) label of each node's component: the smallest node index in that component
+    """
+
+    labels = np.arange(n)
+    if len(i) == 0:
+        return labels
+
+    while True:
+        previous = labels.copy()
+
+        # Pull the smaller label across every edge, then shortcut label chains
+        np.minimum.at(labels, i, labels[j])
+        np.minimum.at(labels, j, labels[i])
+        labels = labels[labels]
+
+        if np.array_equal(labels, previous):
+            return labels
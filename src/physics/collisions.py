@@ -1,25 +1,26 @@
 from typing import Optional
 
-from physics.coordinates import Coordinates
 from physics.direction import Direction
-from physics.utility import get_distance
-from physics.vector import Vector
 from pool.pool_ball import PoolBall
 
 
-def check_ball_ball_collision(a: PoolBall, b: PoolBall) -> bool:
+def check_ball_ball_collision(a: PoolBall, b: PoolBall, dt: float = 1.0) -> bool:
     """
     Check if two balls have collided.
 
     :param a: ball A
     :param b: ball B
+    :param dt: how far ahead to look, in time steps
     :return: whether these two balls are in collision
     """
-    a_pos = Coordinates(a.pos.x + a.vel.x, a.pos.y + a.vel.y)
-    b_pos = Coordinates(b.pos.x + b.vel.x, b.pos.y + b.vel.y)
 
-    d = get_distance(a_pos, b_pos)
-    is_colliding = d <= (a.radius + b.radius)
+    # Compare positions one step ahead, without building them
+    a_pos, a_vel, b_pos, b_vel = a.pos, a.vel, b.pos, b.vel
+    dx = (a_pos.x + a_vel.x * dt) - (b_pos.x + b_vel.x * dt)
+    dy = (a_pos.y + a_vel.y * dt) - (b_pos.y + b_vel.y * dt)
+
+    reach = a.radius + b.radius
+    is_colliding = dx * dx + dy * dy <= reach * reach
 
     return is_colliding
 
@@ -33,16 +34,24 @@ def resolve_ball_ball_collision(a: PoolBall, b: PoolBall):
     """
 
     # Taken from https://en.wikipedia.org/wiki/Elastic_collision#Two-dimensional_collision_with_two_moving_objects
+    # Both balls are pushed along the line of centers (a.pos - b.pos) by the same relative-velocity term
+
+    a_pos, a_vel, b_pos, b_vel = a.pos, a.vel, b.pos, b.vel
+    dx = a_pos.x - b_pos.x
+    dy = a_pos.y - b_pos.y
 
-    a_vel_new = a.vel - (2 * b.mass) / (a.mass + b.mass) * ((a.vel - b.vel).dot_product(a.pos - b.pos)) / get_distance(
-        a.pos - b.pos) ** 2 * (a.pos - b.pos)
-    b_vel_new = b.vel - (2 * a.mass) / (a.mass + b.mass) * ((b.vel - a.vel).dot_product(b.pos - a.pos)) / get_distance(
-        b.pos - a.pos) ** 2 * (b.pos - a.pos)
+    impulse = ((a_vel.x - b_vel.x) * dx + (a_vel.y - b_vel.y) * dy) / (dx * dx + dy * dy)
 
-    a.vel, b.vel = a_vel_new, b_vel_new
+    a_scale = (2 * b.mass) / (a.mass + b.mass) * impulse
+    b_scale = (2 * a.mass) / (a.mass + b.mass) * impulse
 
+    a_vel.x -= a_scale * dx
+    a_vel.y -= a_scale * dy
+    b_vel.x += b_scale * dx
+    b_vel.y += b_scale * dy
 
-def check_ball_wall_collision(ball: PoolBall, top, left, bottom, right) -> Optional[Direction]:
+
+def check_ball_wall_collision(ball: PoolBall, top, left, bottom, right, dt: float = 1.0) -> Optional[Direction]:
     """
     Check if a ball has collided with a wall.
     Assuming PyGame origin of upper-left.
@@ -50,19 +59,20 @@ def check_ball_wall_collision(ball: PoolBall, top, left, bottom, right) -> Optio
     :param ball: pool ball
     :param nw: coordinates of northwest corner of pool table
     :param se: coordinates of southeast corner of pool table
+    :param dt: how far ahead to look, in time steps
     :return: the wall this ball has collided with OR None
     """
 
-
+    x, y = ball.pos.x + ball.vel.x * dt, ball.pos.y + ball.vel.y * dt
 
     # Add velocity to avoid 'sticking' to walls
-    if ball.pos.y + ball.vel.y + ball.radius >= top:
+    if y + ball.radius >= top:
         return Direction.NORTH
-    elif ball.pos.x + ball.vel.x - ball.radius <= left:
+    elif x - ball.radius <= left:
         return Direction.EAST
-    elif ball.pos.y + ball.vel.y - ball.radius <= bottom:
+    elif y - ball.radius <= bottom:
         return Direction.SOUTH
-    elif ball.pos.x + ball.vel.x + ball.radius >= right:
+    elif x + ball.radius >= right:
         return Direction.WEST
     else:
         return None
@@ -78,7 +88,8 @@ def resolve_ball_wall_collision(ball: PoolBall, wall: Direction):
     :param wall: which wall (N, E, S, W)
     """
 
+    vel = ball.vel
     if wall == Direction.NORTH or wall == Direction.SOUTH:
-        ball.vel = Vector(ball.vel.x, -ball.vel.y)  # Reverse y-direction
+        vel.y = -vel.y  # Reverse y-direction
     else:  # EAST or WEST
-        ball.vel = Vector(-ball.vel.x, ball.vel.y)  # Reverse x-direction
+        vel.x = -vel.x  # Reverse x-direction
@@ -3,6 +3,8 @@ class Coordinates():
     Cartesian coordinates.
     """
 
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: float, y: float):
         self.x = float(x)
         self.y = float(y)
@@ -13,6 +15,33 @@ class Coordinates():
     def __sub__(self, other):
         return Coordinates(self.x - other.x, self.y - other.y)
 
+    def __iadd__(self, other):
+        """
+        Move these coordinates by other, in place.
+        """
+
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def __isub__(self, other):
+        """
+        Move these coordinates by -other, in place.
+        """
+
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def __imul__(self, scalar: float):
+        """
+        Scale these coordinates, in place.
+        """
+
+        self.x *= scalar
+        self.y *= scalar
+        return self
+
     def __mul__(self, scalar: float):
         """
         Multiply this vector by a scalar.
@@ -41,3 +70,33 @@ class Coordinates():
 
     def __ne__(self, other):
         return not self.__eq__(other)
+
+
+class CoordinatesView(Coordinates):
+    """
+    Coordinates backed by a row of a NumPy array, so reads and writes go straight to the array.
+    """
+
+    __slots__ = ('_row',)
+
+    def __init__(self, row):
+        """
+        :param row: writable NumPy view of shape (2,) holding (x, y)
+        """
+        self._row = row
+
+    @property
+    def x(self):
+        return self._row[0]
+
+    @x.setter
+    def x(self, value: float):
+        self._row[0] = value
+
+    @property
+    def y(self):
+        return self._row[1]
+
+    @y.setter
+    def y(self, value: float):
+        self._row[1] = value
@@ -1,6 +1,7 @@
 """
 Utility class to hold various functions.
 """
+import math
 from typing import Optional
 
 import numpy as np
@@ -108,9 +109,7 @@ def get_ray_circle_intersection(p1: Coordinates, p2: Coordinates, c_mid: Coordin
     # print('c_mid:{}, c_radius:{}'.format(c_mid, c_radius))
     # print('-------')
     if (p2.x - p1.x) == 0:
-        print('p2.x = ', p2.x)
-        print('p1.x = ', p1.x)
-        exit(-1)
+        raise ValueError('vertical line from {} to {} has no slope-intercept form'.format(p1, p2))
     # Line equation: y = mx + b
     m = (p2.y - p1.y) / (p2.x - p1.x)
     b = p1.y - m * p1.x
@@ -127,11 +126,9 @@ def get_ray_circle_intersection(p1: Coordinates, p2: Coordinates, c_mid: Coordin
     discrim = B ** 2 - 4 * A * C
 
     if discrim < 0:
-        print('line misses circle')
         # Line misses circle
         return None
     elif discrim == 0:
-        print('line is tangent to circle')
         # Line tangent to circle
         x1 = (-B + np.sqrt(discrim)) / 2 * A
         y1 = m * x1 + b
@@ -142,7 +139,6 @@ def get_ray_circle_intersection(p1: Coordinates, p2: Coordinates, c_mid: Coordin
         return Coordinates(x1, y1)
 
     else:  # discrim > 0
-        print('line intersects circle')
         # Line meets circle at 2 points
         x1 = (-B + np.sqrt(discrim)) / 2 * A
         result1 = Coordinates(x1, m * x1 + b)
@@ -296,24 +292,122 @@ def get_parallel_line(p1: Coordinates, p2: Coordinates, dist: float, top: bool)
     return p3, p4
 
 
-def get_point_on_line_distance_from_point(line_start, line_end, point, distance) -> Coordinates:
-    a_side = distance
-    c_side = get_distance(line_start, point)
+def get_point_on_line_distance_from_point(line_start: Coordinates, line_end: Coordinates, point: Coordinates,
+                                          distance: float) -> Optional[Coordinates]:
+    """
+    Find the point on a line, nearest its start, that is a given distance from another point.
+    With distance = 2r and point an object ball, this is where the cue ball touches it (the ghost ball).
+
+    :param line_start: start of the line
+    :param line_end: any other point on the line, giving its direction
+    :param point: point to measure from
+    :param distance: required distance from point
+    :return: point on the line; None if the line never comes within distance of point
+    """
+
+    # Closed form: the nearer root of |line_start + t*u - point| = distance, u the unit direction of the line
+    dx, dy = line_end.x - line_start.x, line_end.y - line_start.y
+    length = math.hypot(dx, dy)
+    ux, uy = dx / length, dy / length
+
+    wx, wy = point.x - line_start.x, point.y - line_start.y
+    along = wx * ux + wy * uy
+    across = wx * uy - wy * ux
+
+    slack = distance * distance - across * across
+    if slack < 0:
+        return None
+
+    t = along - math.sqrt(slack)
+    return Coordinates(line_start.x + t * ux, line_start.y + t * uy)
+
 
-    v_point = Vector(point.x - line_start.x, point.y - line_start.y)
-    v_line = Vector(line_end.x - line_start.x, line_end.y - line_start.y)
-    dot = v_point.dot_product(v_line)
+def get_points_on_lines_distance_from_points(line_start: np.ndarray, direction: np.ndarray, point: np.ndarray,
+                                             distance: np.ndarray) -> (np.ndarray, np.ndarray):
+    """
+    Batched get_point_on_line_distance_from_point(); all arguments broadcast against each other.
+
+    :param line_start: (..., 2) starts of the lines
+    :param direction: (..., 2) unit directions of the lines
+    :param point: (..., 2) points to measure from
+    :param distance: (...) required distances
+    :return: travel (...) from each line start to its point, and the points (..., 2);
+             both NaN where a line never comes within distance of its point
+    """
+
+    w = np.asarray(point, dtype=float) - line_start
+    along = np.einsum('...i,...i->...', direction, w)
+    across = direction[..., 0] * w[..., 1] - direction[..., 1] * w[..., 0]
+
+    slack = distance * distance - across * across
+    with np.errstate(invalid='ignore'):
+        travel = along - np.sqrt(slack)
+
+    return travel, line_start + direction * travel[..., np.newaxis]
+
+
+def get_travel_within_box(start: np.ndarray, direction: np.ndarray, nw: Coordinates, se: Coordinates,
+                          offset: float) -> np.ndarray:
+    """
+    How far a point can travel in each direction before coming within 'offset' of a side of the box.
+    Vectorized counterpart of get_line_endpoint_within_box().
 
-    a_angle = np.arccos(dot / v_point.get_magnitude() / v_line.get_magnitude())
+    :param start: (2,) start point
+    :param direction: (..., 2) unit directions
+    :param nw: upper-left border of the box
+    :param se: lower-right border of the box
+    :param offset: distance to keep from the sides, e.g. a ball radius
+    :return: (...) travel along each direction
+    """
+
+    low = np.array([nw.x + offset, se.y + offset])
+    high = np.array([se.x - offset, nw.y - offset])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        travel = np.where(direction > 0, (high - start) / direction,
+                          np.where(direction < 0, (low - start) / direction, np.inf))
+
+    return np.maximum(travel.min(axis=-1), 0.0)
+
+
+def sweep_circle(start: np.ndarray, direction: np.ndarray, length: np.ndarray, centers: np.ndarray,
+                 reach: np.ndarray) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+    Move a circle from start along direction and find the first of many circles it would touch, for one or many
+    lines at once.
+
+    :param start: (..., 2) start of the moving circle's center, broadcast against direction
+    :param direction: (..., 2) unit directions of travel
+    :param length: (...) furthest the moving circle may travel along each direction
+    :param centers: (n, 2) centers of the circles in the way
+    :param reach: (n,) or (..., n) contact distance for each circle: the sum of the two radii
+    :return: index (...) of the circle hit first, -1 if none;
+             travel (...) of the moving circle until contact, inf if none;
+             ghost (..., 2) center of the moving circle at contact, or at the end of its travel if nothing is hit
+    """
+
+    start = np.asarray(start, dtype=float)
+    direction = np.asarray(direction, dtype=float)
+    length = np.asarray(length, dtype=float)
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+
+    # Contact happens where the moving center comes within reach of a circle in front of it
+    travel, _ = get_points_on_lines_distance_from_points(start[..., np.newaxis, :], direction[..., np.newaxis, :],
+                                                         centers, reach)
+    in_front = np.einsum('...i,...ni->...n', direction, centers - start[..., np.newaxis, :]) > 0
+
+    hit = in_front & ~np.isnan(travel)
+    travel = np.maximum(np.where(hit, travel, np.inf), 0.0)
+    travel = np.where(travel <= length[..., np.newaxis], travel, np.inf)
+
+    if travel.shape[-1] == 0:
+        index = np.full(travel.shape[:-1], -1)
+        first = np.full(travel.shape[:-1], np.inf)
+    else:
+        index = travel.argmin(axis=-1)
+        first = np.take_along_axis(travel, index[..., np.newaxis], axis=-1)[..., 0]
+        index = np.where(np.isinf(first), -1, index)
 
-    from physics.trianglesolver import solve
-    (a_side, b_side, c_side, a_angle, b_angle, c_angle) = solve(a=a_side, c=c_side, A=a_angle, ssa_flag='obtuse')
-    assert a_angle + b_angle + c_angle == np.radians(180), 'a_angle: {} \nb_angle: {}\nc_angle: {}\n'.format(a_angle,
-                                                                                                             b_angle,
-                                                                                                             c_angle)
-    # Compute exact point
-    angle = np.radians(get_angle(line_end, line_start))
-    x = line_start.x + b_side * np.cos(angle)
-    y = line_start.y + b_side * np.sin(angle)
+    ghost = start + direction * np.where(np.isinf(first), length, first)[..., np.newaxis]
 
-    return Coordinates(x, y)
+    return index, first, ghost
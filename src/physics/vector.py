@@ -1,4 +1,3 @@
-import physics.utility as util
 from physics.coordinates import Coordinates
 from physics.direction import Direction
 
@@ -8,6 +7,8 @@ class Vector:
     2-D vector with x and y components.
     """
 
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: float, y: float):
         self.x = float(x)
         self.y = float(y)
@@ -40,6 +41,7 @@ class Vector:
         """
         Get the magnitude for this vector.
         """
+        import physics.utility as util  # physics.utility imports this module
 
         return util.get_distance(Coordinates(self.x, self.y))
 
@@ -47,6 +49,7 @@ class Vector:
         """
         Get the angle for this vector.
         """
+        import physics.utility as util  # physics.utility imports this module
 
         return util.get_angle(Coordinates(self.x, self.y))
 
@@ -77,6 +80,33 @@ class Vector:
 
         return Vector(self.x - other.x, self.y - other.y)
 
+    def __iadd__(self, other):
+        """
+        Add another vector to this vector, in place.
+        """
+
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def __isub__(self, other):
+        """
+        Subtract another vector from this vector, in place.
+        """
+
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def __imul__(self, scalar: float):
+        """
+        Scale this vector, in place.
+        """
+
+        self.x *= scalar
+        self.y *= scalar
+        return self
+
     def __mul__(self, other: 'Vector' or float or int):
         """
         Multiply this vector by another vector OR a scalar.
@@ -108,3 +138,33 @@ class Vector:
 
     def __ne__(self, other):
         return not self.__eq__(other)
+
+
+class VectorView(Vector):
+    """
+    Vector backed by a row of a NumPy array, so reads and writes go straight to the array.
+    """
+
+    __slots__ = ('_row',)
+
+    def __init__(self, row):
+        """
+        :param row: writable NumPy view of shape (2,) holding (x, y)
+        """
+        self._row = row
+
+    @property
+    def x(self):
+        return self._row[0]
+
+    @x.setter
+    def x(self, value: float):
+        self._row[0] = value
+
+    @property
+    def y(self):
+        return self._row[1]
+
+    @y.setter
+    def y(self, value: float):
+        self._row[1] = value
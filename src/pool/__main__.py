@@ -0,0 +1,188 @@
+"""
+Command line entry point, run from the src directory:
+
+    python -m pool simulate --game NINE_BALL --angle 0 --force 500
+    python -m pool search --game NINE_BALL
+    python -m pool breaks --game EIGHT_BALL --breaks 100000 --seed 1
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+
+from pool import log
+from pool.broad_phase_type import BroadPhaseType
+from pool.engine_type import EngineType
+from pool.game_type import GameType
+from pool.pool_table import MAX_SUBSTEPS
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m pool')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    simulate = commands.add_parser('simulate', help='play one shot headlessly and print the result as JSON')
+    games = [g.name for g in GameType]
+    simulate.add_argument('--game', choices=games, default=GameType.NINE_BALL.name)
+    simulate.add_argument('--angle', type=float, default=0.0, help='cue angle in degrees')
+    simulate.add_argument('--force', type=float, default=500.0, help='strike force')
+    simulate.add_argument('--max-steps', type=int, default=10000, help='step budget')
+    simulate.add_argument('--engine', choices=[e.name for e in EngineType], default=EngineType.SCALAR.name)
+    simulate.add_argument('--broad-phase', choices=[b.name for b in BroadPhaseType],
+                          default=BroadPhaseType.BRUTE_FORCE.name)
+    simulate.add_argument('--max-substeps', type=int, default=MAX_SUBSTEPS,
+                          help='most substeps a fast time step is split into (1: never split)')
+    simulate.add_argument('--indent', type=int, default=None, help='pretty-print the JSON output')
+    simulate.add_argument('--profile', default=None, metavar='TRACE',
+                          help='time each phase of every step: add percentiles to the output and write a Chrome '
+                               'trace_event timeline to this file')
+    simulate.add_argument('--record', default=None, metavar='PATH',
+                          help='record every time step to this file, for replay with TrajectoryPlayer')
+
+    search = commands.add_parser('search', help='search cue angles and forces for the best shot from the rack, '
+                                                'across all cores, and print the ranked shots as JSON')
+    search.add_argument('--game', choices=games, default=GameType.NINE_BALL.name)
+    search.add_argument('--angles', type=int, default=72, help='cue angles in the coarse grid')
+    search.add_argument('--forces', default='25,75,150,300,500', help='comma-separated forces of the coarse grid')
+    search.add_argument('--refine-rounds', type=int, default=2)
+    search.add_argument('--processes', type=int, default=None, help='worker processes (default: number of cores)')
+    search.add_argument('--max-steps', type=int, default=10000, help='step budget per rollout')
+    search.add_argument('--top', type=int, default=10, help='shots to print')
+    search.add_argument('--indent', type=int, default=None, help='pretty-print the JSON output')
+
+    breaks = commands.add_parser('breaks', help='play many breaks from randomized racks across all cores and print '
+                                                'aggregate statistics as JSON')
+    breaks.add_argument('--game', choices=[GameType.NINE_BALL.name, GameType.EIGHT_BALL.name],
+                        default=GameType.NINE_BALL.name)
+    breaks.add_argument('--breaks', type=int, default=1000, help='number of breaks')
+    breaks.add_argument('--seed', type=int, default=0, help='results depend only on the seed and number of breaks')
+    breaks.add_argument('--jitter', type=float, default=0.0, help='largest random gap between racked balls')
+    breaks.add_argument('--angle', type=float, default=0.0, help='cue angle in degrees')
+    breaks.add_argument('--angle-spread', type=float, default=0.0,
+                        help='standard deviation of random cue angle error, degrees')
+    breaks.add_argument('--force', type=float, default=500.0, help='strike force')
+    breaks.add_argument('--engine', choices=[e.name for e in EngineType], default=EngineType.SCALAR.name)
+    breaks.add_argument('--processes', type=int, default=None, help='worker processes (default: number of cores)')
+    breaks.add_argument('--max-steps', type=int, default=10000, help='step budget per break')
+    breaks.add_argument('--indent', type=int, default=None, help='pretty-print the JSON output')
+
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default='WARNING',
+                        help='level for the subsystems given by --log')
+    parser.add_argument('--log', default=None,
+                        help='comma-separated subsystems to log at --log-level: physics, aim, pocket, render '
+                             '(default: all)')
+    parser.add_argument('--log-file', default=None, help='write logs to this file as JSON lines instead of stderr')
+
+    return parser
+
+
+def run_simulate(args) -> dict:
+    from pool.headless import simulate
+    from pool.profiler import Profiler
+
+    profiler = Profiler(trace_frames=args.max_steps) if args.profile is not None else None
+
+    result = simulate(game=GameType[args.game],
+                      angle=args.angle,
+                      force=args.force,
+                      max_steps=args.max_steps,
+                      engine=EngineType[args.engine],
+                      broad_phase=BroadPhaseType[args.broad_phase],
+                      max_substeps=args.max_substeps,
+                      profiler=profiler,
+                      record=args.record)
+
+    if profiler is not None:
+        profiler.write_chrome_trace(args.profile)
+
+    return result
+
+
+def run_search(args) -> dict:
+    from pool.headless import DEFAULT_NW, DEFAULT_SE
+    from pool.pool_table import PoolTable
+    from pool.shot_search import search_shots
+
+    table = PoolTable(DEFAULT_NW, DEFAULT_SE, game=GameType[args.game])
+    ranked, stats = search_shots(table,
+                                 angles=args.angles,
+                                 forces=[float(force) for force in args.forces.split(',')],
+                                 refine_rounds=args.refine_rounds,
+                                 processes=args.processes,
+                                 max_steps=args.max_steps)
+
+    return {
+        'game': args.game,
+        'shots': [
+            {
+                'angle': s.shot.angle,
+                'force': s.shot.force,
+                'score': s.score,
+                'pocketed': [str(name) for name in s.result.get_pocketed()],
+                'scratched': s.result.scratched,
+                'missed': s.result.missed,
+                'leave': s.result.leave,
+                'steps': s.result.steps,
+            }
+            for s in ranked[:args.top]
+        ],
+        'stats': stats,
+    }
+
+
+def run_breaks(args) -> dict:
+    from pool.break_analysis import BreakSettings, analyze_breaks
+    from pool.headless import DEFAULT_NW, DEFAULT_SE
+
+    settings = BreakSettings(DEFAULT_NW, DEFAULT_SE,
+                             game=GameType[args.game],
+                             seed=args.seed,
+                             jitter=args.jitter,
+                             angle=args.angle,
+                             force=args.force,
+                             angle_spread=args.angle_spread,
+                             engine=EngineType[args.engine],
+                             max_steps=args.max_steps)
+
+    start = time.perf_counter()
+    stats = analyze_breaks(settings, args.breaks, processes=args.processes)
+    seconds = time.perf_counter() - start
+
+    result = {'game': args.game, 'seed': args.seed}
+    result.update(stats.get_summary())
+    result['timings'] = {'seconds': seconds, 'breaks_per_second': args.breaks / seconds if seconds > 0 else None}
+
+    return result
+
+
+def configure_logging(args):
+    subsystems = None
+    if args.log is not None:
+        subsystems = ['pool.' + subsystem.strip() for subsystem in args.log.split(',') if subsystem.strip()]
+        unknown = [subsystem for subsystem in subsystems if subsystem not in log.SUBSYSTEMS]
+        if unknown:
+            raise SystemExit('unknown log subsystem: {}'.format(', '.join(unknown)))
+
+    # Logs never go to stdout, which carries the JSON result
+    log.configure(level=getattr(logging, args.log_level), subsystems=subsystems, path=args.log_file,
+                  json_lines=args.log_file is not None)
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    configure_logging(args)
+
+    if args.command == 'simulate':
+        result = run_simulate(args)
+    elif args.command == 'search':
+        result = run_search(args)
+    elif args.command == 'breaks':
+        result = run_breaks(args)
+
+    json.dump(result, sys.stdout, indent=args.indent)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
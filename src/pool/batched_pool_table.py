@@ -0,0 +1,175 @@
+import numpy as np
+
+from physics.array_engine import integrate, resolve_wall_collisions, get_colliding_mask, resolve_ball_collisions
+from physics.broad_phase import get_all_pairs
+from pool.ball_type import BallType
+from pool.pocket_event import PocketEvent
+from pool.pool_table import PoolTable, CUE_START_DIAMOND, LONG_DIAMONDS, SUBSTEP_TRAVEL
+from pool.table_snapshot import TableSnapshot
+
+
+class BatchedPoolTable:
+    """
+    Many copies of one PoolTable, stepped together as a [tables x balls] state tensor.
+
+    Every table starts from the same layout; each can be given its own cue strike, and all of them advance in a
+    single vectorized step (movement, wall and ball collisions, pocketing). Fast time steps are split into
+    substeps the way PoolTable.time_step() splits them, each table by its own fastest ball.
+    """
+
+    def __init__(self, table: PoolTable, n_tables: int):
+        """
+        :param table: table whose current state every copy starts from
+        :param n_tables: number of copies
+        """
+
+        self.table = table
+        self.n_tables = n_tables
+
+        self.names = list(table.balls)
+        balls = list(table.balls.values())
+        self.cue_index = self.names.index(BallType.CUE)
+
+        pos = np.array([(ball.pos.x, ball.pos.y) for ball in balls], dtype=float)
+        vel = np.array([(ball.vel.x, ball.vel.y) for ball in balls], dtype=float)
+
+        # [tables x balls x 2] state
+        self.pos = np.tile(pos, (n_tables, 1, 1))
+        self.vel = np.tile(vel, (n_tables, 1, 1))
+        self.present = np.ones((n_tables, len(balls)), dtype=bool)
+
+        self.radius = np.array([ball.radius for ball in balls], dtype=float)
+        self.mass = np.array([ball.mass for ball in balls], dtype=float)
+
+        self.pair_i, self.pair_j = get_all_pairs(len(balls))
+
+        self.pockets = np.array([(pocket.x, pocket.y) for pocket in table.hole_centers])
+        self.cue_spot = (table.left + (CUE_START_DIAMOND / LONG_DIAMONDS) * table.length,
+                         table.bottom + table.width / 2 + 20)
+
+        self.steps = 0
+
+        # Substeps allowed per time step, and per table: substeps taken and time steps that needed more
+        self.max_substeps = table.max_substeps
+        self.substeps = np.zeros(n_tables, dtype=np.int64)
+        self.capped_steps = np.zeros(n_tables, dtype=np.int64)
+
+        # Balls pocketed on each table, steps counted on from the template's
+        self.pocket_events = [[] for _ in range(n_tables)]
+
+    def apply_forces(self, forces: np.ndarray):
+        """
+        Strike the cue ball of every table, as PoolBall.apply_force() does.
+
+        :param forces: (tables, 2) force applied to each table's cue ball
+        """
+
+        self.vel[:, self.cue_index] += np.asarray(forces, dtype=float) / self.mass[self.cue_index]
+
+    def get_substeps(self) -> np.ndarray:
+        """
+        Substeps to split each table's next time step into, as PoolTable.get_substeps() counts them. Updates the
+        substep counters.
+
+        :return: (tables,) number of substeps, at least 1
+        """
+
+        travel_sq = np.einsum('...i,...i->...', self.vel, self.vel) / self.radius ** 2
+        needed = np.maximum(np.ceil(np.sqrt(travel_sq.max(axis=1)) / SUBSTEP_TRAVEL), 1).astype(np.int64)
+        substeps = np.minimum(needed, max(self.max_substeps, 1))
+
+        self.substeps += substeps
+        self.capped_steps += needed > substeps
+
+        return substeps
+
+    def advance(self, pos: np.ndarray, vel: np.ndarray, present: np.ndarray, dt: float):
+        """
+        Move and collide the balls of some tables by a fraction dt of a time step, in place.
+        """
+
+        integrate(pos, vel, dt)
+
+        t = self.table
+        resolve_wall_collisions(pos, vel, self.radius, present, t.top, t.left, t.bottom, t.right, dt)
+
+        colliding = get_colliding_mask(pos, vel, self.radius, present, self.pair_i, self.pair_j, dt)
+        if colliding.any():
+            resolve_ball_collisions(pos, vel, self.mass, self.pair_i, self.pair_j, colliding)
+
+    def time_step(self):
+        """
+        Advance every table by one time step.
+        """
+
+        substeps = self.get_substeps()
+        counts = np.unique(substeps).tolist()
+
+        if len(counts) == 1:
+            n, = counts
+            for _ in range(n):
+                self.advance(self.pos, self.vel, self.present, 1.0 / n)
+        else:
+            # Tables split into the same number of substeps advance together, while the rest sit out
+            for n in counts:
+                index = np.flatnonzero(substeps == n)
+                pos, vel, present = self.pos[index], self.vel[index], self.present[index]
+                for _ in range(n):
+                    self.advance(pos, vel, present, 1.0 / n)
+                self.pos[index], self.vel[index] = pos, vel
+
+        self.pocket_balls()
+        self.steps += 1
+
+    def pocket_balls(self):
+        """
+        Take pocketed balls out of play; a pocketed cue ball is put back on its starting spot, as in
+        PoolTable.pocket_ball().
+        """
+
+        d = self.pos[:, :, np.newaxis, :] - self.pockets
+        dist_sq = np.einsum('...i,...i->...', d, d)
+        pocketed = self.present & (dist_sq < self.table.hole_radius ** 2).any(axis=-1)
+        if not pocketed.any():
+            return
+
+        step = self.table.steps + self.steps + 1
+        pocket = dist_sq.argmin(axis=-1)
+        for t, k in zip(*np.nonzero(pocketed)):
+            self.pocket_events[t].append(PocketEvent(self.names[k], int(pocket[t, k]), step))
+
+        self.vel[pocketed] = 0.0
+
+        cue_pocketed = pocketed[:, self.cue_index]
+        self.pos[cue_pocketed, self.cue_index] = self.cue_spot
+
+        pocketed[:, self.cue_index] = False
+        self.present[pocketed] = False
+
+    def is_at_rest(self) -> np.ndarray:
+        """
+        :return: (tables,) whether every ball on each table has stopped
+        """
+
+        return ~self.vel.any(axis=(1, 2))
+
+    def get_table(self, index: int) -> PoolTable:
+        """
+        Build an ordinary PoolTable holding the current state of one table, with the template table's balls,
+        settings, step count and pocketings.
+
+        :param index: which table
+        :return: new PoolTable
+        """
+
+        template = self.table
+        table = PoolTable.build(template.get_settings(), template.get_ball_set(self.names))
+
+        present = self.present[index]
+        state = np.concatenate([self.pos[index], self.vel[index]], axis=1)
+        state[~present] = np.nan
+        table.restore(TableSnapshot(tuple(self.names), tuple(table.balls.values()), state, present.copy(),
+                                    cue_angle=template.cue_angle, steps=template.steps + self.steps))
+        table.pocket_events = template.pocket_events + self.pocket_events[index]
+
+        return table
@@ -0,0 +1,158 @@
+"""
+Monte Carlo break analysis: play many breaks from randomized legal racks across all cores and aggregate the
+outcomes in a BreakStats.
+
+Break i is racked and played with a generator seeded from (seed, i) alone, and BreakStats only holds integer
+counts, so the result depends on the seed and the number of breaks, never on the number of workers or how the
+breaks are split between them.
+"""
+import multiprocessing
+from typing import Callable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from pool.break_stats import BreakStats
+from pool.engine_type import EngineType
+from pool.game_type import GameType
+from pool.pool_table import PoolTable
+from pool.shot import Shot, BREAK_FORCE, simulate_shot
+
+# Breaks handed to a worker at a time
+CHUNK_SIZE = 64
+
+
+def get_break_rng(seed: int, index: int) -> np.random.Generator:
+    """
+    :return: the generator for break number index of a run seeded with seed
+    """
+
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+
+class BreakSettings:
+    """
+    What every break of a run shares.
+    """
+
+    def __init__(self, nw, se, game: GameType = GameType.NINE_BALL, seed: int = 0, jitter: float = 0.0,
+                 angle: float = 0.0, force: float = BREAK_FORCE, angle_spread: float = 0.0,
+                 engine: EngineType = EngineType.SCALAR, max_steps: int = 10000):
+        """
+        :param nw: north-west corner of the table
+        :param se: south-east corner of the table
+        :param game: NINE_BALL or EIGHT_BALL
+        :param seed: seed of the whole run
+        :param jitter: largest random gap opened between neighbouring racked balls
+        :param angle: cue angle, degrees
+        :param force: strike force
+        :param angle_spread: standard deviation of random cue angle error, degrees
+        :param engine: physics engine
+        :param max_steps: step budget per break
+        """
+        self.nw = nw
+        self.se = se
+        self.game = game
+        self.seed = seed
+        self.jitter = jitter
+        self.angle = angle
+        self.force = force
+        self.angle_spread = angle_spread
+        self.engine = engine
+        self.max_steps = max_steps
+
+
+class BreakRunner:
+    """
+    Plays breaks on one warm table, restored to the full rack before each break.
+    """
+
+    def __init__(self, settings: BreakSettings):
+        self.settings = settings
+        self.table = PoolTable(settings.nw, settings.se, engine=settings.engine, game=settings.game)
+        self.base = self.table.snapshot()
+
+    def run(self, chunk: Tuple[int, int]) -> BreakStats:
+        """
+        :param chunk: (first, last + 1) break numbers to play
+        :return: counts over these breaks
+        """
+
+        settings = self.settings
+        table = self.table
+        table.restore(self.base)
+        stats = BreakStats.for_table(table)
+
+        for index in range(*chunk):
+            rng = get_break_rng(settings.seed, index)
+
+            table.restore(self.base)
+            table.rack_balls(settings.game, rng=rng, jitter=settings.jitter)
+
+            angle = settings.angle
+            if settings.angle_spread > 0:
+                angle += rng.normal(0.0, settings.angle_spread)
+
+            steps = simulate_shot(table, Shot(angle, settings.force), settings.max_steps)
+            stats.add(table, steps)
+
+        return stats
+
+
+_runner = None
+
+
+def _init_worker(settings: BreakSettings):
+    global _runner
+    _runner = BreakRunner(settings)
+
+
+def _run_chunk(chunk: Tuple[int, int]) -> BreakStats:
+    return _runner.run(chunk)
+
+
+def get_chunks(breaks: int, chunk_size: int) -> Iterable[Tuple[int, int]]:
+    return ((start, min(start + chunk_size, breaks)) for start in range(0, breaks, chunk_size))
+
+
+def analyze_breaks(settings: BreakSettings, breaks: int, processes: Optional[int] = None,
+                   chunk_size: Optional[int] = None,
+                   progress: Optional[Callable[[BreakStats], None]] = None) -> BreakStats:
+    """
+    Play breaks from randomized racks and aggregate their outcomes as they finish.
+
+    :param settings: rack, shot and engine of every break
+    :param breaks: number of breaks
+    :param processes: worker processes (default: number of cores); 1 plays every break in this process
+    :param chunk_size: breaks handed to a worker at a time (default: up to CHUNK_SIZE, small enough to give every
+                       worker several chunks)
+    :param progress: called with the running totals after each chunk
+    :return: totals over all breaks
+    """
+
+    if chunk_size is None:
+        workers = processes or multiprocessing.cpu_count()
+        chunk_size = max(1, min(CHUNK_SIZE, breaks // (4 * workers)))
+
+    if processes == 1:
+        runner = BreakRunner(settings)
+        stats = BreakStats.for_table(runner.table)
+        for chunk in get_chunks(breaks, chunk_size):
+            stats.merge(runner.run(chunk))
+            if progress is not None:
+                progress(stats)
+        return stats
+
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(settings,)) as pool:
+        stats = None
+        for chunk_stats in pool.imap_unordered(_run_chunk, get_chunks(breaks, chunk_size)):
+            if stats is None:
+                stats = chunk_stats
+            else:
+                stats.merge(chunk_stats)
+            if progress is not None:
+                progress(stats)
+
+    if stats is None:
+        stats = BreakStats.for_table(PoolTable(settings.nw, settings.se, game=settings.game))
+
+    return stats
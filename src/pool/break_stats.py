@@ -0,0 +1,120 @@
+from typing import Tuple
+
+import numpy as np
+
+from pool.ball_type import BallType
+
+
+class BreakStats:
+    """
+    Running totals over many breaks from one rack: balls made per break, pockets, scratches and where the cue
+    ball lands.
+
+    Everything is kept as integer counts, so totals merged from any split of the breaks into chunks, in any
+    order, are identical.
+    """
+
+    def __init__(self, names: list, left: float, bottom: float, length: float, width: float,
+                 n_pockets: int = 6, bins: Tuple[int, int] = (16, 8)):
+        """
+        :param names: keys of the balls racked, cue ball included
+        :param left: x-coordinate of the left cushion
+        :param bottom: y-coordinate of the bottom cushion
+        :param length: table length (x)
+        :param width: table width (y)
+        :param n_pockets: number of pockets
+        :param bins: cue ball landing heatmap cells along the length and width (default: half diamonds)
+        """
+        self.names = list(names)
+        self.object_names = [name for name in self.names if name is not BallType.CUE]
+        self.left, self.bottom, self.length, self.width = left, bottom, length, width
+
+        self.breaks = 0
+        self.scratches = 0
+        self.steps = 0
+
+        # made[k]: breaks that made k object balls
+        self.made = np.zeros(len(self.object_names) + 1, dtype=np.int64)
+        # Times each object ball was made, and balls (cue ball included) dropped in each pocket
+        self.ball_made = np.zeros(len(self.object_names), dtype=np.int64)
+        self.pockets = np.zeros(n_pockets, dtype=np.int64)
+        # Cue ball resting place after breaks without a scratch, [width bin, length bin] from the bottom-left
+        self.heatmap = np.zeros((bins[1], bins[0]), dtype=np.int64)
+
+    @staticmethod
+    def for_table(table, bins: Tuple[int, int] = (16, 8)) -> 'BreakStats':
+        return BreakStats(list(table.balls), table.left, table.bottom, table.length, table.width,
+                          n_pockets=len(table.hole_centers), bins=bins)
+
+    def add(self, table, steps: int):
+        """
+        Count one break, played on table from a full rack until it came to rest.
+
+        :param table: PoolTable after the break
+        :param steps: time steps the break took
+        """
+
+        self.breaks += 1
+        self.steps += steps
+
+        made = 0
+        scratched = False
+        for event in table.pocket_events:
+            if event.pocket is not None:
+                self.pockets[event.pocket] += 1
+            if event.ball is BallType.CUE:
+                scratched = True
+            else:
+                made += 1
+                self.ball_made[self.object_names.index(event.ball)] += 1
+
+        self.made[made] += 1
+        if scratched:
+            self.scratches += 1
+        else:
+            cue = table.cue_ball.pos
+            rows, columns = self.heatmap.shape
+            column = min(max(int((cue.x - self.left) / self.length * columns), 0), columns - 1)
+            row = min(max(int((cue.y - self.bottom) / self.width * rows), 0), rows - 1)
+            self.heatmap[row, column] += 1
+
+    def merge(self, other: 'BreakStats'):
+        """
+        Add another BreakStats' counts (over the same rack and table) to this one.
+        """
+
+        self.breaks += other.breaks
+        self.scratches += other.scratches
+        self.steps += other.steps
+        self.made += other.made
+        self.ball_made += other.ball_made
+        self.pockets += other.pockets
+        self.heatmap += other.heatmap
+
+    def get_summary(self) -> dict:
+        """
+        :return: JSON-serializable rates and distributions
+        """
+
+        breaks = max(self.breaks, 1)
+        made = np.arange(len(self.made))
+
+        return {
+            'breaks': self.breaks,
+            'mean_made': float((made * self.made).sum() / breaks),
+            'made_distribution': (self.made / breaks).tolist(),
+            'scratch_rate': self.scratches / breaks,
+            'ball_made_rate': {str(name): count / breaks for name, count in zip(self.object_names,
+                                                                                 self.ball_made.tolist())},
+            'pocket_distribution': (self.pockets / max(self.pockets.sum(), 1)).tolist(),
+            'mean_steps': self.steps / breaks,
+            'cue_heatmap': self.heatmap.tolist(),
+        }
+
+    def __eq__(self, other):
+        return (self.breaks, self.scratches, self.steps) == (other.breaks, other.scratches, other.steps) and \
+            all(np.array_equal(getattr(self, field), getattr(other, field))
+                for field in ('made', 'ball_made', 'pockets', 'heatmap'))
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class BroadPhaseType(Enum):
+    BRUTE_FORCE = 0  # Check every pair of balls
+    GRID = 1  # Only check balls in neighbouring cells of a uniform grid (physics.broad_phase)
@@ -0,0 +1,23 @@
+class CollisionEvent:
+    """
+    A ball hitting another ball or a rail.
+    """
+
+    def __init__(self, ball, other, step: int):
+        """
+        :param ball: key of the ball in PoolTable.balls
+        :param other: key of the other ball, or the Direction of the rail
+        :param step: time step during which the collision was resolved (1 for the first step)
+        """
+        self.ball = ball
+        self.other = other
+        self.step = step
+
+    def __str__(self):
+        return "Ball {} hit {} at step {}".format(self.ball, self.other, self.step)
+
+    def __eq__(self, other):
+        return self.ball == other.ball and self.other == other.other and self.step == other.step
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
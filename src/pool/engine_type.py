@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class EngineType(Enum):
+    SCALAR = 0  # Step each PoolBall in Python
+    ARRAY = 1  # Step all balls at once with NumPy (physics.array_engine)
+    EVENT = 2  # Jump from collision to collision (pool.event_simulator)
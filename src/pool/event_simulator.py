@@ -0,0 +1,342 @@
+"""
+Event-driven (continuous collision) simulation of a PoolTable.
+
+Every ball's velocity decays geometrically by FRICTION per time step, so after tau steps a ball has travelled
+vel * (1 - FRICTION ** tau) / (1 - FRICTION). All balls decay at the same rate, which makes every trajectory a
+straight line in that travelled-distance parameter, and the time of the next ball-ball, ball-rail and ball-pocket
+contact can be solved for exactly. Events are kept in a priority queue and the simulation jumps straight from
+one event to the next, so the cost depends on the number of events rather than the number of time steps.
+"""
+import heapq
+import math
+
+import numpy as np
+
+from physics.direction import Direction
+from pool.collision_event import CollisionEvent
+from pool.pool_ball import DEAD_STOP_SPEED, FRICTION
+
+# Event kinds
+BALL = 0
+RAIL = 1
+POCKET = 2
+STOP = 3  # One velocity component drops below DEAD_STOP_SPEED and is zeroed
+
+# Rail hit by a ball moving along (axis, positive direction), named as check_ball_wall_collision() does
+RAILS = {(0, False): Direction.EAST, (0, True): Direction.WEST, (1, False): Direction.SOUTH, (1, True): Direction.NORTH}
+
+
+def get_travel(tau):
+    """
+    Distance travelled per unit of initial velocity after tau time steps.
+    """
+
+    return (1 - FRICTION ** tau) / (1 - FRICTION)
+
+
+def get_time_for_travel(s):
+    """
+    Inverse of get_travel(): time steps needed to travel s per unit of initial velocity (inf if never reached).
+    """
+
+    remaining = 1 - s * (1 - FRICTION)
+    if remaining <= 0:
+        return math.inf
+
+    return math.log(remaining) / math.log(FRICTION)
+
+
+def get_contact_travel(dp: np.ndarray, dv: np.ndarray, reach) -> np.ndarray:
+    """
+    Smallest travel s >= 0 at which |dp + dv * s| shrinks to reach, for points approaching each other.
+    Points already within reach and approaching make contact immediately (s = 0).
+
+    :param dp: (n, 2) relative positions
+    :param dv: (n, 2) relative velocities
+    :param reach: contact distance, scalar or (n,)
+    :return: (n,) travel until contact, inf where there is none
+    """
+
+    a = np.einsum('ij,ij->i', dv, dv)
+    b = np.einsum('ij,ij->i', dp, dv)
+    c = np.einsum('ij,ij->i', dp, dp) - reach * reach
+
+    disc = b * b - a * c
+    hit = (b < 0) & (disc >= 0)
+
+    s = np.full(len(dp), np.inf)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s[hit] = (-b[hit] - np.sqrt(disc[hit])) / a[hit]
+    s[hit & (c <= 0)] = 0.0
+
+    return np.maximum(s, 0.0)
+
+
+class EventSimulator:
+    """
+    Advances the balls of a PoolTable from event to event.
+
+    The simulator reads the table's balls when it starts and whenever they were changed from outside (e.g. a
+    cue strike), and writes positions and velocities back to the PoolBall objects after every advance. Every
+    ball-ball and ball-rail contact is reported to table.collision_events, if set.
+    """
+
+    def __init__(self, table):
+        """
+        :param table: PoolTable to simulate; balls are pocketed through table.pocket_ball()
+        """
+
+        self.table = table
+        self.time = 0.0
+        self.event_count = 0
+
+        self.pockets = np.array([(pocket.x, pocket.y) for pocket in table.hole_centers])
+
+        self.load()
+
+    def load(self):
+        """
+        (Re)read every ball from the table and predict all events from scratch.
+        """
+
+        self.names = list(self.table.balls)
+        self.balls = list(self.table.balls.values())
+        n = len(self.balls)
+
+        # Each ball's state is stored at its own reference time
+        self.pos = np.array([(ball.pos.x, ball.pos.y) for ball in self.balls], dtype=float).reshape(n, 2)
+        self.vel = np.array([(ball.vel.x, ball.vel.y) for ball in self.balls], dtype=float).reshape(n, 2)
+        self.t_ref = np.full(n, self.time)
+
+        self.radius = np.array([ball.radius for ball in self.balls], dtype=float)
+        self.mass = np.array([ball.mass for ball in self.balls], dtype=float)
+        self.present = np.ones(n, dtype=bool)
+
+        # Bumped whenever a ball's trajectory changes; queued events remember the versions they were predicted with
+        self.version = np.zeros(n, dtype=np.int64)
+
+        self.queue = []
+        self.sequence = 0
+        for i in range(n):
+            self.predict(i, pairs_from=i + 1)
+
+        self.written = None
+
+    def sync(self):
+        """
+        Reload from the table if its balls changed since they were last written.
+        """
+
+        if self.written is None or list(self.table.balls) != self.written[0]:
+            self.load()
+            return
+
+        present = [self.balls[i] for i in np.flatnonzero(self.present)]
+        pos = np.array([(ball.pos.x, ball.pos.y) for ball in present]).reshape(-1, 2)
+        vel = np.array([(ball.vel.x, ball.vel.y) for ball in present]).reshape(-1, 2)
+        if not (np.array_equal(pos, self.written[1]) and np.array_equal(vel, self.written[2])):
+            self.load()
+
+    def write_back(self):
+        """
+        Copy the state at the current time into the table's PoolBall objects.
+        """
+
+        present = np.flatnonzero(self.present)
+        pos, vel = self.get_state(present, self.time)
+
+        for k, i in enumerate(present):
+            ball = self.balls[i]
+            ball.pos.x, ball.pos.y = pos[k]
+            ball.vel.x, ball.vel.y = vel[k]
+
+        self.written = (list(self.table.balls), pos.copy(), vel.copy())
+
+        # Balls moved without PoolTable.time_step(), so cached aim lines and pocketability must be recomputed
+        self.table.mark_moved()
+
+    def get_state(self, idx, t: float) -> (np.ndarray, np.ndarray):
+        """
+        Positions and velocities of the given balls at time t.
+        """
+
+        tau = t - self.t_ref[idx]
+        pos = self.pos[idx] + self.vel[idx] * np.asarray(get_travel(tau))[..., np.newaxis]
+        vel = self.vel[idx] * np.asarray(FRICTION ** tau)[..., np.newaxis]
+
+        return pos, vel
+
+    def set_state(self, i: int, pos, vel):
+        """
+        Give ball i a new trajectory starting now, invalidating its queued events.
+        """
+
+        self.pos[i], self.vel[i], self.t_ref[i] = pos, vel, self.time
+        self.version[i] += 1
+
+    def push(self, t: float, kind: int, i: int, j: int = -1, detail: int = -1):
+        """
+        Queue an event for ball i (and ball j for ball-ball events). Events that never happen are dropped.
+        """
+
+        if t == math.inf:
+            return
+
+        version_j = self.version[j] if j >= 0 else -1
+        heapq.heappush(self.queue, (t, self.sequence, kind, i, j, detail, self.version[i], version_j))
+        self.sequence += 1
+
+    def predict(self, i: int, pairs_from: int = 0):
+        """
+        Queue the next events of ball i.
+
+        :param i: ball index
+        :param pairs_from: only predict ball-ball events against balls with index >= pairs_from
+        """
+
+        if not self.present[i]:
+            return
+
+        t = self.time
+        p, v = self.get_state(i, t)
+        r = self.radius[i]
+
+        # Ball-ball contacts
+        others = np.flatnonzero(self.present)
+        others = others[(others >= pairs_from) & (others != i)]
+        if len(others):
+            other_p, other_v = self.get_state(others, t)
+            s = get_contact_travel(p - other_p, v - other_v, r + self.radius[others])
+            for k in np.flatnonzero(np.isfinite(s)):
+                self.push(t + get_time_for_travel(s[k]), BALL, i, others[k])
+
+        if not v.any():
+            return
+
+        table = self.table
+        for axis, low, high in ((0, table.left, table.right), (1, table.bottom, table.top)):
+            if v[axis] == 0:
+                continue
+
+            # Rail contact
+            edge = high - r if v[axis] > 0 else low + r
+            s = max((edge - p[axis]) / v[axis], 0.0)
+            self.push(t + get_time_for_travel(s), RAIL, i, detail=axis)
+
+            # Dead stop, checked at the start of every whole time step
+            speed = abs(v[axis])
+            slow_after = math.log(DEAD_STOP_SPEED / speed) / math.log(FRICTION)
+            self.push(max(math.ceil(t), math.floor(t + slow_after) + 1), STOP, i, detail=axis)
+
+        # Pocket entry
+        s = get_contact_travel(p - self.pockets, np.broadcast_to(v, self.pockets.shape), table.hole_radius)
+        k = int(np.argmin(s))
+        if np.isfinite(s[k]):
+            self.push(t + get_time_for_travel(s[k]), POCKET, i, detail=k)
+
+    def is_valid(self, event) -> bool:
+        _, _, _, i, j, _, version_i, version_j = event
+
+        return self.version[i] == version_i and (j < 0 or self.version[j] == version_j)
+
+    def process(self, event):
+        """
+        Jump to the time of an event and resolve it.
+        """
+
+        t, _, kind, i, j, detail, _, _ = event
+        self.time = max(self.time, t)
+        self.event_count += 1
+
+        p, v = self.get_state(i, self.time)
+
+        if kind == BALL:
+            q, w = self.get_state(j, self.time)
+
+            # Elastic collision, as in resolve_ball_ball_collision()
+            dx = p - q
+            dist_sq = dx.dot(dx)
+            if dist_sq > 0:
+                m_i, m_j = self.mass[i], self.mass[j]
+                impulse = (v - w).dot(dx) / dist_sq * dx
+                v = v - 2 * m_j / (m_i + m_j) * impulse
+                w = w + 2 * m_i / (m_i + m_j) * impulse
+
+            self.set_state(i, p, v)
+            self.set_state(j, q, w)
+            self.predict(i)
+            self.predict(j)
+
+            if self.table.collision_events is not None:
+                self.table.collision_events.append(CollisionEvent(self.names[i], self.names[j], math.ceil(t)))
+
+        elif kind == RAIL:
+            if self.table.collision_events is not None:
+                rail = RAILS[detail, bool(v[detail] > 0)]
+                self.table.collision_events.append(CollisionEvent(self.names[i], rail, math.ceil(t)))
+
+            v[detail] = -v[detail]
+            self.set_state(i, p, v)
+            self.predict(i)
+
+        elif kind == STOP:
+            v[detail] = 0.0
+            self.set_state(i, p, v)
+            self.predict(i)
+
+        else:  # POCKET
+            ball = self.balls[i]
+            ball.pos.x, ball.pos.y = p
+            ball.vel.x, ball.vel.y = v
+
+            self.table.pocket_ball(self.names[i], pocket=detail, step=math.ceil(t))
+
+            if self.names[i] in self.table.balls:
+                # Re-spotted cue ball
+                self.set_state(i, (ball.pos.x, ball.pos.y), (ball.vel.x, ball.vel.y))
+                self.predict(i)
+            else:
+                self.present[i] = False
+                self.version[i] += 1
+
+    def advance(self, dt: float = 1.0):
+        """
+        Simulate dt time steps, processing every event on the way.
+        """
+
+        self.sync()
+
+        end = self.time + dt
+        while self.queue and self.queue[0][0] <= end:
+            event = heapq.heappop(self.queue)
+            if self.is_valid(event):
+                self.process(event)
+
+        self.time = end
+        self.write_back()
+
+    def run_to_rest(self, max_time: float = math.inf, max_events: int = 1000000) -> int:
+        """
+        Simulate until every ball has stopped, jumping straight from event to event.
+
+        :param max_time: stop once this much simulated time has passed
+        :param max_events: stop after processing this many events
+        :return: number of events processed
+        """
+
+        self.sync()
+
+        start_count = self.event_count
+        end = self.time + max_time
+        while self.queue and self.event_count - start_count < max_events:
+            event = heapq.heappop(self.queue)
+            if event[0] > end:
+                heapq.heappush(self.queue, event)
+                self.time = end
+                break
+            if self.is_valid(event):
+                self.process(event)
+
+        self.write_back()
+
+        return self.event_count - start_count
@@ -0,0 +1,82 @@
+from typing import List
+
+import numpy as np
+
+
+class Frame:
+    """
+    The outcome of one time step, yielded by pool.stream.simulate().
+
+    Ball state is read from the live table when first asked for. The frame is released as the next frame is
+    produced or the stream is closed; only if simulate() was asked to keep state is it copied out then, so that
+    frames can be kept and read later. Otherwise a frame must be read before the next one is pulled.
+    """
+
+    __slots__ = ('step', 'pocket_events', 'collision_events', 'table', '_names', '_state')
+
+    def __init__(self, table, step: int, pocket_events: list, collision_events: list):
+        """
+        :param table: PoolTable, just stepped
+        :param step: time steps taken by the table (1 for the first step)
+        :param pocket_events: PocketEvents of this step
+        :param collision_events: CollisionEvents of this step (always empty with the array engine)
+        """
+        self.step = step
+        self.pocket_events = pocket_events
+        self.collision_events = collision_events
+        self.table = table
+
+        self._names = None
+        self._state = None
+
+    def release(self, keep_state: bool = False):
+        """
+        Detach the frame from its table.
+
+        :param keep_state: first copy the ball state out of the table (one small array per frame), so it can still
+                           be read
+        """
+
+        if keep_state:
+            self.read()
+        self.table = None
+
+    def read(self):
+        if self._state is None:
+            if self.table is None:
+                raise ValueError('frame of step {} was released unread; simulate() with keep_state=True to keep '
+                                 'frames'.format(self.step))
+            balls = self.table.balls
+            self._names = list(balls)
+            self._state = np.array([(ball.pos.x, ball.pos.y, ball.vel.x, ball.vel.y) for ball in balls.values()])
+
+    @property
+    def names(self) -> List:
+        """
+        Keys of the balls on the table, in the order of positions and velocities.
+        """
+
+        self.read()
+        return self._names
+
+    @property
+    def positions(self) -> np.ndarray:
+        """
+        (balls, 2) positions.
+        """
+
+        self.read()
+        return self._state[:, :2]
+
+    @property
+    def velocities(self) -> np.ndarray:
+        """
+        (balls, 2) velocities.
+        """
+
+        self.read()
+        return self._state[:, 2:]
+
+    def __str__(self):
+        return "Frame of step {} with {} pocketings and {} collisions".format(self.step, len(self.pocket_events),
+                                                                             len(self.collision_events))
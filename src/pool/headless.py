@@ -0,0 +1,105 @@
+"""
+Headless simulation: build a table, play one shot and report the outcome, without any rendering.
+Nothing here (or in anything it imports) may import pygame.
+"""
+import time
+from typing import Optional
+
+from physics.coordinates import Coordinates
+from pool.broad_phase_type import BroadPhaseType
+from pool.engine_type import EngineType
+from pool.game_type import GameType
+from pool.pool_table import PoolTable, MAX_SUBSTEPS
+from pool.profiler import Profiler
+from pool.shot import Shot, simulate_shot
+from pool.trajectory_recorder import TrajectoryRecorder
+
+# Same table as the PyGame window in main.py (lower-left origin)
+DEFAULT_NW = Coordinates(100, 900)
+DEFAULT_SE = Coordinates(900, 500)
+
+
+def simulate(game: GameType = GameType.NINE_BALL,
+             angle: float = 0.0,
+             force: float = 500.0,
+             max_steps: int = 10000,
+             engine: EngineType = EngineType.SCALAR,
+             broad_phase: BroadPhaseType = BroadPhaseType.BRUTE_FORCE,
+             nw: Coordinates = DEFAULT_NW,
+             se: Coordinates = DEFAULT_SE,
+             max_substeps: int = MAX_SUBSTEPS,
+             profiler: Optional[Profiler] = None,
+             record: Optional[str] = None) -> dict:
+    """
+    Rack a table, play one shot until the balls come to rest or the step budget runs out.
+
+    :param game: game to rack for
+    :param angle: cue angle, degrees
+    :param force: strike force
+    :param max_steps: step budget
+    :param engine: physics engine
+    :param broad_phase: ball-ball broad phase
+    :param nw: north-west corner of the table
+    :param se: south-east corner of the table
+    :param max_substeps: most substeps a fast time step is split into
+    :param profiler: times each phase of every time step, one frame per step; its summary is added to the result
+    :param record: write every time step to this TrajectoryRecorder file (not with the event-driven engine)
+    :return: JSON-serializable summary of the final state and timings
+    """
+
+    start = time.perf_counter()
+    table = PoolTable(nw, se, engine=engine, broad_phase=broad_phase, game=game, max_substeps=max_substeps)
+    table.profiler = profiler
+    names = list(table.balls)
+
+    if record is not None:
+        table.recorder = TrajectoryRecorder(record, names)
+        table.recorder.record(table)
+
+    setup_done = time.perf_counter()
+    steps = simulate_shot(table, Shot(angle, force), max_steps)
+    end = time.perf_counter()
+
+    if table.recorder is not None:
+        table.recorder.close()
+
+    simulate_seconds = end - setup_done
+
+    result = {
+        'game': game.name,
+        'engine': engine.name,
+        'broad_phase': broad_phase.name,
+        'shot': {'angle': angle, 'force': force},
+        'steps': steps,
+        'substeps': {
+            'total': table.substeps,
+            'substepped_steps': table.substepped_steps,
+            'capped_steps': table.capped_steps,
+        },
+        'at_rest': table.is_at_rest(),
+        'balls': [
+            {
+                'name': str(name),
+                'x': float(ball.pos.x),
+                'y': float(ball.pos.y),
+                'vx': float(ball.vel.x),
+                'vy': float(ball.vel.y),
+            }
+            for name, ball in table.balls.items()
+        ],
+        'pocketed': [str(name) for name in names if name not in table.balls],
+        'pocket_events': [
+            {'ball': str(event.ball), 'pocket': event.pocket, 'step': event.step}
+            for event in table.pocket_events
+        ],
+        'timings': {
+            'setup_seconds': setup_done - start,
+            'simulate_seconds': simulate_seconds,
+            'steps_per_second': steps / simulate_seconds if simulate_seconds > 0 else None,
+        },
+    }
+
+    if profiler is not None:
+        result['profile'] = profiler.get_summary()
+
+    return result
@@ -0,0 +1,112 @@
+"""
+Structured logging, one logger per subsystem:
+
+    pool.physics   table setup, racking, integration
+    pool.aim       cue ball path and ghost ball
+    pool.pocket    pocketed balls
+    pool.render    PyGame front end
+
+Records are only built when their level is enabled for the subsystem, so disabled logging costs one level check.
+Each record carries an event name and a dict of fields, written out as key=value text or as JSON lines.
+"""
+import json
+import logging
+import sys
+from typing import Dict, Iterable, Optional
+
+PHYSICS = 'pool.physics'
+AIM = 'pool.aim'
+POCKET = 'pool.pocket'
+RENDER = 'pool.render'
+
+SUBSYSTEMS = (PHYSICS, AIM, POCKET, RENDER)
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """
+    :param subsystem: one of SUBSYSTEMS
+    """
+
+    return logging.getLogger(subsystem)
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields):
+    """
+    Log a structured event. Nothing is formatted unless the logger is enabled for the level; in hot paths, guard
+    the call with logger.isEnabledFor(level) so the fields are not even gathered.
+
+    :param logger: subsystem logger
+    :param level: logging level, e.g. logging.DEBUG
+    :param event: short event name
+    :param fields: event data
+    """
+
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'event': event, 'fields': fields})
+
+
+class KeyValueFormatter(logging.Formatter):
+    """
+    One line per record: subsystem, level, event, then key=value fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = '{} {} {}'.format(record.name, record.levelname, record.getMessage())
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join('{}={}'.format(key, value) for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per record, for loading into analysis tools.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': record.created,
+            'subsystem': record.name,
+            'level': record.levelname,
+            'event': getattr(record, 'event', record.getMessage()),
+        }
+        data.update(getattr(record, 'fields', {}))
+        return json.dumps(data, default=str)
+
+
+def configure(level: int = logging.WARNING,
+              subsystems: Optional[Iterable[str]] = None,
+              path: Optional[str] = None,
+              json_lines: bool = False,
+              levels: Optional[Dict[str, int]] = None) -> logging.Handler:
+    """
+    Send subsystem logs to stderr or a file. Calling it again replaces the previous configuration.
+
+    :param level: level for the chosen subsystems
+    :param subsystems: subsystems to enable at that level (default: all); the others only log warnings and errors
+    :param path: file to write to instead of stderr
+    :param json_lines: write JSON lines instead of key=value text
+    :param levels: per-subsystem level overrides
+    :return: the handler installed on the 'pool' logger
+    """
+
+    subsystems = SUBSYSTEMS if subsystems is None else tuple(subsystems)
+    for subsystem in SUBSYSTEMS:
+        get_logger(subsystem).setLevel(level if subsystem in subsystems else max(level, logging.WARNING))
+    for subsystem, subsystem_level in (levels or {}).items():
+        get_logger(subsystem).setLevel(subsystem_level)
+
+    handler = logging.FileHandler(path) if path is not None else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonLinesFormatter() if json_lines else KeyValueFormatter())
+
+    root = logging.getLogger('pool')
+    for old in [h for h in root.handlers if getattr(h, 'pool_log_handler', False)]:
+        root.removeHandler(old)
+        old.close()
+    handler.pool_log_handler = True
+    root.addHandler(handler)
+    root.propagate = False
+
+    return handler
@@ -0,0 +1,26 @@
+from pool.ball_type import BallType
+
+
+class PocketEvent:
+    """
+    A ball dropping into a pocket.
+    """
+
+    def __init__(self, ball: BallType, pocket: int, step: int):
+        """
+        :param ball: key of the ball in PoolTable.balls
+        :param pocket: index of the pocket in PoolTable.hole_centers
+        :param step: time step during which the ball was pocketed (1 for the first step)
+        """
+        self.ball = ball
+        self.pocket = pocket
+        self.step = step
+
+    def __str__(self):
+        return "Ball {} pocketed into pocket {} at step {}".format(self.ball, self.pocket, self.step)
+
+    def __eq__(self, other):
+        return self.ball == other.ball and self.pocket == other.pocket and self.step == other.step
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
@@ -0,0 +1,60 @@
+from typing import List
+
+import numpy as np
+
+from physics.coordinates import Coordinates
+from pool.pool_ball import PoolBall
+
+
+class Pocketability:
+    """
+    How every object ball could be played into every pocket from the current layout, as [balls x pockets] arrays.
+
+    Geometry only: the object ball is assumed to travel straight from its center to the pocket center, and the
+    cue ball straight from its center to the ghost ball position.
+    """
+
+    def __init__(self,
+                 balls: List[PoolBall],
+                 pockets: List[Coordinates],
+                 ghost: np.ndarray,
+                 cue_angle: np.ndarray,
+                 cut_angle: np.ndarray,
+                 object_clear: np.ndarray,
+                 cue_clear: np.ndarray):
+        """
+        :param balls: object balls, in row order
+        :param pockets: pocket centers, in column order
+        :param ghost: (balls, pockets, 2) where the cue ball must be when it strikes the object ball
+        :param cue_angle: (balls, pockets) cue angle to the ghost ball, degrees
+        :param cut_angle: (balls, pockets) angle between the cue ball's path and the object ball's path, degrees
+        :param object_clear: (balls, pockets) whether the object ball's path to the pocket misses every other ball
+        :param cue_clear: (balls, pockets) whether the cue ball reaches the ghost ball without hitting anything
+        """
+        self.balls = balls
+        self.pockets = pockets
+        self.ghost = ghost
+        self.cue_angle = cue_angle
+        self.cut_angle = cut_angle
+        self.object_clear = object_clear
+        self.cue_clear = cue_clear
+
+    def is_makeable(self) -> np.ndarray:
+        """
+        (balls, pockets) whether each ball-pocket pair has clear paths and a cut of less than 90 degrees.
+        """
+
+        return self.object_clear & self.cue_clear & (self.cut_angle < 90)
+
+    def get_shots(self) -> list:
+        """
+        Makeable pairs, thinnest cut last.
+
+        :return: (ball, pocket index, cue angle, cut angle) tuples
+        """
+
+        balls, pockets = np.nonzero(self.is_makeable())
+        shots = [(self.balls[b], p, float(self.cue_angle[b, p]), float(self.cut_angle[b, p]))
+                 for b, p in zip(balls.tolist(), pockets.tolist())]
+
+        return sorted(shots, key=lambda shot: shot[3])
@@ -2,6 +2,12 @@ from physics.coordinates import Coordinates
 from physics.vector import Vector
 from pool.ball_type import BallType
 
+# Speed (per component) below which a ball is brought to a dead stop
+DEAD_STOP_SPEED = 0.1
+
+# Fraction of velocity kept after each time step
+FRICTION = 0.99
+
 
 class PoolBall:
     """
@@ -18,11 +24,48 @@ class PoolBall:
                  radius: float,
                  vel=None):
         self.ball_type = ball_type
-        self.pos = pos
         self.mass = mass
         self.radius = radius
-        if vel is None:
-            self.vel = Vector(0, 0)
+
+        # Whether pos/vel are views into external storage (see bind())
+        self._bound = False
+        self._pos = pos
+        self._vel = vel if vel is not None else Vector(0, 0)
+
+    @property
+    def pos(self) -> Coordinates:
+        return self._pos
+
+    @pos.setter
+    def pos(self, pos: Coordinates):
+        if self._bound:
+            # Write through to the backing storage instead of detaching from it
+            self._pos.x, self._pos.y = pos.x, pos.y
+        else:
+            self._pos = pos
+
+    @property
+    def vel(self) -> Vector:
+        return self._vel
+
+    @vel.setter
+    def vel(self, vel: Vector):
+        if self._bound:
+            self._vel.x, self._vel.y = vel.x, vel.y
+        else:
+            self._vel = vel
+
+    def bind(self, pos: Coordinates, vel: Vector):
+        """
+        Back this ball's position and velocity with external storage, e.g. views into the arrays of an ArrayEngine.
+        Later assignments to pos/vel write through to that storage.
+
+        :param pos: position view, already holding this ball's position
+        :param vel: velocity view, already holding this ball's velocity
+        """
+
+        self._pos, self._vel = pos, vel
+        self._bound = True
 
     def apply_force(self, force: Vector):
         """
@@ -36,25 +79,38 @@ class PoolBall:
         self.vel.x += acc_x
         self.vel.y += acc_y
 
-    def time_step(self):
+    def is_asleep(self) -> bool:
         """
-        Update position after 1 second.
+        Whether this ball has come to a dead stop. A sleeping ball stays put until another ball hits it.
         """
 
+        return self.vel.x == 0 and self.vel.y == 0
+
+    def time_step(self, dt: float = 1.0):
+        """
+        Update position after dt seconds.
+
+        :param dt: fraction of a time step, e.g. one substep of a fast step
+        """
+
+        pos, vel = self.pos, self.vel
+
         # TODO Hard-coded deadstop
-        if abs(self.vel.x) < 0.1:
-            self.vel.x = 0
-        if abs(self.vel.y) < 0.1:
-            self.vel.y = 0
+        if abs(vel.x) < DEAD_STOP_SPEED:
+            vel.x = 0
+        if abs(vel.y) < DEAD_STOP_SPEED:
+            vel.y = 0
 
 
         # Distance = Velocity * Time
-        self.pos.x += self.vel.x
-        self.pos.y += self.vel.y
+        if dt == 1.0:
+            pos += vel
+        else:
+            pos.x += vel.x * dt
+            pos.y += vel.y * dt
 
         # TODO Velocity slowdown
-        self.vel.x *= 0.99
-        self.vel.y *= 0.99
+        vel *= FRICTION ** dt
 
     def __str__(self):
         return "PoolBall {} at ({},{})".format(self.ball_type.name, self.pos.x, self.pos.y)
@@ -1,15 +1,31 @@
-from typing import List
+import bisect
+import heapq
+import logging
+import math
+import time
+from typing import List, Optional
 
 import numpy as np
 
+from physics.array_engine import ArrayEngine
+from physics.broad_phase import get_colliding_pairs, get_islands, CircleQuery
 from physics.collisions import check_ball_ball_collision, resolve_ball_ball_collision, resolve_ball_wall_collision, \
     check_ball_wall_collision
 from physics.coordinates import Coordinates
-from physics.utility import get_distance, get_line_endpoint_within_box, check_ray_circle_intersection, \
-    get_parallel_line, get_point_on_line_distance_from_point, get_angle
+from physics.utility import get_line_endpoint_within_box, get_angle, get_travel_within_box, sweep_circle
 from pool.ball_type import BallType
+from pool.broad_phase_type import BroadPhaseType
+from pool.collision_event import CollisionEvent
+from pool.engine_type import EngineType
+from pool.event_simulator import EventSimulator
 from pool.game_type import GameType
+from pool.log import get_logger, log_event, PHYSICS, AIM, POCKET
+from pool.pocket_event import PocketEvent
+from pool.pocketability import Pocketability
 from pool.pool_ball import PoolBall
+from pool.table_snapshot import TableSnapshot
+from pool.profiler import BALL_TIME_STEP, BROAD_PHASE, WALL_COLLISIONS, BALL_COLLISIONS, ENGINE, \
+    POCKET_BALLS, CUE_BALL_PATH
 
 LONG_DIAMONDS = 8
 SHORT_DIAMONDS = 4
@@ -19,9 +35,49 @@ RACK_START_DIAMOND = 6
 BALL_MASS = 10
 BALL_RADIUS = 10
 
+# Eight-ball rack by row from the leading 1 ball, 8 ball in the middle, a solid and a stripe in the back corners
+EIGHT_BALL_STRIPES = (BallType.NINE, BallType.TEN, BallType.ELEVEN, BallType.TWELVE, BallType.THIRTEEN,
+                      BallType.FOURTEEN, BallType.FIFTEEN)
+EIGHT_BALL_RACK = (
+    (BallType.ONE,),
+    (BallType.NINE, BallType.TWO),
+    (BallType.TEN, BallType.EIGHT, BallType.THREE),
+    (BallType.ELEVEN, BallType.FOUR, BallType.TWELVE, BallType.FIVE),
+    (BallType.SIX, BallType.THIRTEEN, BallType.SEVEN, BallType.FOURTEEN, BallType.FIFTEEN),
+)
+EIGHT_BALL_CORNERS = (BallType.SIX, BallType.FIFTEEN)
+
+# Ball that must be racked in the middle of the rack
+RACK_CENTER_BALL = {GameType.NINE_BALL: BallType.NINE, GameType.EIGHT_BALL: BallType.EIGHT}
+
+# Snapshot state of a ball not on the table
+ABSENT = (np.nan,) * 4
+
+# Farthest a ball may move in one substep, in its own radii. Collision checks look one substep ahead, so two balls
+# closing at up to two radii per substep cannot pass through each other, nor a ball through a cushion.
+SUBSTEP_TRAVEL = 1.0
+
+# Most substeps a time step is split into; faster balls can still tunnel
+MAX_SUBSTEPS = 16
+
+PHYSICS_LOG = get_logger(PHYSICS)
+AIM_LOG = get_logger(AIM)
+POCKET_LOG = get_logger(POCKET)
+
+
+def get_ball_reach(radius, speed, dt: float = 1.0):
+    """
+    :return: radius plus the distance covered at speed in dt, padded so rounding in the collision check can never
+             make it too tight
+    """
+
+    return radius + speed * dt * (1 + 1e-6) + 1e-6
+
 
 class PoolTable:
-    def __init__(self, nw, se):
+    def __init__(self, nw, se, engine: EngineType = EngineType.SCALAR,
+                 broad_phase: BroadPhaseType = BroadPhaseType.BRUTE_FORCE, game: GameType = GameType.NINE_BALL,
+                 max_substeps: int = MAX_SUBSTEPS):
         # Table dimensions
         self.nw = nw
         self.se = se
@@ -31,24 +87,53 @@ class PoolTable:
         self.bottom = se.y
         self.left = nw.x
 
-        print('self.top={}'.format(self.top))
-        print('self.right={}'.format(self.right))
-        print('self.bottom={}'.format(self.bottom))
-        print('self.left={}'.format(self.left))
+        log_event(PHYSICS_LOG, logging.DEBUG, 'table', top=self.top, right=self.right, bottom=self.bottom,
+                  left=self.left)
 
         self.length = self.right - self.left
         self.width = self.top - self.bottom
 
+        # Bumped whenever a ball may have moved, so results derived from the layout can be cached
+        self.state_version = 0
+
         # Pool table balls
-        self.balls = PoolTable.get_balls(GameType.NINE_BALL)
-        self.rack_balls(GameType.NINE_BALL)
+        self.game = game
+        self.balls = PoolTable.get_balls(game)
+        self.rack_balls(game)
         assert (BallType.CUE in self.balls)
         self.cue_ball = self.balls[BallType.CUE]
 
+        # Physics engine; the array engine takes over storage of ball positions/velocities
+        self.engine_type = engine
+        self.broad_phase = broad_phase
+        self.engine = None
+        if engine == EngineType.ARRAY:
+            self.engine = ArrayEngine(list(self.balls.values()), use_grid=broad_phase == BroadPhaseType.GRID)
+
+        # Optional Profiler timing each phase of time_step()
+        self.profiler = None
+
+        # Optional TrajectoryRecorder given every time step's state
+        self.recorder = None
+
+        # Fast time steps are split into up to max_substeps substeps (1 turns sub-stepping off). Counted since the
+        # table was made: substeps taken, time steps split, and time steps that needed more than max_substeps
+        self.max_substeps = max_substeps
+        self.substeps = 0
+        self.substepped_steps = 0
+        self.capped_steps = 0
+
         # Cue stick
         self.cue_angle = 0.0
         self.cue_line_end = None
 
+        # (cue_angle, state_version) the aim lines were last computed for
+        self.aim_key = None
+
+        # Pocketability of the layout at pocketability_version
+        self.pocketability = None
+        self.pocketability_version = None
+
         # Deflection lines
         self.object_deflect_line_start = None
         self.object_deflect_line_end = None
@@ -60,8 +145,19 @@ class PoolTable:
         self.rail_width = 0
 
         self.hole_centers = self.get_pockets()
+        self.pocket_centers = np.array([(pocket.x, pocket.y) for pocket in self.hole_centers])
         self.hole_radius = 2.25 * self.cue_ball.radius
 
+        # Time steps taken, and every ball pocketed so far
+        self.steps = 0
+        self.pocket_events = []
+
+        # Set to a list to collect a CollisionEvent for every collision (scalar and event engines)
+        self.collision_events = None
+
+        # Event-driven simulation needs the pockets, so is set up last
+        self.event_simulator = EventSimulator(self) if engine == EngineType.EVENT else None
+
         self.corner_pocket_width = 5
         self.side_pocket_width = 5
 
@@ -72,6 +168,159 @@ class PoolTable:
         self.cue_angle = 0.0
         self.cue_line_end = None
         self.cue_deflect_line_end = None
+        self.aim_key = None
+
+    def mark_moved(self):
+        """
+        Call after moving balls by hand (outside time_step()), so cached aim lines are recomputed.
+        """
+
+        self.state_version += 1
+
+    def set_balls(self, balls: dict):
+        """
+        Replace the racked balls, e.g. with a generated scenario. Any number of balls is allowed; keys other than
+        BallType.CUE can be any hashable value, and every ball gets the same treatment as a racked object ball.
+
+        :param balls: key -> PoolBall, including BallType.CUE
+        """
+
+        assert (BallType.CUE in balls)
+        self.balls = balls
+        self.cue_ball = balls[BallType.CUE]
+        self.reset_cue_ball()
+
+        # Engines hold their own copy of the ball list
+        if self.engine is not None:
+            self.engine = ArrayEngine(list(balls.values()), use_grid=self.broad_phase == BroadPhaseType.GRID)
+        if self.event_simulator is not None:
+            self.event_simulator = EventSimulator(self)
+
+        self.mark_moved()
+
+    def get_settings(self) -> dict:
+        """
+        :return: keyword arguments building a table with the same geometry, game and physics settings (picklable)
+        """
+
+        return {'nw': self.nw, 'se': self.se, 'engine': self.engine_type, 'broad_phase': self.broad_phase,
+                'game': self.game, 'max_substeps': self.max_substeps}
+
+    def get_ball_set(self, names: list = None) -> list:
+        """
+        :param names: keys of the balls to describe (default: every ball on the table)
+        :return: (key, ball type, mass, radius) of each ball, enough to build the same balls elsewhere (picklable)
+        """
+
+        balls = self.balls
+        return [(name, balls[name].ball_type, balls[name].mass, balls[name].radius)
+                for name in (names if names is not None else balls)]
+
+    @staticmethod
+    def build(settings: dict, ball_set: list) -> 'PoolTable':
+        """
+        Build a table from get_settings() and get_ball_set() of another, e.g. in another process. Every ball starts
+        at rest at the origin; put them in place with restore().
+
+        :param settings: from get_settings()
+        :param ball_set: from get_ball_set(), including BallType.CUE
+        :return: new table
+        """
+
+        table = PoolTable(**settings)
+        table.set_balls({name: PoolBall(ball_type, Coordinates(0, 0), mass, radius)
+                         for name, ball_type, mass, radius in ball_set})
+
+        return table
+
+    def snapshot(self, base: TableSnapshot = None) -> TableSnapshot:
+        """
+        Capture the table's mutable state: ball positions and velocities, which balls are on the table, the cue
+        angle and step count. Geometry, aim lines and caches are not captured.
+
+        :param base: earlier snapshot of the same table; only the ball state rows that differ from it are stored
+        :return: snapshot to pass to restore()
+        """
+
+        balls = self.balls
+
+        if base is not None and len(balls) <= len(base.names) and all(name in base.slots for name in balls):
+            names, ball_objects, slots = base.names, base.balls, base.slots
+        else:
+            names, ball_objects, slots = tuple(balls), tuple(balls.values()), None
+
+        # Gather into a flat list and convert once; balls not on the table are NaN
+        values = []
+        for name in names:
+            ball = balls.get(name)
+            if ball is None:
+                values += ABSENT
+            else:
+                pos = ball.pos
+                vel = ball.vel
+                values += (pos.x, pos.y, vel.x, vel.y)
+
+        state = np.array(values).reshape(len(names), 4)
+        present = ~np.isnan(state[:, 0])
+
+        if base is None or names is not base.names:
+            return TableSnapshot(names, ball_objects, state, present, cue_angle=self.cue_angle, steps=self.steps,
+                                 pocket_count=len(self.pocket_events), slots=slots)
+
+        if np.array_equal(present, base.present):
+            present = base.present
+
+        # Keep only the rows that differ from the full snapshot at the root of the base
+        root = base if base.base is None else base.base
+        full = root.values
+        same = (state == full) | (np.isnan(state) & np.isnan(full))
+        rows = np.flatnonzero(~same.all(axis=1))
+        state = state[rows]
+        if base.base is not None and np.array_equal(rows, base.rows) and \
+                np.array_equal(state, base.values, equal_nan=True):
+            # Same position as the base branch: share its rows too
+            rows, state = base.rows, base.values
+
+        return TableSnapshot(names, ball_objects, state, present, cue_angle=self.cue_angle, steps=self.steps,
+                             pocket_count=len(self.pocket_events), slots=slots, base=root, rows=rows)
+
+    def restore(self, snapshot: TableSnapshot):
+        """
+        Put the table back into a snapshot's state, including balls pocketed since. Aim lines are recomputed on
+        the next get_cue_ball_path().
+
+        :param snapshot: from snapshot() on this table
+        """
+
+        present = snapshot.present.tolist()
+        if self.engine is not None:
+            for name, ball in self.balls.items():
+                if name not in snapshot.slots:
+                    self.engine.deactivate(ball)
+        self.balls = {name: ball for name, ball, on_table in zip(snapshot.names, snapshot.balls, present) if on_table}
+
+        for ball, row, on_table in zip(snapshot.balls, snapshot.state.tolist(), present):
+            if on_table:
+                ball.pos.x, ball.pos.y, ball.vel.x, ball.vel.y = row
+
+        if self.engine is not None:
+            indices = self.engine.indices
+            for ball, on_table in zip(snapshot.balls, present):
+                if not on_table:
+                    self.engine.deactivate(ball)
+                else:
+                    self.engine.active[indices[ball]] = True
+
+        self.reset_cue_ball()
+        self.cue_angle = snapshot.cue_angle
+        self.steps = snapshot.steps
+        del self.pocket_events[snapshot.pocket_count:]
+        self.mark_moved()
+
+        if self.event_simulator is not None:
+            # Event times are time steps
+            self.event_simulator.time = float(snapshot.steps)
+            self.event_simulator.load()
 
     @staticmethod
     def get_balls(game: GameType):
@@ -102,6 +351,18 @@ class PoolTable:
             BallType.NINE: ball_9,
         }
 
+        # Eight-ball adds the stripes
+        if game == GameType.EIGHT_BALL:
+            for ball_type in EIGHT_BALL_STRIPES:
+                balls[ball_type] = PoolBall(ball_type, Coordinates(0, 0), m, r)
+
+        # Debugging games only rack a few balls
+        if game == GameType.ONE_BALL:
+            balls = {ball_type: balls[ball_type] for ball_type in (BallType.CUE, BallType.ONE)}
+        elif game == GameType.THREE_BALL:
+            balls = {ball_type: balls[ball_type] for ball_type in
+                     (BallType.CUE, BallType.ONE, BallType.TWO, BallType.THREE)}
+
         return balls
 
     def get_pockets(self) -> List[Coordinates]:
@@ -118,15 +379,16 @@ class PoolTable:
             Coordinates(self.right - self.length, self.bottom),
         ]
 
-    def rack_balls(self, game: GameType):
+    def rack_balls(self, game: GameType, rng: np.random.Generator = None, jitter: float = 0.0):
         """
         Set the position of balls for racking position.
         *All balls assumed to have the same radius.*
 
         :param game: type of game to be racked for
+        :param rng: if given, shuffle the balls into a random legal rack (see shuffle_rack())
+        :param jitter: if given with rng, open random gaps of up to this much between neighbouring balls
         """
 
-        # TODO: Need random/shuffling of balls except for fixed balls (ONE, NINE)
         balls = self.balls
         r = balls[BallType.ONE].radius
 
@@ -178,52 +440,148 @@ class PoolTable:
             balls[BallType.EIGHT].pos.x = balls[BallType.SEVEN].pos.x + np.sqrt(3) * r
             balls[BallType.EIGHT].pos.y = balls[BallType.SEVEN].pos.y + r
 
+        elif game == GameType.EIGHT_BALL:
+            # Five rows behind the leading 1 ball, the 8 ball in the middle, a solid and a stripe in the back corners
+            apex_x = self.left + (RACK_START_DIAMOND / LONG_DIAMONDS) * self.length
+            apex_y = self.bottom + self.width / 2
+            for row, row_balls in enumerate(EIGHT_BALL_RACK):
+                for k, ball_type in enumerate(row_balls):
+                    balls[ball_type].pos.x = apex_x + row * np.sqrt(3) * r
+                    balls[ball_type].pos.y = apex_y + (2 * k - row) * r
+
+        if rng is not None:
+            self.shuffle_rack(game, rng, jitter)
+
+        # Every ball was put back on its spot
+        self.mark_moved()
+
+        if PHYSICS_LOG.isEnabledFor(logging.DEBUG):
             for ball in self.balls.values():
-                print('ball {} at {}'.format(ball.ball_type, ball.pos))
+                log_event(PHYSICS_LOG, logging.DEBUG, 'rack', ball=ball.ball_type.name, x=ball.pos.x, y=ball.pos.y)
 
-    def pocket_balls(self):
+    def shuffle_rack(self, game: GameType, rng: np.random.Generator, jitter: float = 0.0):
+        """
+        Shuffle a freshly racked table into a random legal rack. The leading 1 ball and the 9 ball (nine-ball) or
+        8 ball (eight-ball) keep their spots; in eight-ball the back corners get one solid and one stripe.
+
+        :param game: game the table was racked for
+        :param rng: source of randomness
+        :param jitter: open random gaps of up to this much between neighbouring balls
+        """
+
+        balls = self.balls
+        fixed = {BallType.CUE, BallType.ONE, RACK_CENTER_BALL.get(game)}
+        movable = [ball_type for ball_type in balls if ball_type not in fixed]
+        spots = {ball_type: (balls[ball_type].pos.x, balls[ball_type].pos.y) for ball_type in movable}
+
+        order = []
+        if game == GameType.EIGHT_BALL:
+            # Back corners first: one solid and one stripe, either way round
+            solids = [ball_type for ball_type in movable if ball_type not in EIGHT_BALL_STRIPES]
+            stripes = [ball_type for ball_type in movable if ball_type in EIGHT_BALL_STRIPES]
+            corners = [solids[rng.integers(len(solids))], stripes[rng.integers(len(stripes))]]
+            order = [corners[k] for k in rng.permutation(2)]
+            movable = [ball_type for ball_type in movable if ball_type not in corners]
+            slots = list(EIGHT_BALL_CORNERS) + [slot for slot in spots if slot not in EIGHT_BALL_CORNERS]
+        else:
+            slots = list(spots)
+
+        order += [movable[k] for k in rng.permutation(len(movable))]
+        for slot, ball_type in zip(slots, order):
+            balls[ball_type].pos.x, balls[ball_type].pos.y = spots[slot]
+
+        if jitter > 0:
+            # Spread the rack away from the leading ball so neighbours are 2 * jitter further apart, then move every
+            # ball by up to jitter: gaps open by 0 to 4 * jitter, and balls never overlap
+            apex = balls[BallType.ONE]
+            apex_x, apex_y = apex.pos.x, apex.pos.y
+            spread = (2 * apex.radius + 2 * jitter) / (2 * apex.radius)
+            angle = rng.uniform(0, 2 * np.pi, len(balls))
+            distance = jitter * np.sqrt(rng.uniform(0, 1, len(balls)))
+            for k, (ball_type, ball) in enumerate(balls.items()):
+                if ball_type is BallType.CUE:
+                    continue
+                ball.pos.x = apex_x + (ball.pos.x - apex_x) * spread + distance[k] * np.cos(angle[k])
+                ball.pos.y = apex_y + (ball.pos.y - apex_y) * spread + distance[k] * np.sin(angle[k])
+
+        self.mark_moved()
+
+    def pocket_balls(self) -> List[PocketEvent]:
         """
         Call this method to check if any balls should be pocketed and remove them from play.
 
-        :return:
+        :return: the balls pocketed by this call, also appended to self.pocket_events
         """
 
-        pocketed_ball_names = []
+        hole_radius = self.hole_radius
+
+        # Every pocket sits on a rail, so only balls within a pocket radius of a rail can drop
+        left, right = self.left + hole_radius, self.right - hole_radius
+        bottom, top = self.bottom + hole_radius, self.top - hole_radius
+        names = [name for name, ball in self.balls.items()
+                 if not (left < ball.pos.x < right and bottom < ball.pos.y < top)]
+        if not names:
+            return []
 
-        for ball_name in self.balls:
-            ball = self.balls[ball_name]
-            for pocket_pos in self.hole_centers:
-                d = get_distance(ball.pos, pocket_pos)
-                pocketed = d < self.hole_radius
-                if pocketed:
-                    print("Ball {} is pocketed into {}".format(ball_name, pocket_pos))
-                    pocketed_ball_names.append(ball_name)
+        pos = np.array([(self.balls[name].pos.x, self.balls[name].pos.y) for name in names])
+        d = pos[:, np.newaxis, :] - self.pocket_centers
+        dist_sq = np.einsum('ijk,ijk->ij', d, d)
+
+        pocket = dist_sq.argmin(axis=1)
+        pocketed = dist_sq[np.arange(len(names)), pocket] < hole_radius * hole_radius
 
         # Remove these balls from play
-        for ball_name in pocketed_ball_names:
-            if ball_name is not BallType.CUE:  # Don't pocket cue ball
-                del self.balls[ball_name]
-            else:
-                self.reset_cue_ball()
+        return [self.pocket_ball(name, k) for name, k, dropped in zip(names, pocket.tolist(), pocketed.tolist())
+                if dropped]
+
+    def pocket_ball(self, ball_name, pocket: int = None, step: int = None) -> PocketEvent:
+        """
+        Remove a pocketed ball from play. The cue ball is never removed; it is put back at its starting spot.
+
+        :param ball_name: key of the ball in self.balls
+        :param pocket: index of the pocket in self.hole_centers, if known
+        :param step: time step the ball dropped in, by default the latest one
+        :return: the recorded pocketing
+        """
+
+        self.mark_moved()
+
+        event = PocketEvent(ball_name, pocket, self.steps if step is None else step)
+        self.pocket_events.append(event)
+        log_event(POCKET_LOG, logging.INFO, 'pocketed', ball=getattr(ball_name, 'name', ball_name), pocket=pocket,
+                  step=event.step)
 
-                # Restart cue ball position
-                self.balls[ball_name].pos.x = self.left + (CUE_START_DIAMOND / LONG_DIAMONDS) * self.length
-                self.balls[ball_name].pos.y = self.bottom + self.width / 2 + 20
-                self.balls[ball_name].vel.x = self.balls[ball_name].vel.y = 0
+        if ball_name is not BallType.CUE:  # Don't pocket cue ball
+            if self.engine is not None:
+                self.engine.deactivate(self.balls[ball_name])
+            del self.balls[ball_name]
+        else:
+            self.reset_cue_ball()
 
-                print("CUE BALL POCKETED...")
-                print("CUE BALL POS: {}".format(self.cue_ball.pos))
+            # Restart cue ball position
+            self.balls[ball_name].pos.x = self.left + (CUE_START_DIAMOND / LONG_DIAMONDS) * self.length
+            self.balls[ball_name].pos.y = self.bottom + self.width / 2 + 20
+            self.balls[ball_name].vel.x = self.balls[ball_name].vel.y = 0
+
+        return event
 
     def get_cue_ball_path(self):
         """
         Sets the cue stick line endpoint.
         Will either be at a ball or a cushion.
+
+        Nothing is recomputed unless the cue angle has changed or a ball has moved since the last call.
         """
 
         # If cue ball is currently pocketed, skip
         if self.cue_ball is None:
             return
 
+        aim_key = (self.cue_angle, self.state_version)
+        if aim_key == self.aim_key:
+            return
+        self.aim_key = aim_key
+
         # Reset lines
         self.object_deflect_line_start = self.object_deflect_line_end = self.cue_deflect_line_end = None
 
@@ -234,75 +592,193 @@ class PoolTable:
         cue_mid_start = self.cue_ball.pos  # Line start is cue ball position
         cue_mid_end = self.cue_line_end = get_line_endpoint_within_box(cue_mid_start, angle, nw, se, self.cue_ball.radius)
 
-        cue_top_start, cue_top_end = get_parallel_line(cue_mid_start, cue_mid_end, self.cue_ball.radius, True)
-        cue_bot_start, cue_bot_end = get_parallel_line(cue_mid_start, cue_mid_end, self.cue_ball.radius, False)
+        # Ghost ball computation: first object ball the cue ball would touch on its way to the cushion
+        line = np.array([cue_mid_end.x - cue_mid_start.x, cue_mid_end.y - cue_mid_start.y])
+        length = np.hypot(*line)
+        if length == 0:
+            return
 
-        # Ghost ball computation
-        balls_by_distance = list(self.balls.values())
-        balls_by_distance.sort(key=lambda b: get_distance(cue_mid_start, b.pos))
+        (ball,), (ghost,) = self.sweep_cue_ball(line / length, length)
+        if ball is None:
+            return
 
-        for ball in balls_by_distance:
-            if ball.ball_type is BallType.CUE: continue  # Skip the cue ball
+        self.cue_line_end = Coordinates(ghost[0], ghost[1])
+
+        # Set object ball deflection line
+        self.object_deflect_line_start = ball.pos
+        object_ball_angle = get_angle(ball.pos, self.cue_line_end)
+        self.object_deflect_line_end = get_line_endpoint_within_box(ball.pos, object_ball_angle, nw, se, self.cue_ball.radius)
+
+        # Set cue ball deflection line
+        cue_deflect_angle = get_angle(self.object_deflect_line_end, self.object_deflect_line_start)
+        cue_object_angle = get_angle(ball.pos, self.cue_ball.pos)
+        if self.cue_angle % 360 == 0:
+            # Edge case when perfectly to the right
+            cue_deflect_angle = (cue_deflect_angle + 90) % 360
+            side = 'straight'
+        elif self.cue_angle < cue_object_angle:
+            # Cue ball going right of object ball
+            cue_deflect_angle = (cue_deflect_angle - 90) % 360
+            side = 'right'
+        else:
+            # Cue ball going left of object ball
+            cue_deflect_angle = (cue_deflect_angle + 90) % 360
+            side = 'left'
+        self.cue_deflect_line_end = get_line_endpoint_within_box(self.cue_line_end, cue_deflect_angle, nw, se,
+                                                                 self.cue_ball.radius)
+
+        if AIM_LOG.isEnabledFor(logging.DEBUG):
+            log_event(AIM_LOG, logging.DEBUG, 'ghost_ball', ball=ball.ball_type.name, cue_angle=self.cue_angle,
+                      cue_object_angle=cue_object_angle, side=side, x=self.cue_line_end.x, y=self.cue_line_end.y)
+
+    def get_pocketability(self) -> Optional[Pocketability]:
+        """
+        Cut angle, ghost ball position and clear-path checks for every object ball and pocket, computed as
+        [balls x pockets] arrays and cached until a ball moves.
 
-            if (check_ray_circle_intersection(cue_top_start, cue_top_end, ball.pos, ball.radius) or
-                    check_ray_circle_intersection(cue_bot_start, cue_bot_end, ball.pos, ball.radius)):
+        :return: pocketability of the current layout; None if there are no object balls
+        """
 
-                print("CUE BALL INTERSECTING {}".format(ball))
+        if self.pocketability_version == self.state_version:
+            return self.pocketability
+
+        cue_ball = self.cue_ball
+        balls = [ball for ball in self.balls.values() if ball is not cue_ball]
+        self.pocketability, self.pocketability_version = None, self.state_version
+        if not balls:
+            return None
+
+        cue = np.array([cue_ball.pos.x, cue_ball.pos.y])
+        pos = np.array([(ball.pos.x, ball.pos.y) for ball in balls])
+        radius = np.array([ball.radius for ball in balls], dtype=float)
+        pockets = np.array([(pocket.x, pocket.y) for pocket in self.hole_centers])
+
+        # Object ball paths: (balls, pockets)
+        to_pocket = pockets - pos[:, np.newaxis, :]
+        object_length = np.hypot(to_pocket[..., 0], to_pocket[..., 1])
+        object_direction = to_pocket / object_length[..., np.newaxis]
+
+        # The cue ball must touch the object ball on the far side from the pocket
+        contact = (cue_ball.radius + radius)[:, np.newaxis, np.newaxis]
+        ghost = pos[:, np.newaxis, :] - object_direction * contact
+
+        to_ghost = ghost - cue
+        cue_length = np.hypot(to_ghost[..., 0], to_ghost[..., 1])
+        with np.errstate(invalid='ignore'):
+            cue_direction = to_ghost / cue_length[..., np.newaxis]
+        cue_angle = np.degrees(np.arctan2(to_ghost[..., 1], to_ghost[..., 0])) % 360
+
+        cos_cut = np.clip(np.einsum('...i,...i->...', cue_direction, object_direction), -1.0, 1.0)
+        cut_angle = np.degrees(np.arccos(cos_cut))
+
+        # Object ball path must miss every other ball, the cue ball included (it sits where the object ball
+        # starts, so is never in front of itself)
+        centers = np.vstack([pos, cue])
+        radii = np.append(radius, cue_ball.radius)
+        index, _, _ = sweep_circle(pos[:, np.newaxis, :], object_direction, object_length, centers,
+                                   radius[:, np.newaxis, np.newaxis] + radii)
+        object_clear = index == -1
+
+        # Cue ball path must reach the ghost ball before touching anything; the object ball itself is touched
+        # right at the end
+        own = np.arange(len(balls))[:, np.newaxis]
+        index, travel, _ = sweep_circle(cue, cue_direction, cue_length, pos, cue_ball.radius + radius)
+        cue_clear = (index == -1) | ((index == own) & np.isclose(travel, cue_length))
+
+        self.pocketability = Pocketability(balls, list(self.hole_centers), ghost, cue_angle, cut_angle,
+                                           object_clear, cue_clear)
+        return self.pocketability
+
+    def sweep_cue_ball(self, direction: np.ndarray, length: np.ndarray) -> (list, np.ndarray):
+        """
+        Roll the cue ball along one or many directions and find the first object ball it touches on each.
 
-                self.cue_line_end = get_point_on_line_distance_from_point(cue_mid_start, cue_mid_end, ball.pos,
-                                                                          2 * ball.radius)
+        :param direction: (angles, 2) or (2,) unit directions
+        :param length: (angles,) or scalar furthest travel along each direction
+        :return: ball hit along each direction (None if none), and (angles, 2) cue ball centers at contact,
+                 or at the end of the travel if nothing is hit
+        """
 
-                # Set object ball deflection line
-                self.object_deflect_line_start = ball.pos
-                object_ball_angle = get_angle(ball.pos, self.cue_line_end)
-                self.object_deflect_line_end = get_line_endpoint_within_box(ball.pos, object_ball_angle, nw, se, self.cue_ball.radius)
+        direction = np.asarray(direction, dtype=float).reshape(-1, 2)
+        length = np.broadcast_to(np.asarray(length, dtype=float), direction.shape[:1])
 
-                # Set cue ball deflection line
-                cue_deflect_angle = get_angle(self.object_deflect_line_end, self.object_deflect_line_start)
-                cue_object_angle = get_angle(ball.pos, self.cue_ball.pos)
-                print('self.cue_angle: {}'.format(self.cue_angle))
-                print('self.cue_angle: {}'.format(cue_object_angle))
-                if self.cue_angle % 360 == 0:
-                    # Edge case when perfectly to the right
-                    cue_deflect_angle = (cue_deflect_angle + 90) % 360
-                elif self.cue_angle < cue_object_angle:
+        cue_ball = self.cue_ball
+        others = [ball for ball in self.balls.values() if ball is not cue_ball]
+        centers = np.array([(ball.pos.x, ball.pos.y) for ball in others]).reshape(-1, 2)
+        reach = np.array([cue_ball.radius + ball.radius for ball in others], dtype=float)
 
-                    print("CUE BALL GOING RIGHT OF OBJECT BALl")
-                    cue_deflect_angle = (cue_deflect_angle - 90) % 360
-                else:
-                    print("CUE BALL GOING LEFT OF OBJECT BALl")
-                    cue_deflect_angle = (cue_deflect_angle + 90) % 360
-                self.cue_deflect_line_end = get_line_endpoint_within_box(self.cue_line_end, cue_deflect_angle, nw, se,
-                                                                            self.cue_ball.radius)
-                return
+        index, _, ghost = sweep_circle(np.array([cue_ball.pos.x, cue_ball.pos.y]), direction, length, centers, reach)
 
-    def time_step(self):
-        balls = list(self.balls.values())
+        return [others[i] if i >= 0 else None for i in index.tolist()], ghost
 
-        # Update ball positions
-        for ball in balls:
-            ball.time_step()
+    def get_aim_fan(self, angles) -> (list, np.ndarray):
+        """
+        Aim at many cue angles in one pass, e.g. to draw a fan of candidate aim lines.
 
-        # Check/resolve collisions
-        for i in range(len(balls)):
-            # Check ball-wall collision
-            ball_wall_collision = check_ball_wall_collision(balls[i], self.top, self.left, self.bottom, self.right)
-            if ball_wall_collision is not None:
-                # print("BALL {}, WALL {}".format(balls[i], ball_wall_collision))
+        :param angles: cue angles, degrees
+        :return: ball hit at each angle (None if the cue ball reaches a cushion), and (angles, 2) ghost ball
+                 centers, or the cushion endpoints where nothing is hit
+        """
 
-                resolve_ball_wall_collision(balls[i], ball_wall_collision)
+        angles = np.radians(np.asarray(angles, dtype=float).reshape(-1))
+        direction = np.stack([np.cos(angles), np.sin(angles)], axis=-1)
 
-            for j in range(i + 1, len(balls)):
-                if check_ball_ball_collision(balls[i], balls[j]):
-                    # print("BALL {}, BALL {}".format(balls[i], balls[j]))
+        start = np.array([self.cue_ball.pos.x, self.cue_ball.pos.y])
+        length = get_travel_within_box(start, direction, self.nw, self.se, self.cue_ball.radius)
 
-                    resolve_ball_ball_collision(balls[i], balls[j])
+        return self.sweep_cue_ball(direction, length)
+
+    def time_step(self, aim: bool = True):
+        """
+        Advance the table by one time step.
+
+        :param aim: also update the cue stick line and ghost ball
+        """
+
+        profiler = self.profiler
+
+        if not self.is_at_rest():
+            self.mark_moved()
+
+        if self.event_simulator is not None:
+            # Event-driven simulation finds exact collision times, so needs no substeps
+            if profiler is not None:
+                start = time.perf_counter_ns()
+            self.event_simulator.advance(1.0)
+            if profiler is not None:
+                profiler.mark(ENGINE, start)
+        else:
+            substeps = self.get_substeps()
+            dt = 1.0 / substeps
+
+            if self.engine is not None:
+                if profiler is not None:
+                    start = time.perf_counter_ns()
+                for _ in range(substeps):
+                    self.engine.time_step(self.top, self.left, self.bottom, self.right, dt)
+                if profiler is not None:
+                    profiler.mark(ENGINE, start)
+            else:
+                for _ in range(substeps):
+                    self.scalar_time_step(dt)
+
+        self.steps += 1
 
         # Check pocketed balls
+        if profiler is not None:
+            start = time.perf_counter_ns()
         self.pocket_balls()
+        if profiler is not None:
+            start = profiler.mark(POCKET_BALLS, start)
 
         # Get cue ball path
-        self.get_cue_ball_path()
+        if aim:
+            self.get_cue_ball_path()
+            if profiler is not None:
+                profiler.mark(CUE_BALL_PATH, start)
+
+        if self.recorder is not None:
+            self.recorder.record(self)
 
         # Get cue ball ghost ball
         # TODO
@@ -312,3 +788,212 @@ class PoolTable:
 
         # Get target ball deflection line
         # TODO
+
+    def get_substeps(self) -> int:
+        """
+        Substeps to split the next time step into: enough that no ball moves more than SUBSTEP_TRAVEL of its radius
+        per substep, up to max_substeps. Slow tables take a single step, so only fast shots pay for sub-stepping.
+        Updates the substep counters.
+
+        :return: number of substeps, at least 1
+        """
+
+        if self.engine is not None:
+            active = self.engine.active
+            vel = self.engine.vel[active]
+            travel_sq = np.einsum('ij,ij->i', vel, vel) / self.engine.radius[active] ** 2
+            travel_sq = float(travel_sq.max()) if len(travel_sq) else 0.0
+        else:
+            travel_sq = max(((ball.vel.x * ball.vel.x + ball.vel.y * ball.vel.y) / (ball.radius * ball.radius)
+                             for ball in self.balls.values()), default=0.0)
+
+        needed = max(math.ceil(math.sqrt(travel_sq) / SUBSTEP_TRAVEL), 1)
+        substeps = min(needed, max(self.max_substeps, 1))
+
+        self.substeps += substeps
+        if substeps > 1:
+            self.substepped_steps += 1
+        if needed > substeps:
+            self.capped_steps += 1
+
+        return substeps
+
+    def scalar_time_step(self, dt: float = 1.0):
+        """
+        Move and collide balls one PoolBall at a time.
+
+        Sleeping (stopped) balls are not integrated, and only balls in an island containing a moving ball are
+        collision-checked, so a table at rest costs next to nothing. A ball sped up by a collision is looked up
+        again at its new speed, so the result is the same as checking every pair.
+
+        :param dt: fraction of a time step to advance by
+        """
+
+        profiler = self.profiler
+        if profiler is not None:
+            start = time.perf_counter_ns()
+
+        balls = list(self.balls.values())
+        awake = [i for i, ball in enumerate(balls) if not ball.is_asleep()]
+        if not awake:
+            return
+
+        # Update ball positions
+        for i in awake:
+            balls[i].time_step(dt)
+
+        if profiler is not None:
+            start = profiler.mark(BALL_TIME_STEP, start)
+
+        # Balls each ball may collide with, limited to islands that have a moving ball in them
+        pos, radius, reach = PoolTable.get_reach(balls, dt)
+        pairs_i, pairs_j = get_colliding_pairs(pos, reach, self.broad_phase == BroadPhaseType.GRID)
+        islands = get_islands(len(balls), pairs_i, pairs_j)
+        awake_islands = set(islands[awake].tolist())
+
+        neighbours = {i: [] for i in range(len(balls)) if islands[i] in awake_islands}
+        for i, j in zip(pairs_i.tolist(), pairs_j.tolist()):
+            if i in neighbours:
+                neighbours[i].append(j)
+
+        # Balls still to check, in index order as when checking every pair (a sorted list is a heap)
+        pending = sorted(neighbours)
+        query = CircleQuery(pos, reach)
+
+        debug = PHYSICS_LOG.isEnabledFor(logging.DEBUG)
+        collisions = self.collision_events
+        if collisions is not None:
+            names = list(self.balls)
+
+        # Wall and ball checks are interleaved, so their times are summed separately
+        timing = profiler is not None
+        if timing:
+            start = profiler.mark(BROAD_PHASE, start)
+            wall_time = ball_time = 0
+
+        # Check/resolve collisions
+        while pending:
+            i = heapq.heappop(pending)
+            if timing:
+                t0 = time.perf_counter_ns()
+
+            # Check ball-wall collision
+            ball_wall_collision = check_ball_wall_collision(balls[i], self.top, self.left, self.bottom, self.right,
+                                                            dt)
+            if ball_wall_collision is not None:
+                if debug:
+                    log_event(PHYSICS_LOG, logging.DEBUG, 'wall_collision', ball=balls[i].ball_type.name,
+                              wall=ball_wall_collision.name, step=self.steps + 1)
+                if collisions is not None:
+                    collisions.append(CollisionEvent(names[i], ball_wall_collision, self.steps + 1))
+
+                resolve_ball_wall_collision(balls[i], ball_wall_collision)
+                PoolTable.add_contacts((i,), balls, radius, query, dt, neighbours, pending, i, i)
+
+            if timing:
+                t1 = time.perf_counter_ns()
+                wall_time += t1 - t0
+
+            # Contacts may be added behind the one being checked, so walk the list by index
+            nearby = neighbours[i]
+            k = 0
+            while k < len(nearby):
+                j = nearby[k]
+                if check_ball_ball_collision(balls[i], balls[j], dt):
+                    if debug:
+                        log_event(PHYSICS_LOG, logging.DEBUG, 'ball_collision', ball=balls[i].ball_type.name,
+                                  other=balls[j].ball_type.name, step=self.steps + 1)
+                    if collisions is not None:
+                        collisions.append(CollisionEvent(names[i], names[j], self.steps + 1))
+
+                    resolve_ball_ball_collision(balls[i], balls[j])
+                    PoolTable.add_contacts((i, j), balls, radius, query, dt, neighbours, pending, i, j)
+                k += 1
+
+            if timing:
+                ball_time += time.perf_counter_ns() - t1
+
+        if timing:
+            profiler.add(WALL_COLLISIONS, start, wall_time)
+            profiler.add(BALL_COLLISIONS, start + wall_time, ball_time)
+
+    @staticmethod
+    def get_reach(balls: List[PoolBall], dt: float = 1.0) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+        How far from its center each ball can touch another ball during this step: its radius plus the distance it
+        moves at its current speed. Two balls can only meet if they are within the sum of their reaches.
+
+        :param balls: balls in play
+        :param dt: length of the step, in time steps
+        :return: (balls, 2) positions, (balls,) radii and (balls,) reaches
+        """
+
+        pos = np.array([(ball.pos.x, ball.pos.y) for ball in balls]).reshape(-1, 2)
+        radius = np.array([ball.radius for ball in balls], dtype=float)
+        speed = np.array([math.hypot(ball.vel.x, ball.vel.y) for ball in balls])
+
+        return pos, radius, get_ball_reach(radius, speed, dt)
+
+    @staticmethod
+    def add_contacts(moved: tuple, balls: List[PoolBall], radius: np.ndarray, query: CircleQuery, dt: float,
+                     neighbours: dict, pending: list, current: int, checked: int):
+        """
+        After a collision changes the velocity of some balls, update their reach to their new speed and queue every
+        pair they may now collide with that has not been checked yet this step.
+
+        :param moved: indices of the balls whose velocity changed
+        :param balls: balls in play
+        :param radius: (balls,) radii
+        :param query: positions and reaches (from get_reach()) of the balls; reaches are updated
+        :param dt: length of the step, in time steps
+        :param neighbours: ball -> sorted balls after it to check it against, updated in place
+        :param pending: heap of balls still to check, updated in place
+        :param current: ball being checked
+        :param checked: last ball current has been checked against (current itself before its ball checks)
+        """
+
+        for k in moved:
+            vel = balls[k].vel
+            query.set_radius(k, get_ball_reach(radius[k], math.hypot(vel.x, vel.y), dt))
+
+        for k in moved:
+            for other in query.get_touching(k).tolist():
+                i, j = (other, k) if other < k else (k, other)
+
+                # Pairs earlier in the check order were already checked, at the speeds the balls had then
+                if i < current or (i == current and j <= checked):
+                    continue
+
+                nearby = neighbours.get(i)
+                if nearby is None:
+                    neighbours[i] = nearby = []
+                    heapq.heappush(pending, i)
+
+                index = bisect.bisect_left(nearby, j)
+                if index == len(nearby) or nearby[index] != j:
+                    nearby.insert(index, j)
+
+    def get_islands(self, balls: List[PoolBall], dt: float = 1.0) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+        Group balls that may touch during this time step into contact islands.
+
+        Two balls can only meet this step if they are within their reaches (see get_reach()) of each other, so a
+        ball's contacts depend on its own speed, not on the rest of the table. Balls linked by such pairs form an
+        island; an island with no moving ball in it stays asleep.
+
+        :param balls: balls in play
+        :param dt: length of the step, in time steps
+        :return: island label of each ball, and index arrays (i, j) of the pairs that may collide, sorted by i then j
+        """
+
+        pos, _, reach = PoolTable.get_reach(balls, dt)
+        pairs_i, pairs_j = get_colliding_pairs(pos, reach, self.broad_phase == BroadPhaseType.GRID)
+
+        return get_islands(len(balls), pairs_i, pairs_j), pairs_i, pairs_j
+
+    def is_at_rest(self) -> bool:
+        """
+        Whether every ball on the table has stopped, so further time steps would change nothing.
+        """
+
+        return all(ball.is_asleep() for ball in self.balls.values())
@@ -0,0 +1,142 @@
+"""
+Opt-in per-phase timing of time steps and frames.
+
+Code under measurement holds an optional Profiler (None when profiling is off) and brackets each phase with
+time.perf_counter_ns() readings only when one is set, so leaving the hooks in costs a None check per phase.
+"""
+import json
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Phases recorded by PoolTable and main.py
+BALL_TIME_STEP = 'ball_time_step'
+BROAD_PHASE = 'broad_phase'
+WALL_COLLISIONS = 'wall_collisions'
+BALL_COLLISIONS = 'ball_collisions'
+ENGINE = 'engine'
+POCKET_BALLS = 'pocket_balls'
+CUE_BALL_PATH = 'cue_ball_path'
+DRAW_TABLE = 'draw_table'
+DRAW_AIM = 'draw_aim'
+DRAW_BALLS = 'draw_balls'
+DISPLAY_UPDATE = 'display_update'
+
+PERCENTILES = (50, 90, 99)
+
+
+class Profiler:
+    """
+    Records how long each phase takes, keeping rolling windows of durations for percentiles and the spans of
+    the latest frames for a Chrome trace_event timeline (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self, window: int = 1000, trace_frames: int = 300):
+        """
+        :param window: durations kept per phase for percentiles
+        :param trace_frames: frames kept for the timeline
+        """
+        self.window = window
+        self.durations: Dict[str, deque] = {}
+
+        # (frame, phase, start ns, duration ns) of the latest frames
+        self.spans = deque()
+        self.trace_frames = trace_frames
+
+        self.frame = 0
+        self.origin = time.perf_counter_ns()
+
+    def begin_frame(self):
+        """
+        Start a new frame: everything recorded from now on belongs to it.
+        """
+
+        self.frame += 1
+        while self.spans and self.spans[0][0] <= self.frame - self.trace_frames:
+            self.spans.popleft()
+
+    def add(self, phase: str, start: int, duration: int):
+        """
+        Record one span of a phase.
+
+        :param phase: phase name
+        :param start: perf_counter_ns() at the start of the span
+        :param duration: span length, ns
+        """
+
+        durations = self.durations.get(phase)
+        if durations is None:
+            durations = self.durations[phase] = deque(maxlen=self.window)
+        durations.append(duration)
+
+        self.spans.append((self.frame, phase, start, duration))
+
+    def mark(self, phase: str, start: int) -> int:
+        """
+        Record a span of a phase that started at start and ends now.
+
+        :return: now, to start timing the next phase
+        """
+
+        now = time.perf_counter_ns()
+        self.add(phase, start, now - start)
+        return now
+
+    def get_percentiles(self, phase: str, percentiles: Iterable[float] = PERCENTILES) -> List[float]:
+        """
+        :return: percentiles of the phase's recent durations, seconds
+        """
+
+        durations = self.durations.get(phase)
+        if not durations:
+            return [float('nan') for _ in percentiles]
+
+        return (np.percentile(np.fromiter(durations, dtype=float), list(percentiles)) / 1e9).tolist()
+
+    def get_summary(self) -> dict:
+        """
+        :return: for each phase, the number of recent spans, their mean and percentiles (seconds)
+        """
+
+        summary = {}
+        for phase, durations in self.durations.items():
+            stats = {'count': len(durations), 'mean': float(np.mean(durations)) / 1e9}
+            for p, value in zip(PERCENTILES, self.get_percentiles(phase)):
+                stats['p{}'.format(p)] = value
+            summary[phase] = stats
+
+        return summary
+
+    def get_chrome_trace(self, frames: Optional[int] = None) -> dict:
+        """
+        Timeline of the latest frames in Chrome trace_event format.
+
+        :param frames: number of latest frames to include (default: all kept)
+        """
+
+        first = self.frame - (frames if frames is not None else self.trace_frames) + 1
+        events = [
+            {
+                'name': phase,
+                'cat': 'pool',
+                'ph': 'X',
+                'ts': (start - self.origin) / 1e3,
+                'dur': duration / 1e3,
+                'pid': 0,
+                'tid': 0,
+                'args': {'frame': frame},
+            }
+            for frame, phase, start, duration in self.spans if frame >= first
+        ]
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: str, frames: Optional[int] = None):
+        """
+        Write get_chrome_trace() to a JSON file.
+        """
+
+        with open(path, 'w') as f:
+            json.dump(self.get_chrome_trace(frames), f)
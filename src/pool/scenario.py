@@ -0,0 +1,177 @@
+"""
+Synthetic stress scenarios: tables holding any number of non-overlapping balls (10 to 10,000 and beyond) with
+random velocities, stepped through the ordinary PoolTable.time_step() path, to find where collision detection,
+pocketing and memory use stop scaling.
+
+Layouts:
+    UNIFORM  balls scattered evenly over the whole table
+    CLUSTER  balls packed in a near-touching hexagonal cluster in the middle of the table
+"""
+from typing import Optional
+
+import numpy as np
+
+from physics.coordinates import Coordinates
+from physics.vector import Vector
+from pool.ball_type import BallType
+from pool.broad_phase_type import BroadPhaseType
+from pool.engine_type import EngineType
+from pool.game_type import GameType
+from pool.pool_ball import PoolBall
+from pool.pool_table import PoolTable, BALL_MASS, BALL_RADIUS
+
+UNIFORM = 'uniform'
+CLUSTER = 'cluster'
+LAYOUTS = (UNIFORM, CLUSTER)
+
+# Narrowest table generated, in ball radii, so the pockets leave room for balls
+MIN_WIDTH = 12
+
+# Generated object balls cycle through these types (for drawing)
+OBJECT_TYPES = [ball_type for ball_type in BallType if ball_type is not BallType.CUE]
+
+
+def get_table_size(n_balls: int, radius: float = BALL_RADIUS, density: float = 0.2,
+                   layout: str = UNIFORM) -> (float, float):
+    """
+    Size of a 2:1 table on which n_balls cover the given fraction of the cloth, and at least MIN_WIDTH ball radii
+    wide; a cluster table is also wide enough for the cluster, clear of the side pockets.
+
+    :return: length, width
+    """
+
+    width = max(np.sqrt(n_balls * np.pi * radius ** 2 / density / 2), MIN_WIDTH * radius)
+    if layout == CLUSTER:
+        # Hexagonal packing: each ball takes sqrt(3) / 2 * (2r)^2 of the cluster's area
+        cluster_radius = 2 * radius * np.sqrt(n_balls * np.sqrt(3) / (2 * np.pi))
+        width = max(width, 2 * (cluster_radius + 4 * radius))
+
+    return 2 * width, width
+
+
+def get_uniform_positions(n_balls: int, nw: Coordinates, se: Coordinates, radius: float,
+                          rng: np.random.Generator, pockets: np.ndarray = None,
+                          pocket_clearance: float = 0.0) -> np.ndarray:
+    """
+    Scatter balls over a table: each ball gets its own random cell of a square lattice, at a random place within
+    it, so no two balls overlap.
+
+    :param pockets: (pockets, 2) centers to keep clear of, so no ball starts in a pocket
+    :param pocket_clearance: distance from a pocket center within which no ball is placed
+    :return: (n_balls, 2) positions
+    """
+
+    # Lattice over the area a ball's center can reach; cells leave room to move
+    cell = 2.5 * radius
+    columns = int((se.x - nw.x - 2 * radius) // cell)
+    rows = int((nw.y - se.y - 2 * radius) // cell)
+    row, column = np.divmod(np.arange(columns * rows), columns)
+    left = nw.x + radius + column * cell
+    bottom = se.y + radius + row * cell
+
+    free = np.ones(columns * rows, dtype=bool)
+    if pockets is not None and len(pockets):
+        # Cells where no ball center can be within the clearance of a pocket
+        center = np.stack([left + cell / 2, bottom + cell / 2], axis=-1)
+        d = center[:, np.newaxis, :] - pockets
+        free = np.einsum('ijk,ijk->ij', d, d).min(axis=1) > (pocket_clearance + cell - 2 * radius) ** 2
+
+    cells = np.flatnonzero(free)
+    if len(cells) < n_balls:
+        raise ValueError('{} balls do not fit on a {} x {} table'.format(n_balls, se.x - nw.x, nw.y - se.y))
+    cells = rng.choice(cells, size=n_balls, replace=False)
+
+    slack = cell - 2 * radius
+    x = left[cells] + radius + rng.uniform(0, slack, n_balls)
+    y = bottom[cells] + radius + rng.uniform(0, slack, n_balls)
+
+    return np.stack([x, y], axis=-1)
+
+
+def get_cluster_positions(n_balls: int, nw: Coordinates, se: Coordinates, radius: float,
+                          rng: np.random.Generator, gap: float = 0.1) -> np.ndarray:
+    """
+    Pack balls into a round hexagonal cluster in the middle of the table, neighbours at most gap apart.
+
+    :return: (n_balls, 2) positions
+    """
+
+    spacing = 2 * radius + gap
+    center = np.array([(nw.x + se.x) / 2, (nw.y + se.y) / 2])
+
+    # Hexagonal lattice big enough for n_balls, nearest points to the center first
+    k = int(np.ceil(np.sqrt(n_balls))) + 1
+    i, j = np.meshgrid(np.arange(-k, k + 1), np.arange(-k, k + 1))
+    points = np.stack([(i + j / 2).ravel() * spacing, (j * np.sqrt(3) / 2).ravel() * spacing], axis=-1)
+    points = points[np.argsort(np.einsum('ij,ij->i', points, points), kind='stable')[:n_balls]]
+
+    # Wiggle within the gaps so the cluster is not perfectly regular
+    points += rng.uniform(-gap / 4, gap / 4, points.shape)
+    positions = center + points
+
+    if (positions[:, 0].min() - radius < nw.x or positions[:, 0].max() + radius > se.x or
+            positions[:, 1].min() - radius < se.y or positions[:, 1].max() + radius > nw.y):
+        raise ValueError('a cluster of {} balls does not fit on a {} x {} table'.format(n_balls, se.x - nw.x,
+                                                                                         nw.y - se.y))
+    return positions
+
+
+def make_scenario(n_balls: int,
+                  layout: str = UNIFORM,
+                  length: Optional[float] = None,
+                  width: Optional[float] = None,
+                  density: float = 0.2,
+                  speed: float = 5.0,
+                  moving: float = 1.0,
+                  seed: int = 0,
+                  engine: EngineType = EngineType.SCALAR,
+                  broad_phase: BroadPhaseType = BroadPhaseType.GRID) -> PoolTable:
+    """
+    Build a table holding n_balls balls (the cue ball and n_balls - 1 object balls keyed 1, 2, ...).
+
+    :param n_balls: number of balls, cue ball included
+    :param layout: UNIFORM or CLUSTER
+    :param length: table length; by default sized from density
+    :param width: table width; by default half the length (or, with neither given, sized from density)
+    :param density: fraction of the cloth covered by balls when sizing the table
+    :param speed: largest initial speed, per time step
+    :param moving: fraction of the balls given a velocity; the rest start at rest
+    :param seed: seed for positions and velocities
+    :param engine: physics engine
+    :param broad_phase: ball-ball broad phase
+    :return: table ready to step
+    """
+
+    if layout not in LAYOUTS:
+        raise ValueError('unknown layout {}'.format(layout))
+
+    if length is None and width is None:
+        length, width = get_table_size(n_balls, BALL_RADIUS, density, layout)
+    elif length is None:
+        length = 2 * width
+    elif width is None:
+        width = length / 2
+    nw, se = Coordinates(0, width), Coordinates(length, 0)
+
+    table = PoolTable(nw, se, engine=engine, broad_phase=broad_phase, game=GameType.ONE_BALL)
+
+    rng = np.random.default_rng(seed)
+    if layout == UNIFORM:
+        positions = get_uniform_positions(n_balls, nw, se, BALL_RADIUS, rng, table.pocket_centers,
+                                          table.hole_radius)
+    else:
+        positions = get_cluster_positions(n_balls, nw, se, BALL_RADIUS, rng)
+
+    angle = rng.uniform(0, 2 * np.pi, n_balls)
+    magnitude = rng.uniform(0, speed, n_balls) * (rng.uniform(0, 1, n_balls) < moving)
+    velocities = np.stack([magnitude * np.cos(angle), magnitude * np.sin(angle)], axis=-1)
+
+    balls = {}
+    for k, ((x, y), (vx, vy)) in enumerate(zip(positions.tolist(), velocities.tolist())):
+        ball_type = BallType.CUE if k == 0 else OBJECT_TYPES[(k - 1) % len(OBJECT_TYPES)]
+        balls[BallType.CUE if k == 0 else k] = PoolBall(ball_type, Coordinates(x, y), BALL_MASS, BALL_RADIUS,
+                                                        vel=Vector(vx, vy))
+
+    table.set_balls(balls)
+
+    return table
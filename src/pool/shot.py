@@ -0,0 +1,135 @@
+from typing import Callable, Optional
+
+import numpy as np
+
+from physics.vector import Vector
+from pool.ball_type import BallType
+from pool.pool_table import PoolTable
+
+BREAK_FORCE = 500.0
+STRIKE_FORCE = 25.0
+
+# Cushions the cue ball may come off without touching an object ball before a shot counts as missed; kicks and
+# banks off fewer cushions play out in full
+MISS_CUSHIONS = 3
+
+
+class Shot:
+    """
+    A strike of the cue ball.
+    """
+
+    def __init__(self, angle: float, force: float):
+        """
+        :param angle: direction of the strike, degrees counter-clockwise from the positive x-axis
+        :param force: magnitude of the force applied to the cue ball
+        """
+        self.angle = angle
+        self.force = force
+
+    def get_force(self) -> Vector:
+        """
+        Force vector applied to the cue ball.
+        """
+
+        angle = np.radians(self.angle)
+        return Vector(self.force * np.cos(angle), self.force * np.sin(angle))
+
+    def apply(self, table: PoolTable):
+        """
+        Strike the table's cue ball.
+        """
+
+        table.cue_ball.apply_force(self.get_force())
+
+    def __str__(self):
+        return "Shot at {} degrees with force {}".format(self.angle, self.force)
+
+
+def simulate_shot(table: PoolTable, shot: Shot, max_steps: int = 10000,
+                  stop: Optional[Callable[[PoolTable], bool]] = None) -> int:
+    """
+    Play a shot and step the table until every ball has stopped or the step budget runs out.
+    Aim lines are not updated while stepping.
+
+    :param table: table to play on, modified in place
+    :param shot: shot to play
+    :param max_steps: step budget
+    :param stop: checked after every time step; stops the shot early when it returns True (not checked by the
+                 event-driven engine, which runs to rest in one go)
+    :return: number of time steps simulated
+    """
+
+    shot.apply(table)
+
+    if table.event_simulator is not None:
+        # The simulator's clock runs on from earlier shots
+        start = table.event_simulator.time
+        table.event_simulator.run_to_rest(max_time=max_steps)
+        return min(int(np.ceil(table.event_simulator.time - start)), max_steps)
+
+    steps = 0
+    while steps < max_steps and not table.is_at_rest():
+        if table.profiler is not None:
+            table.profiler.begin_frame()
+        table.time_step(aim=False)
+        steps += 1
+        if stop is not None and stop(table):
+            break
+
+    return steps
+
+
+def is_scratched(table: PoolTable) -> bool:
+    """
+    Whether the cue ball has been pocketed (and re-spotted) since the table's pocket events were last cleared.
+    """
+
+    return any(event.ball is BallType.CUE for event in table.pocket_events)
+
+
+class MissCheck:
+    """
+    Stop condition for simulate_shot(): the cue ball has come off MISS_CUSHIONS cushions without moving any object
+    ball, so the shot has missed. Cushions are counted as reversals of the cue ball's velocity, so any engine works.
+    Make one per shot, just before playing it, with the object balls at rest.
+    """
+
+    def __init__(self, table: PoolTable, cushions: int = MISS_CUSHIONS):
+        """
+        :param table: table about to be shot on
+        :param cushions: cushions after which the shot counts as missed
+        """
+        cue_ball = table.cue_ball
+        self.cushions = cushions
+        self.start = {name: (ball.pos.x, ball.pos.y) for name, ball in table.balls.items() if ball is not cue_ball}
+        self.contacted = False
+        self.rebounds = 0
+        self.vel = (0.0, 0.0)
+
+    def is_contacted(self, table: PoolTable) -> bool:
+        """
+        Whether any object ball has been hit (set moving), moved or been pocketed since the shot started.
+        """
+
+        if not self.contacted:
+            balls = table.balls
+            for name, (x, y) in self.start.items():
+                ball = balls.get(name)
+                if ball is None or not ball.is_asleep() or ball.pos.x != x or ball.pos.y != y:
+                    self.contacted = True
+                    break
+
+        return self.contacted
+
+    def __call__(self, table: PoolTable) -> bool:
+        if self.is_contacted(table):
+            return False
+
+        vel = table.cue_ball.vel
+        vx, vy = self.vel
+        if vel.x * vx < 0 or vel.y * vy < 0:
+            self.rebounds += 1
+        self.vel = (vel.x, vel.y)
+
+        return self.rebounds >= self.cushions
@@ -0,0 +1,249 @@
+"""
+Long-lived process pool for simulating many shots from one table position.
+
+The base table state is published once through shared memory; every worker keeps its own warm PoolTable and
+only (cue_angle, force) tuples travel to the workers. Results come back as small NumPy arrays.
+"""
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from pool.pool_table import PoolTable
+from pool.shot import Shot, simulate_shot, is_scratched, MissCheck
+from pool.table_snapshot import TableSnapshot
+
+# Columns of the shared state array, one row per ball
+X, Y, VX, VY, PRESENT = range(5)
+STATE_COLUMNS = 5
+
+
+class ShotResult:
+    """
+    Final state of the table after one shot.
+    """
+
+    def __init__(self, shot: Shot, names: list, pos: np.ndarray, present: np.ndarray, steps: int, seconds: float,
+                 scratched: bool = False, leave: Optional[float] = None, missed: bool = False,
+                 stopped: bool = False):
+        """
+        :param shot: shot that was played
+        :param names: ball keys, in the row order of pos/present
+        :param pos: (balls, 2) final positions
+        :param present: (balls,) whether each ball is still on the table
+        :param steps: time steps simulated
+        :param seconds: wall-clock time spent in the worker
+        :param scratched: whether the cue ball was pocketed (and re-spotted)
+        :param leave: smallest cut angle of the makeable shots left afterwards (degrees), if the executor was
+                      asked for it and any are left
+        :param missed: whether the cue ball failed to move any object ball (see MissCheck)
+        :param stopped: whether the shot was cut short (stop_on_scratch, stop_on_miss) before every ball stopped
+        """
+        self.shot = shot
+        self.names = names
+        self.pos = pos
+        self.present = present
+        self.steps = steps
+        self.seconds = seconds
+        self.scratched = scratched
+        self.leave = leave
+        self.missed = missed
+        self.stopped = stopped
+
+    def get_pocketed(self) -> list:
+        """
+        Keys of the balls pocketed by this shot (the cue ball is re-spotted, never pocketed).
+        """
+
+        return [name for name, present in zip(self.names, self.present) if not present]
+
+
+def get_table_state(table: PoolTable, names: list) -> np.ndarray:
+    """
+    Pack a table's ball state into a (balls, STATE_COLUMNS) array.
+
+    :param table: table to read
+    :param names: ball keys, one row each; balls missing from the table are marked not present
+    """
+
+    state = np.zeros((len(names), STATE_COLUMNS))
+    for k, name in enumerate(names):
+        ball = table.balls.get(name)
+        if ball is not None:
+            state[k] = ball.pos.x, ball.pos.y, ball.vel.x, ball.vel.y, 1.0
+
+    return state
+
+
+"""
+Worker side.
+"""
+
+_worker = None
+
+
+class _Worker:
+    def __init__(self, shm_name: str, names: list, settings: dict, ball_set: list, max_steps: int,
+                 stop_on_scratch: bool, stop_on_miss: bool, get_leave: bool):
+        self.shm = shared_memory.SharedMemory(name=shm_name)
+        self.names = names
+        self.max_steps = max_steps
+        self.stop_on_scratch = stop_on_scratch
+        self.stop_on_miss = stop_on_miss
+        self.get_leave = get_leave
+
+        # Generation counter followed by the state rows
+        buffer = np.ndarray((1 + len(names) * STATE_COLUMNS,), dtype=np.float64, buffer=self.shm.buf)
+        self.generation = buffer[:1]
+        self.state = buffer[1:].reshape(len(names), STATE_COLUMNS)
+
+        # Same balls and physics settings as the parent's table
+        self.table = PoolTable.build(settings, ball_set)
+        self.all_balls = tuple(self.table.balls[name] for name in names)
+        self.base_generation = None
+        self.base = None
+
+    def reset(self):
+        """
+        Put the warm table back into the published base state.
+        """
+
+        if self.base_generation != self.generation[0]:
+            state = self.state.copy()
+            self.base = TableSnapshot(tuple(self.names), self.all_balls, state[:, X:VY + 1], state[:, PRESENT] != 0)
+            self.base_generation = self.generation[0]
+
+        self.table.restore(self.base)
+
+    def run(self, job: Tuple[int, float, float]):
+        index, angle, force = job
+        start = time.perf_counter()
+
+        self.reset()
+        table = self.table
+        miss = MissCheck(table)
+
+        def stop(played: PoolTable) -> bool:
+            return (self.stop_on_scratch and is_scratched(played)) or (self.stop_on_miss and miss(played))
+
+        stop_on = self.stop_on_scratch or self.stop_on_miss
+        steps = simulate_shot(table, Shot(angle, force), self.max_steps, stop=stop if stop_on else None)
+        scratched = is_scratched(table)
+        stopped = steps < self.max_steps and not table.is_at_rest()
+
+        leave = None
+        if self.get_leave and not scratched:
+            pocketability = table.get_pocketability()
+            shots = pocketability.get_shots() if pocketability is not None else []
+            if shots:
+                leave = shots[0][3]
+
+        state = get_table_state(table, self.names)
+        return (index, state[:, [X, Y]], state[:, PRESENT].astype(bool), steps, time.perf_counter() - start,
+                scratched, leave, not miss.is_contacted(table), stopped)
+
+
+def _init_worker(*args):
+    global _worker
+    _worker = _Worker(*args)
+
+
+def _run_job(job):
+    return _worker.run(job)
+
+
+"""
+Parent side.
+"""
+
+
+class ShotExecutor:
+    """
+    Simulates shots from a fixed table position across all cores.
+
+    Jobs are handed out one at a time from a shared queue, so a worker that finishes a short shot immediately
+    takes the next job instead of waiting behind a long break.
+    """
+
+    def __init__(self, table: PoolTable, processes: Optional[int] = None, max_steps: int = 10000,
+                 stop_on_scratch: bool = False, stop_on_miss: bool = False, get_leave: bool = False):
+        """
+        :param table: table whose current state every shot starts from
+        :param processes: number of worker processes (default: number of cores)
+        :param max_steps: step budget per shot
+        :param stop_on_scratch: stop simulating a shot as soon as the cue ball is pocketed
+        :param stop_on_miss: stop simulating a shot as soon as it has missed (see MissCheck)
+        :param get_leave: report the thinnest cut left by each shot (ShotResult.leave)
+        """
+
+        self.names = list(table.balls)
+
+        # Publish the base state once; workers attach to it by name
+        size = (1 + len(self.names) * STATE_COLUMNS) * np.dtype(np.float64).itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        buffer = np.ndarray((1 + len(self.names) * STATE_COLUMNS,), dtype=np.float64, buffer=self.shm.buf)
+        self.generation = buffer[:1]
+        self.state = buffer[1:].reshape(len(self.names), STATE_COLUMNS)
+
+        self.generation[0] = 0
+        self.state[:] = get_table_state(table, self.names)
+
+        self.pool = multiprocessing.Pool(processes, initializer=_init_worker,
+                                         initargs=(self.shm.name, self.names, table.get_settings(),
+                                                   table.get_ball_set(self.names), max_steps, stop_on_scratch,
+                                                   stop_on_miss, get_leave))
+
+    def update(self, table: PoolTable):
+        """
+        Publish a new base state. Must not be called while shots are running.
+
+        :param table: table with the same balls as the original one
+        """
+
+        self.state[:] = get_table_state(table, self.names)
+        self.generation[0] += 1
+
+    def imap(self, shots: Iterable[Tuple[float, float]]) -> Iterable[Tuple[int, ShotResult]]:
+        """
+        Simulate shots, yielding (job index, result) as each finishes.
+
+        :param shots: (cue_angle, force) tuples
+        """
+
+        shots = [Shot(angle, force) for angle, force in shots]
+        jobs = [(index, shot.angle, shot.force) for index, shot in enumerate(shots)]
+
+        for index, *result in self.pool.imap_unordered(_run_job, jobs, chunksize=1):
+            yield index, ShotResult(shots[index], self.names, *result)
+
+    def map(self, shots: Iterable[Tuple[float, float]]) -> List[ShotResult]:
+        """
+        Simulate shots and return their results in job order.
+
+        :param shots: (cue_angle, force) tuples
+        """
+
+        shots = list(shots)
+        results = [None] * len(shots)
+        for index, result in self.imap(shots):
+            results[index] = result
+
+        return results
+
+    def close(self):
+        """
+        Stop the workers and release the shared memory.
+        """
+
+        self.pool.close()
+        self.pool.join()
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
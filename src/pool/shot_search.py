@@ -0,0 +1,138 @@
+"""
+Best-shot search: which shot from the current table position pockets balls and leaves the cue ball safe?
+
+A coarse grid of cue angles (plus the angle of every makeable cut) and forces is simulated across all cores with
+ShotExecutor, then the best candidates are refined on finer grids around them. Every angle is played, kicks and
+banks included, but rollouts are pruned as soon as they become uninteresting: when the cue ball is pocketed, or
+when it has come off MISS_CUSHIONS cushions without touching an object ball.
+"""
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pool.pool_table import PoolTable
+from pool.shot_executor import ShotExecutor, ShotResult
+
+# Score of an outcome
+POCKET_SCORE = 1.0  # per object ball pocketed
+SCRATCH_SCORE = -2.0  # cue ball pocketed
+MISS_SCORE = -2.0  # no object ball touched, a foul like a scratch
+LEAVE_SCORE = 0.5  # a straight (0 degree cut) shot left for next time; thinner cuts score less
+
+DEFAULT_FORCES = (25.0, 75.0, 150.0, 300.0, 500.0)
+
+
+class ScoredShot:
+    """
+    A simulated shot and how good its outcome was.
+    """
+
+    def __init__(self, result: ShotResult, score: float):
+        """
+        :param result: outcome of the shot
+        :param score: from score_result()
+        """
+        self.result = result
+        self.score = score
+        self.shot = result.shot
+
+    def __str__(self):
+        return "{} scores {:.3f}".format(self.shot, self.score)
+
+
+def score_result(result: ShotResult) -> float:
+    """
+    POCKET_SCORE per object ball pocketed, plus SCRATCH_SCORE for a scratch or MISS_SCORE for a miss, or otherwise
+    up to LEAVE_SCORE for the easiest shot left.
+    """
+
+    score = POCKET_SCORE * len(result.get_pocketed())
+    if result.scratched:
+        score += SCRATCH_SCORE
+    elif result.missed:
+        score += MISS_SCORE
+    elif result.leave is not None:
+        score += LEAVE_SCORE * (1 - result.leave / 90)
+
+    return score
+
+
+def search_shots(table: PoolTable,
+                 angles: int = 72,
+                 forces: Sequence[float] = DEFAULT_FORCES,
+                 refine_rounds: int = 2,
+                 refine_top: int = 4,
+                 processes: Optional[int] = None,
+                 max_steps: int = 10000,
+                 executor: Optional[ShotExecutor] = None) -> Tuple[List[ScoredShot], dict]:
+    """
+    Search cue angles and forces for the best shot from the table's current state.
+
+    :param table: table to play from; not modified
+    :param angles: number of evenly spaced cue angles in the coarse grid
+    :param forces: forces of the coarse grid
+    :param refine_rounds: rounds of refinement around the best candidates, each on a grid twice as fine
+    :param refine_top: candidates refined each round
+    :param processes: worker processes (default: number of cores)
+    :param max_steps: step budget per rollout
+    :param executor: reuse these workers instead of starting new ones; must be on this table's position, created
+                     with stop_on_scratch=True, stop_on_miss=True and get_leave=True
+    :return: every simulated shot, best first, and timing statistics
+    """
+
+    if executor is None:
+        with ShotExecutor(table, processes=processes, max_steps=max_steps, stop_on_scratch=True,
+                          stop_on_miss=True, get_leave=True) as executor:
+            return search_shots(table, angles, forces, refine_rounds, refine_top, executor=executor)
+
+    start = time.perf_counter()
+    scored = {}
+    stats = {'rollouts': 0, 'pruned_rollouts': 0, 'scratches': 0, 'misses': 0, 'steps': 0, 'rounds': []}
+
+    def run(candidates):
+        round_start = time.perf_counter()
+        jobs = [candidate for candidate in dict.fromkeys(candidates) if candidate not in scored]
+
+        for _, result in executor.imap(jobs):
+            scored[(result.shot.angle, result.shot.force)] = ScoredShot(result, score_result(result))
+            stats['steps'] += result.steps
+            stats['pruned_rollouts'] += result.stopped
+            stats['scratches'] += result.scratched
+            stats['misses'] += result.missed
+
+        stats['rollouts'] += len(jobs)
+        stats['rounds'].append({'rollouts': len(jobs), 'seconds': time.perf_counter() - round_start})
+
+    # Coarse grid, including the exact angle of every makeable cut
+    step = 360 / angles
+    grid = [k * step for k in range(angles)]
+    pocketability = table.get_pocketability()
+    if pocketability is not None:
+        grid += [shot[2] % 360 for shot in pocketability.get_shots()]
+    run([(angle, float(force)) for angle in grid for force in forces])
+
+    # Refine around the best candidates
+    max_force = max(forces)
+    # Ratio between neighbouring forces of the coarse grid, treated as evenly spaced on a log scale
+    force_ratio = (max_force / min(forces)) ** (1 / (len(forces) - 1)) if len(forces) > 1 else 1.0
+    for refinement in range(1, refine_rounds + 1):
+        delta = step / 2 ** refinement
+        ratio = force_ratio ** (1 / 2 ** refinement)
+
+        best = sorted(scored.values(), key=lambda s: (-s.score, s.shot.force))[:refine_top]
+        run([((s.shot.angle + da) % 360, min(s.shot.force * df, max_force))
+             for s in best for da in (-delta, 0.0, delta) for df in (1 / ratio, 1.0, ratio)])
+
+    ranked = sorted(scored.values(), key=lambda s: (-s.score, s.shot.force))
+
+    seconds = time.perf_counter() - start
+    worker_seconds = np.array([s.result.seconds for s in ranked])
+    stats['seconds'] = seconds
+    stats['rollouts_per_second'] = stats['rollouts'] / seconds if seconds > 0 else None
+    if len(worker_seconds):
+        stats['rollout_seconds'] = {'p50': float(np.percentile(worker_seconds, 50)),
+                                    'p90': float(np.percentile(worker_seconds, 90)),
+                                    'max': float(worker_seconds.max())}
+
+    return ranked, stats
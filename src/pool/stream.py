@@ -0,0 +1,103 @@
+"""
+Streaming simulation: simulate() steps a table lazily, one Frame per time step, and the other generators here are
+stages that consumers chain onto it, e.g.
+
+    for frame in until_pocketed(record(simulate(table, shot), recorder)):
+        ...
+
+Physics only runs while some consumer pulls frames, so stopping early (breaking out of the loop, or a stage
+returning) stops the simulation too.
+"""
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+
+from pool.frame import Frame
+from pool.pool_table import PoolTable
+from pool.shot import Shot
+from pool.trajectory_recorder import TrajectoryRecorder
+
+
+def simulate(table: PoolTable, shot: Shot = None, max_steps: int = 10000,
+             keep_state: bool = False) -> Iterator[Frame]:
+    """
+    Play a shot and yield a Frame for every time step until every ball has stopped or the step budget runs out.
+    Aim lines are not updated while stepping.
+
+    Frames carry the collisions of their step with the scalar and event-driven engines; the array engine resolves
+    collisions in bulk and reports none.
+
+    :param table: table to play on, modified in place as frames are pulled
+    :param shot: shot to play, or None to carry on from the table's current state
+    :param max_steps: step budget
+    :param keep_state: copy each frame's ball state out of the table when the next frame is pulled, so frames can
+                       be kept and read later; otherwise nothing is copied, and a frame must be read while current
+    """
+
+    if shot is not None:
+        shot.apply(table)
+
+    # Collect collisions only while this simulation runs, and don't disturb a caller that already does
+    previous = table.collision_events
+
+    frame = None
+    try:
+        for _ in range(max_steps):
+            if table.is_at_rest():
+                break
+
+            # The previous frame keeps its own step's state, if asked to
+            if frame is not None:
+                frame.release(keep_state)
+
+            n_pocketed = len(table.pocket_events)
+            collisions = table.collision_events = []
+            table.time_step(aim=False)
+            if previous is not None:
+                previous.extend(collisions)
+
+            frame = Frame(table, table.steps, table.pocket_events[n_pocketed:], collisions)
+
+            yield frame
+    finally:
+        if frame is not None:
+            frame.release(keep_state)
+        table.collision_events = previous
+
+
+def record(frames: Iterable[Frame], recorder: TrajectoryRecorder) -> Iterator[Frame]:
+    """
+    Pass frames through, recording each one.
+    """
+
+    for frame in frames:
+        recorder.record(frame.table)
+        yield frame
+
+
+def until(frames: Iterable[Frame], predicate: Callable[[Frame], bool]) -> Iterator[Frame]:
+    """
+    Pass frames through up to and including the first one the predicate holds for.
+    """
+
+    for frame in frames:
+        yield frame
+        if predicate(frame):
+            return
+
+
+def until_pocketed(frames: Iterable[Frame]) -> Iterator[Frame]:
+    """
+    Pass frames through up to and including the first one in which a ball is pocketed.
+    """
+
+    return until(frames, lambda frame: len(frame.pocket_events) > 0)
+
+
+def get_positions(frames: Iterable[Frame]) -> Iterator[np.ndarray]:
+    """
+    Positions of the balls on the table in each frame, (balls, 2).
+    """
+
+    for frame in frames:
+        yield frame.positions
@@ -0,0 +1,92 @@
+import numpy as np
+
+
+class TableSnapshot:
+    """
+    The mutable state of a PoolTable, from PoolTable.snapshot(), to put back with PoolTable.restore().
+
+    A snapshot taken against a base snapshot only stores the rows of ball state that differ from the base, and
+    shares the base's names and (if unchanged) present arrays, so thousands of branches of one position cost
+    little more than their differences. Arrays are read-only, so the base can never change under its branches.
+    """
+
+    __slots__ = ('names', 'balls', 'slots', 'base', 'rows', 'values', 'present', 'cue_angle', 'steps',
+                 'pocket_count')
+
+    def __init__(self, names: tuple, balls: tuple, state: np.ndarray, present: np.ndarray, cue_angle: float = 0.0,
+                 steps: int = 0, pocket_count: int = 0, slots: dict = None, base: 'TableSnapshot' = None,
+                 rows: np.ndarray = None):
+        """
+        :param names: ball keys, one per row
+        :param balls: PoolBall of each key, so pocketed balls can be put back
+        :param state: (balls, 4) x, y, vx, vy; with a base, only the rows listed in rows
+        :param present: (balls,) whether each ball is on the table
+        :param cue_angle: cue stick angle, degrees
+        :param steps: time steps the table had taken
+        :param pocket_count: length of the table's pocket_events
+        :param slots: key -> row, if already built (shared between snapshots with the same names)
+        :param base: full snapshot (taken without a base) holding every row not in rows
+        :param rows: (changed,) rows of the base's state that state replaces
+        """
+        self.names = names
+        self.balls = balls
+        self.slots = slots if slots is not None else {name: k for k, name in enumerate(names)}
+
+        self.base = base
+        self.rows = rows
+        if rows is not None:
+            rows.flags.writeable = False
+        state.flags.writeable = False
+        present.flags.writeable = False
+        self.values = state
+        self.present = present
+
+        self.cue_angle = cue_angle
+        self.steps = steps
+        self.pocket_count = pocket_count
+
+    @property
+    def state(self) -> np.ndarray:
+        """
+        (balls, 4) x, y, vx, vy of every ball (NaN for balls not on the table), read-only.
+        """
+
+        if self.base is None:
+            return self.values
+
+        state = self.base.values.copy()
+        state[self.rows] = self.values
+        state.flags.writeable = False
+        return state
+
+    def get_nbytes(self) -> int:
+        """
+        :return: bytes of the arrays this snapshot holds that are not shared with its base
+        """
+
+        if self.base is None:
+            return self.values.nbytes + self.present.nbytes
+
+        nbytes = self.values.nbytes + self.rows.nbytes
+        if self.present is not self.base.present:
+            nbytes += self.present.nbytes
+        return nbytes
+
+    def get_shared(self, other: 'TableSnapshot') -> list:
+        """
+        :return: names of the arrays this snapshot shares with another; the state counts as shared when this
+                 snapshot stores no rows of its own on top of the other
+        """
+
+        shared = []
+        if self.names is other.names:
+            shared.append('names')
+        if self.values is other.values or (self.base is other and not len(self.rows)):
+            shared.append('state')
+        if self.present is other.present:
+            shared.append('present')
+
+        return shared
+
+    def __str__(self):
+        return "Snapshot of {} balls at step {}".format(int(self.present.sum()), self.steps)
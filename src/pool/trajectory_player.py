@@ -0,0 +1,116 @@
+"""
+Random access to a recording written by TrajectoryRecorder, without re-simulating.
+"""
+import json
+
+import numpy as np
+
+from pool.trajectory_recorder import MAGIC, COUNT_OFFSET, HEADER_SIZE_OFFSET, HEADER_OFFSET, get_frame_dtype, \
+    get_keyframe_dtype
+
+
+class TrajectoryPlayer:
+    """
+    Read-only view of a recording. Frames are memory-mapped, so opening a recording reads only its header, and
+    seeking to any step reads just that frame. A recording still being written can be read; refresh() picks up
+    the frames written since it was opened.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: recording written by TrajectoryRecorder
+        """
+        self.path = path
+
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError('{} is not a trajectory recording'.format(path))
+            f.seek(HEADER_SIZE_OFFSET)
+            header_size = int(np.frombuffer(f.read(8), dtype='<i8')[0])
+            f.seek(HEADER_OFFSET)
+            header = json.loads(f.read(header_size - HEADER_OFFSET).decode())
+
+        self.names = header['names']
+        self.keyframe_interval = header['keyframe_interval']
+        self.first_step = header['first_step']
+        capacity = header['capacity']
+
+        n_balls = len(self.names)
+        frame_dtype = get_frame_dtype(n_balls)
+        keyframe_dtype = get_keyframe_dtype(n_balls)
+
+        self.count_field = np.memmap(path, dtype='<i8', mode='r', offset=COUNT_OFFSET, shape=(1,))
+        self.frames = np.memmap(path, dtype=frame_dtype, mode='r', offset=header_size, shape=(capacity,))
+        self.keyframes = np.memmap(path, dtype=keyframe_dtype, mode='r',
+                                   offset=header_size + capacity * frame_dtype.itemsize,
+                                   shape=(capacity // self.keyframe_interval + 1,))
+
+        self.count = 0
+        self.refresh()
+
+    def refresh(self) -> int:
+        """
+        Pick up frames recorded since the player was opened (up to the capacity the file had then).
+
+        :return: number of frames
+        """
+
+        self.count = min(int(self.count_field[0]), len(self.frames))
+        return self.count
+
+    def __len__(self):
+        return self.count
+
+    def get_steps(self) -> range:
+        """
+        :return: steps that can be sought to
+        """
+
+        if self.first_step is None:
+            return range(0)
+        return range(self.first_step, self.first_step + self.count)
+
+    def get_index(self, step: int) -> int:
+        i = step - (self.first_step or 0)
+        if not 0 <= i < self.count:
+            raise IndexError('step {} was not recorded'.format(step))
+        return i
+
+    def get_frame(self, step: int) -> np.void:
+        """
+        :return: frame record of a step (fields step, present, pos, vel; float32 state)
+        """
+
+        frame = self.frames[self.get_index(step)]
+        if frame['step'] != step:
+            raise ValueError('frame of step {} holds step {}'.format(step, frame['step']))
+        return frame
+
+    def get_keyframe(self, step: int) -> np.void:
+        """
+        :return: latest keyframe at or before a step (fields step, frame, cue_angle, present, pos, vel; exact
+                 float64 state)
+        """
+
+        return self.keyframes[self.get_index(step) // self.keyframe_interval]
+
+    def get_positions(self, start: int = None, stop: int = None) -> np.ndarray:
+        """
+        :return: (steps, balls, 2) positions of the steps start (inclusive) to stop (exclusive), default all
+        """
+
+        steps = self.get_steps()
+        start = steps.start if start is None else start
+        stop = steps.stop if stop is None else stop
+        if stop <= start:
+            return self.frames['pos'][:0]
+        return self.frames['pos'][self.get_index(start):self.get_index(stop - 1) + 1]
+
+    def get_ball_positions(self, step: int) -> dict:
+        """
+        :return: ball name -> (x, y) of the balls on the table at a step
+        """
+
+        frame = self.get_frame(step)
+        return {name: (float(x), float(y))
+                for name, present, (x, y) in zip(self.names, frame['present'], frame['pos']) if present}
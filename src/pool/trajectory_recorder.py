@@ -0,0 +1,220 @@
+"""
+Recording of every time step's ball positions and velocities to a memory-mapped file, for replay and analysis
+with TrajectoryPlayer.
+
+File layout (all little-endian):
+
+    magic         8 bytes, MAGIC
+    frame count   int64, frames written so far (updated on every frame, so a live recording can be read)
+    header size   int64, bytes from the start of the file to the first frame
+    header        JSON: ball names, keyframe interval, capacity, first step, dtypes; padded to a multiple of PAGE
+    frames        capacity records of get_frame_dtype(): step, which balls are present, float32 positions and
+                  velocities
+    keyframes     capacity // keyframe_interval + 1 records of get_keyframe_dtype(): the exact (float64) state
+                  and cue angle of every keyframe_interval-th frame
+
+Frame i holds step first_step + i and keyframe k holds frame k * keyframe_interval, so seeking to a step is
+arithmetic. The file is preallocated and doubles in size when full.
+"""
+import json
+import logging
+import os
+
+import numpy as np
+
+from pool.log import get_logger, log_event, PHYSICS
+
+MAGIC = b'POOLTRJ1'
+PAGE = 4096
+
+# Offsets of the fixed fields before the JSON header
+COUNT_OFFSET = 8
+HEADER_SIZE_OFFSET = 16
+HEADER_OFFSET = 24
+HEADER_SLACK = 64
+
+# State recorded for a ball not on the table
+ABSENT = (np.nan,) * 4
+
+LOG = get_logger(PHYSICS)
+
+
+def get_frame_dtype(n_balls: int) -> np.dtype:
+    return np.dtype([('step', '<i8'),
+                     ('present', '?', (n_balls,)),
+                     ('pos', '<f4', (n_balls, 2)),
+                     ('vel', '<f4', (n_balls, 2))])
+
+
+def get_keyframe_dtype(n_balls: int) -> np.dtype:
+    return np.dtype([('step', '<i8'),
+                     ('frame', '<i8'),
+                     ('cue_angle', '<f8'),
+                     ('present', '?', (n_balls,)),
+                     ('pos', '<f8', (n_balls, 2)),
+                     ('vel', '<f8', (n_balls, 2))])
+
+
+def get_name(name) -> str:
+    return getattr(name, 'name', str(name))
+
+
+class TrajectoryRecorder:
+    """
+    Appends one frame per time step of a PoolTable. Set as table.recorder to record every time_step(), or call
+    record() directly.
+    """
+
+    def __init__(self, path: str, names: list, capacity: int = 4096, keyframe_interval: int = 60):
+        """
+        :param path: file to write, replaced if it exists
+        :param names: keys of the balls to record (table.balls keys), in the order they are stored
+        :param capacity: frames to preallocate
+        :param keyframe_interval: frames between keyframes
+        """
+        self.path = path
+        self.names = list(names)
+        self.slots = {name: k for k, name in enumerate(self.names)}
+        self.keyframe_interval = keyframe_interval
+
+        self.frame_dtype = get_frame_dtype(len(self.names))
+        self.keyframe_dtype = get_keyframe_dtype(len(self.names))
+
+        self.count = 0
+        self.first_step = None
+
+        # Scratch state of the frame being recorded, reused so recording allocates nothing per ball
+        self.present = np.zeros(len(self.names), dtype=bool)
+        self.state = np.zeros((len(self.names), 4))
+        self.flat_state = self.state.reshape(-1)
+
+        self.capacity = capacity
+        self.header_size = 0
+        self.count_field = self.frames = self.keyframes = None
+        self.steps = self.presents = self.positions = self.velocities = self.count_view = None
+        self.allocate(capacity)
+
+    def get_header(self) -> dict:
+        return {
+            'names': [get_name(name) for name in self.names],
+            'keyframe_interval': self.keyframe_interval,
+            'capacity': self.capacity,
+            'first_step': self.first_step,
+            'frame_dtype': self.frame_dtype.descr,
+            'keyframe_dtype': self.keyframe_dtype.descr,
+        }
+
+    def allocate(self, capacity: int):
+        """
+        Create the file with room for capacity frames, copying over the frames recorded so far.
+        """
+
+        self.capacity = capacity
+        # Room for the header to grow as first_step and capacity are filled in
+        header_size = -(-(HEADER_OFFSET + len(json.dumps(self.get_header())) + HEADER_SLACK) // PAGE) * PAGE
+        n_keyframes = capacity // self.keyframe_interval + 1
+        keyframes_offset = header_size + capacity * self.frame_dtype.itemsize
+        size = keyframes_offset + n_keyframes * self.keyframe_dtype.itemsize
+
+        path = self.path if self.frames is None else self.path + '.tmp'
+        with open(path, 'wb') as f:
+            f.truncate(size)
+            f.write(MAGIC)
+            f.write(np.array([self.count, header_size], dtype='<i8').tobytes())
+
+        count = np.memmap(path, dtype='<i8', mode='r+', offset=COUNT_OFFSET, shape=(1,))
+        frames = np.memmap(path, dtype=self.frame_dtype, mode='r+', offset=header_size, shape=(capacity,))
+        keyframes = np.memmap(path, dtype=self.keyframe_dtype, mode='r+', offset=keyframes_offset,
+                              shape=(n_keyframes,))
+
+        if self.frames is not None:
+            frames[:self.count] = self.frames[:self.count]
+            n_keyframes = -(-self.count // self.keyframe_interval)
+            keyframes[:n_keyframes] = self.keyframes[:n_keyframes]
+            frames.flush()
+            keyframes.flush()
+            self.close()
+            os.replace(path, self.path)
+
+        self.header_size = header_size
+        self.count_field, self.frames, self.keyframes = count, frames, keyframes
+        self.count_view = count.view(np.ndarray)
+        # Plain ndarray views of each field: much cheaper to assign to than memmaps or whole structured records
+        fields = frames.view(np.ndarray)
+        self.steps, self.presents = fields['step'], fields['present']
+        self.positions, self.velocities = fields['pos'], fields['vel']
+        self.write_header()
+
+        log_event(LOG, logging.DEBUG, 'recording', path=self.path, capacity=capacity, bytes=size)
+
+    def write_header(self):
+        header = json.dumps(self.get_header()).encode()
+        with open(self.path, 'r+b') as f:
+            f.seek(HEADER_OFFSET)
+            # Padded with spaces, which JSON ignores, over any longer header written before
+            f.write(header.ljust(self.header_size - HEADER_OFFSET))
+
+    def record(self, table):
+        """
+        Append the table's current state as the frame of its current step.
+
+        :raises ValueError: if the step does not directly follow the last one recorded (e.g. the table was rewound
+                            with restore()), since frames are found by step arithmetic; start a new recording
+        """
+
+        if self.first_step is not None and table.steps != self.first_step + self.count:
+            raise ValueError('step {} does not follow step {} of the recording'.format(
+                table.steps, self.first_step + self.count - 1))
+
+        if self.count == self.capacity:
+            self.allocate(2 * self.capacity)
+
+        # Gather into a flat list, then copy into the arrays in one go; absent balls are NaN
+        balls = table.balls
+        values = []
+        for name in self.names:
+            ball = balls.get(name)
+            if ball is None:
+                values += ABSENT
+            else:
+                pos = ball.pos
+                vel = ball.vel
+                values += (pos.x, pos.y, vel.x, vel.y)
+
+        state = self.state
+        self.flat_state[:] = values
+        present = self.present
+        np.isnan(state[:, 0], out=present)
+        np.logical_not(present, out=present)
+
+        if self.first_step is None:
+            self.first_step = table.steps
+            self.write_header()
+
+        i = self.count
+        self.steps[i] = table.steps
+        self.presents[i] = present
+        self.positions[i] = state[:, :2]
+        self.velocities[i] = state[:, 2:]
+        if i % self.keyframe_interval == 0:
+            self.keyframes[i // self.keyframe_interval] = (table.steps, i, table.cue_angle, present, state[:, :2],
+                                                           state[:, 2:])
+
+        self.count = i + 1
+        self.count_view[0] = self.count
+
+    def flush(self):
+        self.frames.flush()
+        self.keyframes.flush()
+        self.count_field.flush()
+
+    def close(self):
+        """
+        Flush the recording to disk and release the file. The recorder cannot be used afterwards.
+        """
+
+        if self.frames is not None:
+            self.flush()
+            # np.memmap closes its mapping once no array refers to it
+            self.count_field = self.frames = self.keyframes = None
+            self.steps = self.presents = self.positions = self.velocities = self.count_view = None
@@ -0,0 +1,106 @@
+import sys
+import unittest
+
+sys.path.append('../../src')
+
+from physics.array_engine import ArrayEngine
+from physics.collisions import check_ball_ball_collision, resolve_ball_ball_collision, check_ball_wall_collision, \
+    resolve_ball_wall_collision
+from physics.coordinates import Coordinates
+from physics.vector import Vector
+from pool.ball_type import BallType
+from pool.pool_ball import PoolBall
+
+FLOAT_PLACES = 7  # Rounding error for floating point equality
+
+TOP, LEFT, BOTTOM, RIGHT = 100.0, 0.0, 0.0, 200.0
+
+
+def make_balls():
+    return [
+        PoolBall(BallType.CUE, Coordinates(20.0, 50.0), 10.0, 5.0, vel=Vector(4.0, 0.3)),
+        PoolBall(BallType.ONE, Coordinates(60.0, 52.0), 10.0, 5.0),
+        PoolBall(BallType.TWO, Coordinates(150.0, 90.0), 10.0, 5.0, vel=Vector(2.0, 3.0)),
+    ]
+
+
+def scalar_step(balls):
+    """
+    Reference step, as done by PoolTable.scalar_time_step().
+    """
+    for ball in balls:
+        ball.time_step()
+
+    for i in range(len(balls)):
+        wall = check_ball_wall_collision(balls[i], TOP, LEFT, BOTTOM, RIGHT)
+        if wall is not None:
+            resolve_ball_wall_collision(balls[i], wall)
+
+        for j in range(i + 1, len(balls)):
+            if check_ball_ball_collision(balls[i], balls[j]):
+                resolve_ball_ball_collision(balls[i], balls[j])
+
+
+class ArrayEngineTest(unittest.TestCase):
+
+    def assertBallsAlmostEqual(self, result, expected):
+        for r, e in zip(result, expected):
+            self.assertAlmostEqual(r.pos.x, e.pos.x, places=FLOAT_PLACES)
+            self.assertAlmostEqual(r.pos.y, e.pos.y, places=FLOAT_PLACES)
+            self.assertAlmostEqual(r.vel.x, e.vel.x, places=FLOAT_PLACES)
+            self.assertAlmostEqual(r.vel.y, e.vel.y, places=FLOAT_PLACES)
+
+    def test_views(self):
+        balls = make_balls()
+        engine = ArrayEngine(balls)
+
+        # Reads come from the arrays
+        self.assertEqual(balls[0].pos, Coordinates(20.0, 50.0))
+        self.assertEqual(balls[2].vel, Vector(2.0, 3.0))
+
+        # Writes go to the arrays, including whole-object assignment
+        balls[1].pos.x = 70.0
+        balls[1].vel = Vector(-1.0, 0.5)
+        self.assertEqual(engine.pos[1, 0], 70.0)
+        self.assertEqual(engine.vel[1, 0], -1.0)
+        self.assertEqual(engine.vel[1, 1], 0.5)
+
+        balls[0].apply_force(Vector(10.0, 0.0))
+        self.assertEqual(engine.vel[0, 0], 5.0)
+
+    def test_matches_scalar_path(self):
+        expected = make_balls()
+        result = make_balls()
+        engine = ArrayEngine(result)
+
+        for _ in range(300):
+            scalar_step(expected)
+            engine.time_step(TOP, LEFT, BOTTOM, RIGHT)
+
+            self.assertBallsAlmostEqual(result, expected)
+
+    def test_dead_stop(self):
+        balls = [PoolBall(BallType.CUE, Coordinates(50.0, 50.0), 10.0, 5.0, vel=Vector(0.05, -0.2))]
+        engine = ArrayEngine(balls)
+
+        engine.time_step(TOP, LEFT, BOTTOM, RIGHT)
+
+        self.assertEqual(balls[0].vel.x, 0.0)
+        self.assertAlmostEqual(balls[0].vel.y, -0.2 * 0.99, places=FLOAT_PLACES)
+        self.assertAlmostEqual(balls[0].pos.y, 49.8, places=FLOAT_PLACES)
+
+    def test_deactivate(self):
+        balls = make_balls()
+        engine = ArrayEngine(balls)
+        engine.deactivate(balls[1])
+
+        # Cue ball passes straight through the removed ball
+        for _ in range(20):
+            engine.time_step(TOP, LEFT, BOTTOM, RIGHT)
+
+        self.assertGreater(balls[0].pos.x, 60.0)
+        self.assertEqual(balls[1].pos, Coordinates(60.0, 52.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
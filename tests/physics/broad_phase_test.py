@@ -0,0 +1,75 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append('../../src')
+
+from physics.broad_phase import get_all_pairs, get_grid_pairs, get_colliding_pairs, CircleQuery
+
+
+class BroadPhaseTest(unittest.TestCase):
+
+    def assertSamePairs(self, result, expected):
+        self.assertEqual(list(zip(*[a.tolist() for a in result])), list(zip(*[a.tolist() for a in expected])))
+
+    def test_grid_pairs_cover_close_points(self):
+        rng = np.random.RandomState(0)
+        pos = rng.uniform(0, 100, size=(300, 2))
+        cell_size = 5.0
+
+        pairs = set(zip(*[a.tolist() for a in get_grid_pairs(pos, cell_size)]))
+
+        # Every pair closer than a cell must be a candidate
+        for i, j in zip(*get_all_pairs(len(pos))):
+            if np.hypot(*(pos[i] - pos[j])) < cell_size:
+                self.assertIn((i, j), pairs)
+
+        # No duplicates, always i < j
+        pair_list = list(zip(*[a.tolist() for a in get_grid_pairs(pos, cell_size)]))
+        self.assertEqual(len(pair_list), len(pairs))
+        self.assertTrue(all(i < j for i, j in pair_list))
+
+    def test_grid_matches_brute_force(self):
+        rng = np.random.RandomState(1)
+
+        for n, size in ((2, 20), (10, 100), (500, 400), (2000, 2000)):
+            pos = rng.uniform(0, size, size=(n, 2))
+            radius = rng.uniform(2, 10, size=n)
+
+            self.assertSamePairs(get_colliding_pairs(pos, radius, use_grid=True),
+                                 get_colliding_pairs(pos, radius, use_grid=False))
+
+    def test_touching(self):
+        # Exactly touching balls on a cell boundary
+        pos = np.array([[0.0, 0.0], [20.0, 0.0], [40.0, 0.0], [0.0, 20.0]])
+        radius = np.full(4, 10.0)
+
+        self.assertSamePairs(get_colliding_pairs(pos, radius, use_grid=True), (np.array([0, 0, 1]),
+                                                                               np.array([1, 3, 2])))
+
+    def test_circle_query_matches_pairs(self):
+        rng = np.random.RandomState(2)
+        pos = rng.uniform(0, 400, size=(500, 2))
+        radius = rng.uniform(2, 10, size=500)
+        query = CircleQuery(pos, radius)
+
+        # Grow a few circles, as a ball speeding up after a collision does
+        for k in (3, 70, 250):
+            query.set_radius(k, 40.0)
+
+        i, j = get_colliding_pairs(pos, radius, use_grid=False)
+        for k in range(len(pos)):
+            expected = sorted(j[i == k].tolist() + i[j == k].tolist())
+            self.assertEqual(sorted(query.get_touching(k).tolist()), expected)
+
+    def test_empty(self):
+        pos = np.array([[0.0, 0.0]])
+        i, j = get_grid_pairs(pos, 1.0)
+
+        self.assertEqual(len(i), 0)
+        self.assertEqual(len(j), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
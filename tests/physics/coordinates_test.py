@@ -4,6 +4,7 @@ import sys
 sys.path.append('../../src')
 
 from physics.coordinates import Coordinates
+from physics.vector import Vector
 
 
 class CoordinatesTest(unittest.TestCase):
@@ -30,6 +31,25 @@ class CoordinatesTest(unittest.TestCase):
 
         self.assertNotEqual(c0, c1)
 
+    def test_in_place(self):
+        c = Coordinates(1, 2)
+        alias = c
+
+        c += Vector(1, 1)
+        self.assertIs(c, alias)
+        self.assertEqual(c, Coordinates(2, 3))
+
+        c -= Coordinates(1, 1)
+        self.assertEqual(c, Coordinates(1, 2))
+
+        c *= 2
+        self.assertIs(c, alias)
+        self.assertEqual(c, Coordinates(2, 4))
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            Coordinates(0, 0).z = 1
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,11 +1,14 @@
 import sys
 import unittest
 
+import numpy as np
+
 sys.path.append('../../src')
 
 from physics.coordinates import Coordinates
 from physics.utility import check_ray_circle_intersection, get_distance, check_ray_line_intersection, \
-    get_ray_circle_intersection, get_line_endpoint_within_box, get_angle, get_parallel_line
+    get_ray_circle_intersection, get_line_endpoint_within_box, get_angle, get_parallel_line, get_travel_within_box, \
+    sweep_circle, get_point_on_line_distance_from_point, get_points_on_lines_distance_from_points
 
 FLOAT_PLACES = 7  # Rounding error for floating point equality
 
@@ -260,5 +263,77 @@ class CoordinatesTest(unittest.TestCase):
 
 
 
+    def test_get_travel_within_box(self):
+        nw, se = Coordinates(0, 100), Coordinates(200, 0)
+        start = np.array([50.0, 50.0])
+        direction = np.array([[1.0, 0.0], [0.0, -1.0], [-1.0, 0.0], [np.sqrt(0.5), np.sqrt(0.5)]])
+
+        travel = get_travel_within_box(start, direction, nw, se, 10)
+        np.testing.assert_allclose(travel, [140, 40, 40, 40 * np.sqrt(2)])
+
+        # Agrees with the scalar line endpoint
+        end = get_line_endpoint_within_box(Coordinates(50, 50), 45, nw, se, 10)
+        self.assertAlmostEqual(travel[3], get_distance(end, Coordinates(50, 50)), places=FLOAT_PLACES)
+
+    def test_sweep_circle(self):
+        start = np.array([0.0, 0.0])
+        centers = np.array([[100.0, 0.0], [50.0, 15.0], [-50.0, 0.0]])
+        reach = np.array([20.0, 20.0, 20.0])
+
+        # Straight along x: the off-center ball at x=50 is reached first
+        index, travel, ghost = sweep_circle(start, np.array([1.0, 0.0]), 500.0, centers, reach)
+        self.assertEqual(index, 1)
+        self.assertAlmostEqual(float(travel), 50 - np.sqrt(20 ** 2 - 15 ** 2), places=FLOAT_PLACES)
+        self.assertAlmostEqual(float(np.hypot(*(ghost - centers[1]))), 20.0, places=FLOAT_PLACES)
+
+        # Many directions at once: up misses everything, left hits the ball behind, short travel stops early
+        direction = np.array([[0.0, 1.0], [-1.0, 0.0], [1.0, 0.0]])
+        index, travel, ghost = sweep_circle(start, direction, np.array([500.0, 500.0, 10.0]), centers, reach)
+        np.testing.assert_array_equal(index, [-1, 2, -1])
+        self.assertEqual(travel[0], np.inf)
+        self.assertAlmostEqual(travel[1], 30.0, places=FLOAT_PLACES)
+        np.testing.assert_allclose(ghost, [[0.0, 500.0], [-30.0, 0.0], [10.0, 0.0]])
+
+    def test_sweep_circle_no_circles(self):
+        index, travel, ghost = sweep_circle(np.zeros(2), np.array([[1.0, 0.0]]), np.array([5.0]),
+                                            np.empty((0, 2)), np.empty(0))
+        np.testing.assert_array_equal(index, [-1])
+        np.testing.assert_allclose(ghost, [[5.0, 0.0]])
+
+
+    def test_get_point_on_line_distance_from_point(self):
+        start, end = Coordinates(0, 0), Coordinates(100, 0)
+
+        # Nearer of the two points 5 away from (10, 3)
+        p = get_point_on_line_distance_from_point(start, end, Coordinates(10, 3), 5)
+        self.assertCoordinatesAlmostEqual(p, Coordinates(6, 0))
+
+        # Angled line
+        p = get_point_on_line_distance_from_point(start, Coordinates(1, 1), Coordinates(50, 40), 20)
+        self.assertAlmostEqual(get_distance(p, Coordinates(50, 40)), 20, places=FLOAT_PLACES)
+        self.assertAlmostEqual(p.x, p.y, places=FLOAT_PLACES)
+
+        # Line never comes close enough
+        self.assertIsNone(get_point_on_line_distance_from_point(start, end, Coordinates(10, 30), 5))
+
+    def test_get_points_on_lines_distance_from_points(self):
+        start = np.zeros(2)
+        direction = np.array([[1.0, 0.0], [np.sqrt(0.5), np.sqrt(0.5)], [1.0, 0.0]])
+        point = np.array([[10.0, 3.0], [50.0, 40.0], [10.0, 30.0]])
+        distance = np.array([5.0, 20.0, 5.0])
+
+        travel, points = get_points_on_lines_distance_from_points(start, direction, point, distance)
+
+        for k in range(2):
+            end = Coordinates(*(start + direction[k]))
+            expected = get_point_on_line_distance_from_point(Coordinates(0, 0), end, Coordinates(*point[k]),
+                                                             distance[k])
+            self.assertCoordinatesAlmostEqual(Coordinates(*points[k]), expected)
+            self.assertAlmostEqual(travel[k], get_distance(expected), places=FLOAT_PLACES)
+
+        self.assertTrue(np.isnan(travel[2]))
+        self.assertTrue(np.isnan(points[2]).all())
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -74,6 +74,25 @@ class VectorTest(unittest.TestCase):
         self.assertEqual(v3.get_angle(), 225)
         self.assertEqual(v4.get_angle(), 315)
 
+    def test_in_place(self):
+        v = Vector(1, 2)
+        alias = v
+
+        v += Vector(2, 2)
+        self.assertIs(v, alias)
+        self.assertEqual(v, Vector(3, 4))
+
+        v -= Vector(1, 1)
+        self.assertEqual(v, Vector(2, 3))
+
+        v *= 0.5
+        self.assertIs(v, alias)
+        self.assertEqual(v, Vector(1, 1.5))
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            Vector(0, 0).z = 1
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,106 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append('../../src')
+
+from physics.coordinates import Coordinates
+from physics.vector import Vector
+from pool.ball_type import BallType
+from pool.batched_pool_table import BatchedPoolTable
+from pool.engine_type import EngineType
+from pool.pool_table import PoolTable
+from pool.scenario import make_scenario
+
+NW, SE = Coordinates(100, 900), Coordinates(900, 500)
+FLOAT_PLACES = 7  # Rounding error for floating point equality
+
+
+class BatchedPoolTableTest(unittest.TestCase):
+
+    def test_matches_array_engine(self):
+        forces = np.array([[500.0, 30.0], [120.0, -40.0], [0.0, 0.0], [-60.0, 200.0]])
+
+        batch = BatchedPoolTable(PoolTable(NW, SE), len(forces))
+        batch.apply_forces(forces)
+
+        expected = []
+        for force in forces:
+            table = PoolTable(NW, SE, engine=EngineType.ARRAY)
+            table.cue_ball.apply_force(Vector(*force))
+            expected.append(table)
+
+        for _ in range(400):
+            batch.time_step()
+            for table in expected:
+                table.time_step()
+
+        for index, table in enumerate(expected):
+            result = batch.get_table(index)
+
+            self.assertEqual(list(result.balls), list(table.balls))
+            for ball_type, ball in table.balls.items():
+                self.assertAlmostEqual(result.balls[ball_type].pos.x, ball.pos.x, places=FLOAT_PLACES)
+                self.assertAlmostEqual(result.balls[ball_type].pos.y, ball.pos.y, places=FLOAT_PLACES)
+                self.assertAlmostEqual(result.balls[ball_type].vel.x, ball.vel.x, places=FLOAT_PLACES)
+                self.assertAlmostEqual(result.balls[ball_type].vel.y, ball.vel.y, places=FLOAT_PLACES)
+
+        # Each table was sub-stepped by its own speed
+        self.assertEqual(batch.substeps.tolist(), [table.substeps for table in expected])
+        self.assertEqual(batch.substeps[2], 400)
+        self.assertGreater(batch.substeps[0], 400)
+
+        # The table that was never struck has not moved
+        self.assertTrue(batch.is_at_rest()[2])
+
+    def test_pocketing(self):
+        table = PoolTable(NW, SE)
+        batch = BatchedPoolTable(table, 2)
+
+        # Send the one ball into the top-right corner on the second table only
+        one = batch.names.index(BallType.ONE)
+        batch.pos[1, one] = 850, 850
+        batch.vel[1, one] = 10, 10
+
+        for _ in range(20):
+            batch.time_step()
+
+        self.assertTrue(batch.present[0, one])
+        self.assertFalse(batch.present[1, one])
+        self.assertNotIn(BallType.ONE, batch.get_table(1).balls)
+        self.assertIn(BallType.ONE, batch.get_table(0).balls)
+
+        # Reported like PoolTable.pocket_balls() does
+        events = batch.get_table(1).pocket_events
+        self.assertEqual([(event.ball, event.pocket) for event in events], [(BallType.ONE, 2)])
+        self.assertEqual(batch.get_table(0).pocket_events, [])
+
+    def test_get_table_keeps_template(self):
+        template = make_scenario(30, engine=EngineType.ARRAY)
+        template.max_substeps = 4
+        for _ in range(3):
+            template.time_step(aim=False)
+        template.cue_angle = 45.0
+
+        batch = BatchedPoolTable(template, 2)
+        for _ in range(5):
+            batch.time_step()
+
+        table = batch.get_table(1)
+        self.assertEqual(table.get_settings(), template.get_settings())
+        self.assertEqual(table.get_ball_set(), template.get_ball_set(list(table.balls)))
+        self.assertEqual(len(table.balls) + len(table.pocket_events), 30)
+        self.assertEqual((table.steps, table.cue_angle), (8, 45.0))
+        self.assertIsNot(table.balls[1], template.balls[1])
+
+        k = batch.names.index(1)
+        self.assertEqual((table.balls[1].pos.x, table.balls[1].pos.y), tuple(batch.pos[1, k]))
+        self.assertEqual((table.balls[1].vel.x, table.balls[1].vel.y), tuple(batch.vel[1, k]))
+
+        # Carries on stepping like any other table
+        table.time_step()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append('../../src')
+
+from physics.coordinates import Coordinates
+from pool.ball_type import BallType
+from pool.break_analysis import BreakSettings, analyze_breaks
+from pool.game_type import GameType
+from pool.pool_table import PoolTable, EIGHT_BALL_STRIPES
+
+NW, SE = Coordinates(100, 900), Coordinates(900, 500)
+
+
+def get_positions(table: PoolTable) -> dict:
+    return {name: (ball.pos.x, ball.pos.y) for name, ball in table.balls.items()}
+
+
+class RackTest(unittest.TestCase):
+
+    def assertNoOverlap(self, table: PoolTable):
+        pos = np.array(list(get_positions(table).values()))
+        d = np.hypot(*(pos[:, np.newaxis] - pos[np.newaxis]).transpose(2, 0, 1))
+        np.fill_diagonal(d, np.inf)
+        self.assertGreaterEqual(d.min(), 2 * table.cue_ball.radius - 1e-9)
+
+    def test_eight_ball_rack(self):
+        table = PoolTable(NW, SE, game=GameType.EIGHT_BALL)
+        self.assertEqual(len(table.balls), 16)
+        self.assertNoOverlap(table)
+
+        # Fifteen spots of a tight triangle, five rows deep
+        xs = sorted({round(ball.pos.x, 6) for name, ball in table.balls.items() if name is not BallType.CUE})
+        self.assertEqual(len(xs), 5)
+
+    def test_nine_ball_shuffle(self):
+        fixed = PoolTable(NW, SE)
+        spots = get_positions(fixed)
+
+        orders = set()
+        for seed in range(20):
+            table = PoolTable(NW, SE)
+            table.rack_balls(GameType.NINE_BALL, rng=np.random.default_rng(seed))
+            positions = get_positions(table)
+
+            # Same spots, 1 ball at the front, 9 ball in the middle
+            self.assertEqual(sorted(positions.values()), sorted(spots.values()))
+            for name in (BallType.CUE, BallType.ONE, BallType.NINE):
+                self.assertEqual(positions[name], spots[name])
+            orders.add(tuple(positions.values()))
+
+        self.assertGreater(len(orders), 15)
+
+        # Seeded
+        a, b = PoolTable(NW, SE), PoolTable(NW, SE)
+        a.rack_balls(GameType.NINE_BALL, rng=np.random.default_rng(7))
+        b.rack_balls(GameType.NINE_BALL, rng=np.random.default_rng(7))
+        self.assertEqual(get_positions(a), get_positions(b))
+
+    def test_eight_ball_shuffle(self):
+        spots = get_positions(PoolTable(NW, SE, game=GameType.EIGHT_BALL))
+        corners = (spots[BallType.SIX], spots[BallType.FIFTEEN])
+
+        for seed in range(20):
+            table = PoolTable(NW, SE, game=GameType.EIGHT_BALL)
+            table.rack_balls(GameType.EIGHT_BALL, rng=np.random.default_rng(seed))
+            by_spot = {pos: name for name, pos in get_positions(table).items()}
+
+            self.assertEqual(by_spot[spots[BallType.EIGHT]], BallType.EIGHT)
+            self.assertEqual(by_spot[spots[BallType.ONE]], BallType.ONE)
+            self.assertEqual(sorted(by_spot[corner] in EIGHT_BALL_STRIPES for corner in corners), [False, True])
+
+    def test_jitter(self):
+        table = PoolTable(NW, SE, game=GameType.EIGHT_BALL)
+        tight = get_positions(table)
+
+        table.rack_balls(GameType.EIGHT_BALL, rng=np.random.default_rng(0), jitter=1.0)
+        self.assertNoOverlap(table)
+        self.assertNotEqual(sorted(get_positions(table).values()), sorted(tight.values()))
+
+
+class BreakAnalysisTest(unittest.TestCase):
+
+    def test_reproducible_across_workers(self):
+        settings = BreakSettings(NW, SE, seed=5, jitter=0.5, angle_spread=0.5, max_steps=300)
+
+        serial = analyze_breaks(settings, 12, processes=1, chunk_size=5)
+        parallel = analyze_breaks(settings, 12, processes=2, chunk_size=2)
+        self.assertEqual(serial, parallel)
+
+        other_seed = analyze_breaks(BreakSettings(NW, SE, seed=6, jitter=0.5, angle_spread=0.5, max_steps=300), 12,
+                                    processes=1)
+        self.assertNotEqual(serial, other_seed)
+
+    def test_statistics(self):
+        totals = []
+        stats = analyze_breaks(BreakSettings(NW, SE, game=GameType.EIGHT_BALL, max_steps=300), 6, processes=1,
+                               chunk_size=4, progress=lambda s: totals.append(s.breaks))
+
+        self.assertEqual(totals, [4, 6])
+        self.assertEqual(stats.made.sum(), 6)
+        self.assertEqual(stats.heatmap.sum() + stats.scratches, 6)
+        self.assertEqual(stats.pockets.sum(), stats.ball_made.sum() + stats.scratches)
+
+        summary = stats.get_summary()
+        self.assertEqual(len(summary['made_distribution']), 16)
+        self.assertAlmostEqual(sum(summary['made_distribution']), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append('../../src')
+
+from physics.coordinates import Coordinates
+from physics.vector import Vector
+from pool.ball_type import BallType
+from pool.engine_type import EngineType
+from pool.pool_table import PoolTable
+from pool.shot import Shot, simulate_shot
+
+NW, SE = Coordinates(100, 900), Coordinates(900, 500)
+FLOAT_PLACES = 6  # Rounding error for floating point equality
+
+
+def lone_cue_ball_table(engine: EngineType) -> PoolTable:
+    table = PoolTable(NW, SE, engine=engine)
+    for ball_type in list(table.balls):
+        if ball_type is not BallType.CUE:
+            table.pocket_ball(ball_type)
+    return table
+
+
+def at_rest(table: PoolTable) -> bool:
+    return all(ball.vel.x == 0 and ball.vel.y == 0 for ball in table.balls.values())
+
+
+class EventSimulatorTest(unittest.TestCase):
+
+    def test_free_roll_matches_time_step(self):
+        expected = lone_cue_ball_table(EngineType.SCALAR)
+        result = lone_cue_ball_table(EngineType.EVENT)
+        for table in (expected, result):
+            table.cue_ball.apply_force(Vector(30, 8))
+
+        while not at_rest(expected):
+            expected.time_step()
+        events = result.event_simulator.run_to_rest()
+
+        # Two dead stops, nothing else
+        self.assertEqual(events, 2)
+        self.assertAlmostEqual(result.cue_ball.pos.x, expected.cue_ball.pos.x, places=FLOAT_PLACES)
+        self.assertAlmostEqual(result.cue_ball.pos.y, expected.cue_ball.pos.y, places=FLOAT_PLACES)
+        self.assertTrue(at_rest(result))
+
+    def test_advance_matches_run_to_rest(self):
+        stepped = PoolTable(NW, SE, engine=EngineType.EVENT)
+        jumped = PoolTable(NW, SE, engine=EngineType.EVENT)
+        for table in (stepped, jumped):
+            table.cue_ball.apply_force(Vector(200, 10))
+
+        for _ in range(2000):
+            stepped.time_step()
+        jumped.event_simulator.run_to_rest()
+
+        self.assertEqual(list(stepped.balls), list(jumped.balls))
+        for ball_type, ball in jumped.balls.items():
+            self.assertAlmostEqual(stepped.balls[ball_type].pos.x, ball.pos.x, places=FLOAT_PLACES)
+            self.assertAlmostEqual(stepped.balls[ball_type].pos.y, ball.pos.y, places=FLOAT_PLACES)
+
+    def test_head_on_collision(self):
+        table = PoolTable(NW, SE, engine=EngineType.EVENT)
+        for ball_type in list(table.balls):
+            if ball_type not in (BallType.CUE, BallType.ONE):
+                table.pocket_ball(ball_type)
+
+        cue, one = table.cue_ball, table.balls[BallType.ONE]
+        one.pos.y = cue.pos.y
+        cue.apply_force(Vector(50, 0))
+
+        table.event_simulator.run_to_rest()
+
+        # Equal masses: the cue ball stops dead at the point of contact
+        self.assertAlmostEqual(cue.pos.x, 700 - 2 * cue.radius, places=FLOAT_PLACES)
+        self.assertGreater(one.pos.x, 700)
+
+    def test_break_does_not_tunnel(self):
+        table = PoolTable(NW, SE, engine=EngineType.EVENT)
+        table.cue_ball.apply_force(Vector(500, 30))
+
+        table.event_simulator.run_to_rest()
+
+        self.assertTrue(at_rest(table))
+        pos = np.array([(ball.pos.x, ball.pos.y) for ball in table.balls.values()])
+        dist = np.hypot(*(pos[:, np.newaxis] - pos[np.newaxis]).transpose(2, 0, 1))
+        np.fill_diagonal(dist, np.inf)
+        self.assertGreaterEqual(dist.min(), 2 * table.cue_ball.radius - 1e-6)
+
+        radius = table.cue_ball.radius
+        self.assertTrue(np.all(pos[:, 0] >= table.left + radius - 1e-6))
+        self.assertTrue(np.all(pos[:, 0] <= table.right - radius + 1e-6))
+        self.assertTrue(np.all(pos[:, 1] >= table.bottom + radius - 1e-6))
+        self.assertTrue(np.all(pos[:, 1] <= table.top - radius + 1e-6))
+
+    def test_pocket(self):
+        table = PoolTable(NW, SE, engine=EngineType.EVENT)
+        one = table.balls[BallType.ONE]
+        one.pos.x, one.pos.y = 850, 850
+        one.apply_force(Vector(100, 100))
+
+        table.event_simulator.run_to_rest()
+
+        self.assertNotIn(BallType.ONE, table.balls)
+        self.assertEqual([(e.ball, e.pocket) for e in table.pocket_events], [(BallType.ONE, 2)])
+
+    def test_shot_steps(self):
+        table = lone_cue_ball_table(EngineType.EVENT)
+
+        # A lone ball slows down the same way wherever it is, so every shot takes as long
+        first = simulate_shot(table, Shot(30.0, 100.0))
+        second = simulate_shot(table, Shot(30.0, 100.0))
+        self.assertGreater(first, 0)
+        self.assertLessEqual(abs(second - first), 1)
+
+        self.assertEqual(simulate_shot(table, Shot(30.0, 100.0), max_steps=5), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+
+sys.path.append('../../src')
+
+from pool.__main__ import main
+from pool.engine_type import EngineType
+from pool.game_type import GameType
+from pool.headless import simulate
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src')
+
+
+class HeadlessTest(unittest.TestCase):
+
+    def test_simulate(self):
+        result = simulate(GameType.THREE_BALL, angle=0.0, force=100.0, engine=EngineType.ARRAY)
+
+        self.assertTrue(result['at_rest'])
+        self.assertEqual([ball['name'] for ball in result['balls']] + result['pocketed'],
+                         ['CUE', 'ONE', 'TWO', 'THREE'])
+        self.assertGreater(result['steps'], 0)
+
+        # Round-trips through JSON
+        self.assertEqual(json.loads(json.dumps(result)), result)
+
+    def test_step_budget(self):
+        result = simulate(GameType.NINE_BALL, force=500.0, max_steps=10)
+
+        self.assertEqual(result['steps'], 10)
+        self.assertFalse(result['at_rest'])
+
+    def test_cli_prints_only_json(self):
+        out = io.StringIO()
+        with redirect_stdout(out), redirect_stderr(io.StringIO()):
+            main(['simulate', '--game', 'ONE_BALL', '--force', '50'])
+
+        result = json.loads(out.getvalue())
+        self.assertEqual(result['game'], 'ONE_BALL')
+
+    def test_never_imports_pygame(self):
+        code = 'import sys, pool.__main__, pool.headless; pool.__main__.main(["simulate", "--max-steps", "5"]); ' \
+               'assert "pygame" not in sys.modules'
+        subprocess.run([sys.executable, '-c', code], cwd=SRC, check=True, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append('../../src')
+
+from physics.coordinates import Coordinates
+from physics.vector import Vector
+from pool import log
+from pool.pool_table import PoolTable
+
+NW, SE = Coordinates(100, 900), Coordinates(900, 500)
+
+
+class Unformattable:
+    def __str__(self):
+        raise AssertionError('formatted a disabled record')
+
+
+class LogTest(unittest.TestCase):
+
+    def tearDown(self):
+        log.configure()
+
+    def test_disabled_not_formatted(self):
+        log.configure(level=logging.DEBUG, subsystems=[log.POCKET])
+
+        # Enabled for pocket only
+        self.assertTrue(log.get_logger(log.POCKET).isEnabledFor(logging.DEBUG))
+        self.assertFalse(log.get_logger(log.AIM).isEnabledFor(logging.DEBUG))
+
+        log.log_event(log.get_logger(log.AIM), logging.DEBUG, 'aim', value=Unformattable())
+
+    def test_json_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'log.jsonl')
+            handler = log.configure(level=logging.INFO, subsystems=[log.POCKET], path=path, json_lines=True)
+
+            table = PoolTable(NW, SE)
+            table.cue_ball.pos.x, table.cue_ball.pos.y = 105, 505
+            table.pocket_balls()
+            handler.close()
+
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['subsystem'], log.POCKET)
+        self.assertEqual(records[0]['event'], 'pocketed')
+        self.assertEqual(records[0]['ball'], 'CUE')
+        self.assertEqual(records[0]['pocket'], 5)
+
+    def test_no_stdout(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            table = PoolTable(NW, SE)
+            table.cue_ball.apply_force(Vector(500, 0))
+            for _ in range(100):
+                table.time_step()
+
+        self.assertEqual(stdout.getvalue(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
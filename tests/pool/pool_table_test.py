@@ -0,0 +1,433 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append('../../src')
+
+from physics.collisions import check_ball_ball_collision, resolve_ball_ball_collision, check_ball_wall_collision, \
+    resolve_ball_wall_collision
+from physics.coordinates import Coordinates
+from physics.vector import Vector
+from pool.broad_phase_type import BroadPhaseType
+from pool.ball_type import BallType
+from pool.engine_type import EngineType
+from pool.game_type import GameType
+from pool.pool_ball import PoolBall
+from pool.pool_table import PoolTable, BALL_MASS, BALL_RADIUS
+from pool.scenario import make_scenario, CLUSTER
+from pool.shot import Shot, simulate_shot
+
+NW, SE = Coordinates(100, 900), Coordinates(900, 500)
+
+
+def break_table(**kwargs) -> PoolTable:
+    table = PoolTable(NW, SE, **kwargs)
+    table.cue_ball.apply_force(Vector(500, 30))
+    return table
+
+
+def all_pairs_time_step(table: PoolTable):
+    """
+    Step every ball and check every pair, without sleeping or islands.
+    """
+
+    substeps = table.get_substeps()
+    dt = 1.0 / substeps
+
+    balls = list(table.balls.values())
+    for _ in range(substeps):
+        for ball in balls:
+            ball.time_step(dt)
+
+        for i in range(len(balls)):
+            wall = check_ball_wall_collision(balls[i], table.top, table.left, table.bottom, table.right, dt)
+            if wall is not None:
+                resolve_ball_wall_collision(balls[i], wall)
+
+            for j in range(i + 1, len(balls)):
+                if check_ball_ball_collision(balls[i], balls[j], dt):
+                    resolve_ball_ball_collision(balls[i], balls[j])
+
+    table.pocket_balls()
+
+
+class PoolTableTest(unittest.TestCase):
+
+    def assertSameState(self, result: PoolTable, expected: PoolTable):
+        self.assertEqual(list(result.balls), list(expected.balls))
+        for ball_type, ball in expected.balls.items():
+            self.assertEqual(result.balls[ball_type].pos, ball.pos)
+            self.assertEqual(result.balls[ball_type].vel, ball.vel)
+
+    def test_grid_broad_phase_scalar(self):
+        expected = break_table()
+        result = break_table(broad_phase=BroadPhaseType.GRID)
+
+        for _ in range(500):
+            expected.time_step()
+            result.time_step()
+
+        self.assertSameState(result, expected)
+
+    def test_grid_broad_phase_array(self):
+        expected = break_table(engine=EngineType.ARRAY)
+        result = break_table(engine=EngineType.ARRAY, broad_phase=BroadPhaseType.GRID)
+
+        for _ in range(500):
+            expected.time_step()
+            result.time_step()
+
+        self.assertSameState(result, expected)
+
+    def test_sleeping_islands_match_all_pairs(self):
+        expected = break_table()
+        result = break_table()
+
+        for _ in range(1500):
+            all_pairs_time_step(expected)
+            result.time_step()
+
+        self.assertSameState(result, expected)
+
+    def test_islands(self):
+        table = PoolTable(NW, SE)
+        balls = list(table.balls.values())
+
+        # Racked balls touch each other; the cue ball is far away
+        islands, _, _ = table.get_islands(balls)
+        cue = balls.index(table.cue_ball)
+        self.assertEqual(len(set(islands.tolist())), 2)
+        self.assertNotIn(islands[cue], [islands[k] for k in range(len(balls)) if k != cue])
+
+        # A fast enough cue ball may reach the rack this step
+        table.cue_ball.vel = Vector(1000, 0)
+        islands, _, _ = table.get_islands(balls)
+        self.assertEqual(len(set(islands.tolist())), 1)
+
+    def test_uniform_islands(self):
+        # Each ball's reach depends on its own speed, so many slow balls stay in many small islands
+        pairs = []
+        for n_balls in (1000, 3000):
+            table = make_scenario(n_balls, seed=1)
+            islands, pairs_i, _ = table.get_islands(list(table.balls.values()))
+            self.assertGreater(len(set(islands.tolist())), n_balls // 10)
+            self.assertLess(len(pairs_i), 2 * n_balls)
+            pairs.append(len(pairs_i))
+
+        self.assertLess(pairs[1], 4 * pairs[0])
+
+    def test_chain_collisions_match_all_pairs(self):
+        # A packed cluster passes speed from ball to ball within a step, past each ball's reach at the start of it
+        for broad_phase in BroadPhaseType:
+            expected = make_scenario(150, CLUSTER, speed=20.0, moving=0.2, seed=2)
+            result = make_scenario(150, CLUSTER, speed=20.0, moving=0.2, seed=2, broad_phase=broad_phase)
+
+            for _ in range(100):
+                all_pairs_time_step(expected)
+                result.time_step(aim=False)
+
+            self.assertSameState(result, expected)
+
+    def test_sleeping_rack_not_stepped(self):
+        table = PoolTable(NW, SE)
+        rack = {ball_type: (ball.pos.x, ball.pos.y) for ball_type, ball in table.balls.items()
+                if ball is not table.cue_ball}
+
+        # Cue ball rolls gently away from the rack
+        table.cue_ball.vel = Vector(-2, 0)
+        self.assertFalse(table.is_at_rest())
+
+        while not table.is_at_rest():
+            table.time_step()
+
+        for ball_type, pos in rack.items():
+            self.assertEqual((table.balls[ball_type].pos.x, table.balls[ball_type].pos.y), pos)
+
+    def test_aim_cached(self):
+        table = PoolTable(NW, SE)
+        table.cue_angle = 1.0
+        table.get_cue_ball_path()
+        self.assertIsNotNone(table.object_deflect_line_end)
+
+        # Nothing changed: the previous result is kept
+        marker = table.cue_line_end = Coordinates(0, 0)
+        table.time_step()
+        self.assertIs(table.cue_line_end, marker)
+
+        # New angle
+        table.cue_angle = 180.0
+        table.get_cue_ball_path()
+        self.assertIsNot(table.cue_line_end, marker)
+        self.assertIsNone(table.object_deflect_line_end)
+
+        # Moving ball
+        marker = table.cue_line_end = Coordinates(0, 0)
+        table.cue_ball.vel = Vector(-1, 0)
+        table.time_step()
+        self.assertIsNot(table.cue_line_end, marker)
+
+        # Ball moved by hand
+        marker = table.cue_line_end = Coordinates(0, 0)
+        table.cue_ball.pos.x += 10
+        table.mark_moved()
+        table.get_cue_ball_path()
+        self.assertIsNot(table.cue_line_end, marker)
+
+        # Re-racked
+        moved = PoolTable(NW, SE)
+        moved.balls[BallType.ONE].pos.y += 30
+        moved.cue_ball.pos.y += 30
+        moved.mark_moved()
+        moved.get_cue_ball_path()
+        moved_end = moved.cue_line_end
+        moved.rack_balls(GameType.NINE_BALL)
+        moved.get_cue_ball_path()
+        racked = PoolTable(NW, SE)
+        racked.get_cue_ball_path()
+        self.assertIsNot(moved.cue_line_end, moved_end)
+        self.assertEqual((moved.cue_line_end.x, moved.cue_line_end.y), (racked.cue_line_end.x, racked.cue_line_end.y))
+
+        # Pocketability follows the re-rack too
+        moved.balls[BallType.ONE].pos.y += 30
+        moved.mark_moved()
+        pocketability = moved.get_pocketability()
+        moved.rack_balls(GameType.NINE_BALL)
+        self.assertIsNot(moved.get_pocketability(), pocketability)
+        np.testing.assert_array_equal(moved.get_pocketability().cut_angle, racked.get_pocketability().cut_angle)
+
+        # Balls moved by the event-driven engine
+        table = PoolTable(NW, SE, engine=EngineType.EVENT)
+        table.get_cue_ball_path()
+        pocketability = table.get_pocketability()
+        marker = table.cue_line_end = Coordinates(0, 0)
+        simulate_shot(table, Shot(90.0, 100.0))
+        table.get_cue_ball_path()
+        self.assertIsNot(table.cue_line_end, marker)
+        self.assertIsNot(table.get_pocketability(), pocketability)
+
+    def test_aim_fan(self):
+        table = PoolTable(NW, SE)
+        angles = [0.0, 1.5, 90.0, 180.0, 350.0]
+        balls, ghosts = table.get_aim_fan(angles)
+
+        for angle, ball, ghost in zip(angles, balls, ghosts):
+            table.cue_angle = angle
+            table.get_cue_ball_path()
+
+            self.assertIs(ball, next((b for b in table.balls.values() if b.pos is table.object_deflect_line_start),
+                                     None))
+            self.assertAlmostEqual(ghost[0], table.cue_line_end.x, places=6)
+            self.assertAlmostEqual(ghost[1], table.cue_line_end.y, places=6)
+
+        self.assertIsNotNone(balls[0])
+        self.assertIsNone(balls[3])
+
+    def test_pocketability(self):
+        table = PoolTable(NW, SE, game=GameType.THREE_BALL)
+        balls = table.balls
+        balls[BallType.CUE].pos.x, balls[BallType.CUE].pos.y = 700, 700
+        balls[BallType.ONE].pos.x, balls[BallType.ONE].pos.y = 800, 800
+
+        # Out of the way
+        balls[BallType.TWO].pos.x, balls[BallType.TWO].pos.y = 200, 600
+        balls[BallType.THREE].pos.x, balls[BallType.THREE].pos.y = 300, 600
+        table.mark_moved()
+
+        result = table.get_pocketability()
+        one = result.balls.index(balls[BallType.ONE])
+        corner = 2  # North-east pocket, straight on from the cue ball through the 1 ball
+
+        self.assertAlmostEqual(result.cut_angle[one, corner], 0.0, places=5)
+        self.assertAlmostEqual(result.cue_angle[one, corner], 45.0, places=5)
+        self.assertAlmostEqual(result.ghost[one, corner, 0], 800 - 20 / np.sqrt(2), places=5)
+        self.assertTrue(result.is_makeable()[one, corner])
+        self.assertEqual(result.get_shots()[0][:2], (balls[BallType.ONE], corner))
+
+        # Cached until a ball moves
+        self.assertIs(table.get_pocketability(), result)
+
+        # Block the object ball's path, then the cue ball's
+        balls[BallType.TWO].pos.x, balls[BallType.TWO].pos.y = 850, 850
+        table.mark_moved()
+        result = table.get_pocketability()
+        self.assertFalse(result.object_clear[one, corner])
+        self.assertTrue(result.cue_clear[one, corner])
+
+        balls[BallType.THREE].pos.x, balls[BallType.THREE].pos.y = 745, 752
+        table.mark_moved()
+        result = table.get_pocketability()
+        self.assertFalse(result.cue_clear[one, corner])
+
+    def test_pocket_events(self):
+        table = PoolTable(NW, SE, game=GameType.ONE_BALL)
+        one = table.balls[BallType.ONE]
+
+        # Along the top rail, clear of the pockets
+        one.pos.x, one.pos.y = 300, 885
+        self.assertEqual(table.pocket_balls(), [])
+
+        # Into the north-east corner
+        one.pos.x, one.pos.y = 850, 850
+        one.vel = Vector(5, 5)
+        events = []
+        for _ in range(20):
+            table.time_step()
+            events += table.pocket_balls()
+
+        self.assertNotIn(BallType.ONE, table.balls)
+        self.assertEqual(len(table.pocket_events), 1)
+        event = table.pocket_events[0]
+        self.assertEqual((event.ball, event.pocket), (BallType.ONE, 2))
+        self.assertEqual(event.step, 8)
+
+        # Scratch: the cue ball is re-spotted, and reported too
+        table.cue_ball.pos.x, table.cue_ball.pos.y = 105, 505
+        events = table.pocket_balls()
+        self.assertEqual([(e.ball, e.pocket) for e in events], [(BallType.CUE, 5)])
+        self.assertIn(BallType.CUE, table.balls)
+
+    def test_snapshot_restore(self):
+        # Breaks that pocket a ball after the snapshot with each engine
+        forces = {EngineType.SCALAR: Vector(500, 0), EngineType.ARRAY: Vector(500, 0),
+                  EngineType.EVENT: Vector(500, 0)}
+        for engine, force in forces.items():
+            table = PoolTable(NW, SE, engine=engine)
+            table.cue_ball.apply_force(force)
+            for _ in range(30):
+                table.time_step(aim=False)
+
+            snapshot = table.snapshot()
+            for _ in range(300):
+                table.time_step(aim=False)
+            expected = {name: (ball.pos.x, ball.pos.y, ball.vel.x, ball.vel.y) for name, ball in table.balls.items()}
+            events = list(table.pocket_events)
+            self.assertGreater(len(events), 0, engine)
+
+            # Rolls back pocketings too, and replays identically
+            table.restore(snapshot)
+            self.assertEqual(len(table.balls), 10, engine)
+            self.assertEqual((table.steps, table.pocket_events), (30, []), engine)
+
+            for _ in range(300):
+                table.time_step(aim=False)
+            result = {name: (ball.pos.x, ball.pos.y, ball.vel.x, ball.vel.y) for name, ball in table.balls.items()}
+            self.assertEqual(list(result), list(expected), engine)
+            np.testing.assert_allclose(list(result.values()), list(expected.values()), err_msg=engine.name)
+            self.assertEqual(table.pocket_events, events, engine)
+
+    def test_snapshot_copy_on_write(self):
+        table = break_table()
+        base = table.snapshot()
+        self.assertFalse(base.state.flags.writeable)
+
+        # Nothing changed: everything is shared
+        self.assertEqual(table.snapshot(base).get_shared(base), ['names', 'state', 'present'])
+
+        table.time_step(aim=False)
+        moved = table.snapshot(base)
+        self.assertEqual(moved.get_shared(base), ['names', 'present'])
+
+        # Only the cue ball has moved: its row is all the branch stores
+        self.assertEqual(moved.rows.tolist(), [moved.slots[BallType.CUE]])
+        self.assertEqual(moved.state[moved.slots[BallType.CUE], 0], table.cue_ball.pos.x)
+        np.testing.assert_array_equal(np.delete(moved.state, moved.rows, axis=0),
+                                      np.delete(base.state, moved.rows, axis=0))
+
+        table.pocket_ball(BallType.NINE)
+        pocketed = table.snapshot(base)
+        self.assertEqual(pocketed.get_shared(base), ['names'])
+        self.assertFalse(pocketed.present[pocketed.slots[BallType.NINE]])
+
+        # Branches from one base restore independently
+        table.restore(moved)
+        self.assertIn(BallType.NINE, table.balls)
+        self.assertEqual(table.snapshot(moved).get_shared(moved), ['names', 'state', 'present'])
+        table.restore(base)
+        self.assertEqual(table.cue_ball.vel, Vector(500 / table.cue_ball.mass, 30 / table.cue_ball.mass))
+
+    def test_snapshot_branches_share_unchanged_rows(self):
+        # A large table at rest, branched by many short shots that each move a few balls
+        table = make_scenario(300, moving=0.0)
+        base = table.snapshot()
+
+        branches = []
+        for angle in range(0, 360, 30):
+            table.restore(base)
+            Shot(angle, 300.0).apply(table)
+            for _ in range(5):
+                table.time_step(aim=False)
+            positions = {name: (ball.pos.x, ball.pos.y) for name, ball in table.balls.items()}
+            branches.append((table.snapshot(base), positions))
+
+        for branch, positions in branches:
+            self.assertIs(branch.base, base)
+            self.assertGreater(len(branch.rows), 0)
+            self.assertLess(branch.get_nbytes(), base.get_nbytes() // 10)
+
+        # Every branch still restores to its own position
+        for branch, positions in reversed(branches):
+            table.restore(branch)
+            self.assertEqual({name: (ball.pos.x, ball.pos.y) for name, ball in table.balls.items()}, positions)
+
+    def test_restore_invalidates_aim(self):
+        table = PoolTable(NW, SE)
+        snapshot = table.snapshot()
+        table.get_cue_ball_path()
+        aim_key = table.aim_key
+
+        table.cue_ball.pos.x += 50
+        table.mark_moved()
+        table.get_cue_ball_path()
+        table.restore(snapshot)
+
+        table.get_cue_ball_path()
+        self.assertNotEqual(table.aim_key, aim_key)
+        self.assertIsNotNone(table.cue_line_end)
+
+    def test_substeps_prevent_tunneling(self):
+        for engine in (EngineType.SCALAR, EngineType.ARRAY):
+            for max_substeps, tunnels in ((1, True), (16, False)):
+                # Head on at 6 radii per step each: one whole step takes them straight through each other
+                table = PoolTable(NW, SE, engine=engine, max_substeps=max_substeps)
+                table.set_balls({
+                    BallType.CUE: PoolBall(BallType.CUE, Coordinates(300, 700), BALL_MASS, BALL_RADIUS,
+                                           vel=Vector(60, 0)),
+                    BallType.ONE: PoolBall(BallType.ONE, Coordinates(400, 700), BALL_MASS, BALL_RADIUS,
+                                           vel=Vector(-60, 0)),
+                })
+
+                table.time_step(aim=False)
+                cue, one = table.balls[BallType.CUE], table.balls[BallType.ONE]
+                self.assertEqual(cue.pos.x > one.pos.x, tunnels, (engine, max_substeps))
+                self.assertEqual(table.substeps, 6 if max_substeps > 1 else 1)
+                self.assertEqual(table.capped_steps, int(max_substeps == 1))
+
+    def test_substeps_keep_balls_on_table(self):
+        table = PoolTable(NW, SE)
+        table.cue_ball.apply_force(Vector(900, 400))
+
+        for _ in range(200):
+            table.time_step(aim=False)
+            for ball in table.balls.values():
+                self.assertLess(ball.pos.x, table.right)
+                self.assertGreater(ball.pos.x, table.left)
+                self.assertLess(ball.pos.y, table.top)
+                self.assertGreater(ball.pos.y, table.bottom)
+
+        self.assertGreater(table.substepped_steps, 0)
+        self.assertGreater(table.substeps, table.steps)
+        self.assertEqual(table.capped_steps, 0)
+
+    def test_slow_steps_are_not_split(self):
+        table = PoolTable(NW, SE)
+        table.cue_ball.apply_force(Vector(50, 0))
+
+        for _ in range(100):
+            table.time_step(aim=False)
+
+        self.assertEqual((table.substeps, table.substepped_steps), (100, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append('../../src')
+
+from physics.coordinates import Coordinates
+from physics.vector import Vector
+from pool import profiler as phases
+from pool.pool_table import PoolTable
+from pool.profiler import Profiler
+
+NW, SE = Coordinates(100, 900), Coordinates(900, 500)
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def test_percentiles(self):
+        profiler = Profiler(window=100)
+        for duration in range(1, 201):
+            profiler.add('phase', 0, duration * 1000)
+
+        # Only the latest 100 durations are kept
+        p50, p90, p99 = profiler.get_percentiles('phase')
+        self.assertAlmostEqual(p50, 150.5e-6)
+        self.assertAlmostEqual(p90, 190.1e-6)
+        self.assertEqual(profiler.get_summary()['phase']['count'], 100)
+
+    def test_table_phases(self):
+        table = PoolTable(NW, SE)
+        table.profiler = profiler = Profiler(trace_frames=10)
+        table.cue_ball.apply_force(Vector(500, 0))
+
+        for _ in range(50):
+            profiler.begin_frame()
+            table.time_step()
+
+        # Physics phases are timed once per substep
+        summary = profiler.get_summary()
+        for phase in (phases.BALL_TIME_STEP, phases.BROAD_PHASE, phases.WALL_COLLISIONS, phases.BALL_COLLISIONS):
+            self.assertEqual(summary[phase]['count'], table.substeps)
+            self.assertGreater(summary[phase]['p50'], 0)
+        for phase in (phases.POCKET_BALLS, phases.CUE_BALL_PATH):
+            self.assertEqual(summary[phase]['count'], 50)
+            self.assertGreater(summary[phase]['p50'], 0)
+
+        # Timeline of the latest frames only
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+            profiler.write_chrome_trace(path, frames=5)
+            with open(path) as f:
+                trace = json.load(f)
+
+        events = trace['traceEvents']
+        self.assertEqual(sorted(set(event['args']['frame'] for event in events)), [46, 47, 48, 49, 50])
+        self.assertTrue(all(event['ph'] == 'X' and event['dur'] >= 0 for event in events))
+
+    def test_off_by_default(self):
+        table = PoolTable(NW, SE)
+        self.assertIsNone(table.profiler)
+
+
+if __name__ == '__main__':
+    unittest.main()
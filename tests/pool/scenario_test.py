@@ -0,0 +1,85 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append('../../src')
+
+from pool.ball_type import BallType
+from pool.engine_type import EngineType
+from pool.scenario import make_scenario, get_table_size, CLUSTER, UNIFORM
+
+
+def get_positions(table) -> np.ndarray:
+    return np.array([(ball.pos.x, ball.pos.y) for ball in table.balls.values()])
+
+
+class ScenarioTest(unittest.TestCase):
+
+    def assertNoOverlap(self, table):
+        pos = get_positions(table)
+        d = np.hypot(*(pos[:, np.newaxis] - pos[np.newaxis]).transpose(2, 0, 1))
+        np.fill_diagonal(d, np.inf)
+        self.assertGreaterEqual(d.min(), 2 * table.cue_ball.radius)
+
+    def assertOnTable(self, table):
+        pos = get_positions(table)
+        radius = table.cue_ball.radius
+        self.assertTrue(np.all(pos[:, 0] - radius >= table.left))
+        self.assertTrue(np.all(pos[:, 0] + radius <= table.right))
+        self.assertTrue(np.all(pos[:, 1] - radius >= table.bottom))
+        self.assertTrue(np.all(pos[:, 1] + radius <= table.top))
+
+    def test_uniform(self):
+        table = make_scenario(500, UNIFORM, seed=1)
+
+        self.assertEqual(len(table.balls), 500)
+        self.assertIs(table.cue_ball, table.balls[BallType.CUE])
+        self.assertEqual(sorted(name for name in table.balls if name is not BallType.CUE), list(range(1, 500)))
+        self.assertNoOverlap(table)
+        self.assertOnTable(table)
+
+        # No ball starts in a pocket
+        pos = get_positions(table)
+        d = np.hypot(*(pos[:, np.newaxis] - table.pocket_centers).transpose(2, 0, 1))
+        self.assertGreater(d.min(), table.hole_radius)
+
+    def test_cluster(self):
+        for n_balls in (1, 10, 300):
+            table = make_scenario(n_balls, CLUSTER)
+            self.assertEqual(len(table.balls), n_balls)
+            if n_balls > 1:
+                self.assertNoOverlap(table)
+            self.assertOnTable(table)
+
+    def test_table_size(self):
+        length, width = get_table_size(1000)
+        self.assertAlmostEqual(length, 2 * width)
+
+        table = make_scenario(10, UNIFORM, length=1000)
+        self.assertEqual((table.length, table.width), (1000, 500))
+
+    def test_seed(self):
+        np.testing.assert_array_equal(get_positions(make_scenario(100, seed=3)),
+                                      get_positions(make_scenario(100, seed=3)))
+        self.assertFalse(np.array_equal(get_positions(make_scenario(100, seed=3)),
+                                         get_positions(make_scenario(100, seed=4))))
+
+    def test_moving(self):
+        table = make_scenario(100, moving=0.0)
+        self.assertTrue(all(ball.vel.get_magnitude() == 0 for ball in table.balls.values()))
+
+        table = make_scenario(100, speed=2.0)
+        self.assertTrue(all(ball.vel.get_magnitude() <= 2.0 for ball in table.balls.values()))
+
+    def test_time_step(self):
+        for engine in (EngineType.SCALAR, EngineType.ARRAY):
+            for layout in (UNIFORM, CLUSTER):
+                table = make_scenario(200, layout, engine=engine)
+                for _ in range(5):
+                    table.time_step()
+                self.assertEqual(len(table.balls) + len(table.pocket_events), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
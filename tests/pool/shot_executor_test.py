@@ -0,0 +1,77 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append('../../src')
+
+from physics.coordinates import Coordinates
+from pool.ball_type import BallType
+from pool.broad_phase_type import BroadPhaseType
+from pool.engine_type import EngineType
+from pool.pool_table import PoolTable
+from pool.scenario import make_scenario
+from pool.shot import Shot, simulate_shot
+from pool.shot_executor import ShotExecutor
+
+NW, SE = Coordinates(100, 900), Coordinates(900, 500)
+
+
+class ShotExecutorTest(unittest.TestCase):
+
+    def test_matches_serial(self):
+        shots = [(0.0, 500.0), (3.0, 25.0), (180.0, 60.0), (45.0, 0.0), (-2.0, 300.0)]
+
+        with ShotExecutor(PoolTable(NW, SE), processes=2) as executor:
+            results = executor.map(shots)
+
+            # Workers reuse their tables; a second round must start from the same base state
+            again = executor.map(reversed(shots))
+
+        for (angle, force), result, repeat in zip(shots, results, reversed(again)):
+            table = PoolTable(NW, SE)
+            steps = simulate_shot(table, Shot(angle, force))
+
+            self.assertEqual(result.steps, steps)
+            self.assertEqual(result.get_pocketed(), [name for name in result.names if name not in table.balls])
+            for k, name in enumerate(result.names):
+                if name in table.balls:
+                    self.assertEqual(tuple(result.pos[k]), (table.balls[name].pos.x, table.balls[name].pos.y))
+
+            np.testing.assert_array_equal(repeat.pos, result.pos)
+            np.testing.assert_array_equal(repeat.present, result.present)
+
+    def test_update(self):
+        table = PoolTable(NW, SE)
+
+        with ShotExecutor(table, processes=1) as executor:
+            del table.balls[BallType.NINE]
+            executor.update(table)
+
+            result, = executor.map([(0.0, 0.0)])
+
+        self.assertEqual(result.get_pocketed(), [BallType.NINE])
+
+    def test_set_balls_table(self):
+        # Balls keyed 1, 2, ... that a stock table does not have, and non-default settings
+        table = make_scenario(30, engine=EngineType.ARRAY, broad_phase=BroadPhaseType.BRUTE_FORCE, speed=0.0)
+        table.max_substeps = 2
+        shots = [(0.0, 800.0), (90.0, 300.0)]
+
+        with ShotExecutor(table, processes=1) as executor:
+            results = executor.map(shots)
+
+        base = table.snapshot()
+        for (angle, force), result in zip(shots, results):
+            table.restore(base)
+            steps = simulate_shot(table, Shot(angle, force))
+
+            self.assertEqual(result.steps, steps)
+            for k, name in enumerate(result.names):
+                self.assertEqual(result.present[k], name in table.balls)
+                if name in table.balls:
+                    self.assertEqual(tuple(result.pos[k]), (table.balls[name].pos.x, table.balls[name].pos.y))
+
+
+if __name__ == '__main__':
+    unittest.main()
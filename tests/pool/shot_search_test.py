@@ -0,0 +1,79 @@
+import sys
+import unittest
+
+sys.path.append('../../src')
+
+from physics.coordinates import Coordinates
+from pool.ball_type import BallType
+from pool.game_type import GameType
+from pool.pool_table import PoolTable
+from pool.shot import Shot, simulate_shot
+from pool.shot_executor import ShotExecutor, ShotResult
+from pool.shot_search import search_shots, score_result, SCRATCH_SCORE, MISS_SCORE
+
+NW, SE = Coordinates(100, 900), Coordinates(900, 500)
+
+
+def get_straight_in_table() -> PoolTable:
+    # The one ball sits straight between the cue ball and the top side pocket
+    table = PoolTable(NW, SE, game=GameType.ONE_BALL)
+    table.cue_ball.pos.x, table.cue_ball.pos.y = 500, 600
+    table.balls[BallType.ONE].pos.x, table.balls[BallType.ONE].pos.y = 500, 800
+    return table
+
+
+class ShotSearchTest(unittest.TestCase):
+
+    def test_finds_straight_in(self):
+        table = get_straight_in_table()
+        ranked, stats = search_shots(table, angles=8, forces=(25.0, 100.0), refine_rounds=1, processes=2)
+
+        best = ranked[0]
+        self.assertEqual(best.shot.angle, 90.0)
+        self.assertEqual(best.result.get_pocketed(), [BallType.ONE])
+        self.assertEqual([s.score for s in ranked], sorted((s.score for s in ranked), reverse=True))
+
+        # Every grid angle is played, but rollouts that miss are cut short
+        self.assertLessEqual({k * 45.0 for k in range(8)}, {s.shot.angle for s in ranked})
+        self.assertGreater(stats['pruned_rollouts'], 0)
+        self.assertGreater(stats['misses'], 0)
+        self.assertEqual(stats['rollouts'], len(ranked))
+        self.assertEqual(sum(r['rollouts'] for r in stats['rounds']), stats['rollouts'])
+        self.assertIn('p90', stats['rollout_seconds'])
+
+        # The table is untouched, and the shot plays out the same serially
+        self.assertEqual((table.cue_ball.pos.x, table.cue_ball.pos.y), (500, 600))
+        simulate_shot(table, best.shot)
+        self.assertNotIn(BallType.ONE, table.balls)
+
+    def test_kick_not_pruned(self):
+        table = get_straight_in_table()
+        with ShotExecutor(table, processes=1, stop_on_miss=True) as executor:
+            kick, miss = executor.map([(165.0, 100.0), (45.0, 100.0)])
+
+        # Off the left cushion into the one ball
+        self.assertFalse(kick.missed)
+        self.assertFalse(kick.stopped)
+        self.assertEqual(kick.steps, simulate_shot(get_straight_in_table(), Shot(165.0, 100.0)))
+
+        # Round the table without touching it
+        self.assertTrue(miss.missed)
+        self.assertTrue(miss.stopped)
+        self.assertLess(miss.steps, simulate_shot(get_straight_in_table(), Shot(45.0, 100.0)))
+
+    def test_score(self):
+        names = [BallType.CUE, BallType.ONE, BallType.TWO]
+        pos = [[0, 0]] * 3
+
+        made = ShotResult(Shot(0, 1), names, pos, [True, False, False], 10, 0.0, leave=0.0)
+        self.assertEqual(score_result(made), 2.5)
+
+        scratched = ShotResult(Shot(0, 1), names, pos, [True, False, True], 10, 0.0, scratched=True)
+        self.assertEqual(score_result(scratched), 1 + SCRATCH_SCORE)
+
+        missed = ShotResult(Shot(0, 1), names, pos, [True, True, True], 10, 0.0, leave=0.0, missed=True)
+        self.assertEqual(score_result(missed), MISS_SCORE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.append('../../src')
+
+from physics.coordinates import Coordinates
+from physics.direction import Direction
+from pool.ball_type import BallType
+from pool.collision_event import CollisionEvent
+from pool.engine_type import EngineType
+from pool.pool_table import PoolTable
+from pool.shot import Shot, BREAK_FORCE, simulate_shot
+from pool.stream import simulate, record, until, until_pocketed, get_positions
+from pool.trajectory_player import TrajectoryPlayer
+from pool.trajectory_recorder import TrajectoryRecorder
+
+
+def get_table(engine: EngineType = EngineType.SCALAR) -> PoolTable:
+    return PoolTable(Coordinates(100, 900), Coordinates(900, 500), engine=engine)
+
+
+class StreamTest(unittest.TestCase):
+
+    def test_matches_simulate_shot(self):
+        for engine in (EngineType.SCALAR, EngineType.ARRAY):
+            expected = get_table(engine)
+            steps = simulate_shot(expected, Shot(0.0, BREAK_FORCE))
+
+            table = get_table(engine)
+            frames = [(frame.step, frame.pocket_events) for frame in simulate(table, Shot(0.0, BREAK_FORCE))]
+
+            self.assertEqual([step for step, _ in frames], list(range(1, steps + 1)))
+            self.assertEqual([event for _, events in frames for event in events], expected.pocket_events)
+            for name, ball in expected.balls.items():
+                self.assertEqual((table.balls[name].pos.x, table.balls[name].pos.y), (ball.pos.x, ball.pos.y))
+
+    def test_events(self):
+        table = get_table()
+        table.collision_events = collected = []
+
+        collisions = []
+        for frame in simulate(table, Shot(0.0, BREAK_FORCE), max_steps=50):
+            self.assertTrue(all(event.step == frame.step for event in frame.collision_events))
+            collisions += frame.collision_events
+
+        # The cue ball hits the head ball first
+        cue = [event for event in collisions if BallType.CUE in (event.ball, event.other)]
+        self.assertEqual({cue[0].ball, cue[0].other}, {BallType.CUE, BallType.ONE})
+        self.assertIsInstance(collisions[0], CollisionEvent)
+
+        # A caller's own collection carries on, and is restored
+        self.assertEqual(collected, collisions)
+        self.assertIs(table.collision_events, collected)
+
+    def test_stop_early(self):
+        table = get_table()
+
+        frames = until_pocketed(simulate(table, Shot(0.0, BREAK_FORCE)))
+        positions = None
+        for frame in frames:
+            positions = frame.positions
+
+        # Physics stopped with the consumer
+        self.assertEqual(len(frame.pocket_events), 1)
+        self.assertEqual(table.steps, frame.step)
+        self.assertEqual(positions.shape, (9, 2))
+
+        last = table.steps + 3
+        positions = list(get_positions(until(simulate(table), lambda f: f.step == last)))
+        self.assertEqual(len(positions), 3)
+
+    def test_released(self):
+        table = get_table()
+        frames = simulate(table, Shot(0.0, BREAK_FORCE), keep_state=True)
+
+        first = next(frames)
+        velocities = first.velocities
+        second = next(frames)
+        self.assertEqual(velocities[0, 0], first.velocities[0, 0])
+
+        # Not read before the next frame: copied when released
+        next(frames)
+        self.assertIsNone(second.table)
+        self.assertEqual(second.positions.shape, (10, 2))
+
+    def test_not_kept(self):
+        table = get_table()
+        frames = simulate(table, Shot(0.0, BREAK_FORCE))
+
+        first = next(frames)
+        first.positions
+        second = next(frames)
+        next(frames)
+
+        # Nothing is copied unless asked for, so an unread frame can't be read once released
+        self.assertIsNone(second.table)
+        self.assertEqual(first.positions.shape, (10, 2))
+        with self.assertRaises(ValueError):
+            second.positions
+
+    def test_buffered(self):
+        table = get_table()
+        frames = list(simulate(table, Shot(0.0, BREAK_FORCE), max_steps=30, keep_state=True))
+        self.assertEqual(len(frames), 30)
+
+        # Each kept frame holds the state of its own step
+        replay = get_table()
+        Shot(0.0, BREAK_FORCE).apply(replay)
+        for frame in frames:
+            replay.time_step(aim=False)
+            self.assertEqual(frame.names, list(replay.balls))
+            np.testing.assert_array_equal(frame.positions, [(b.pos.x, b.pos.y) for b in replay.balls.values()])
+            np.testing.assert_array_equal(frame.velocities, [(b.vel.x, b.vel.y) for b in replay.balls.values()])
+
+    def test_event_engine_collisions(self):
+        expected = []
+        for frame in simulate(get_table(), Shot(0.0, BREAK_FORCE), max_steps=200):
+            expected += frame.collision_events
+
+        collisions = []
+        for frame in simulate(get_table(EngineType.EVENT), Shot(0.0, BREAK_FORCE), max_steps=200):
+            self.assertTrue(all(event.step == frame.step for event in frame.collision_events))
+            collisions += frame.collision_events
+
+        # Exact contacts: the cue ball hits the head ball on the same step, and the cushions come into play too
+        self.assertEqual((collisions[0].ball, collisions[0].other), (BallType.CUE, BallType.ONE))
+        self.assertEqual(collisions[0].step, expected[0].step)
+        self.assertEqual({event.other for event in collisions if isinstance(event.other, Direction)},
+                         {event.other for event in expected if isinstance(event.other, Direction)})
+
+    def test_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'shot.traj')
+
+            table = get_table()
+            recorder = TrajectoryRecorder(path, list(table.balls))
+            frames = [frame.positions.copy() for frame in record(simulate(table, Shot(0.0, BREAK_FORCE),
+                                                                           max_steps=20), recorder)]
+            recorder.close()
+
+            player = TrajectoryPlayer(path)
+            self.assertEqual(player.get_steps(), range(1, 21))
+            np.testing.assert_allclose(player.get_frame(20)['pos'], frames[-1], rtol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.append('../../src')
+
+from physics.coordinates import Coordinates
+from pool.ball_type import BallType
+from pool.pool_table import PoolTable
+from pool.shot import Shot, BREAK_FORCE
+from pool.trajectory_player import TrajectoryPlayer
+from pool.trajectory_recorder import TrajectoryRecorder
+
+
+class TrajectoryRecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'shot.traj')
+
+    def record_break(self, steps: int, capacity: int = 16):
+        table = PoolTable(Coordinates(100, 900), Coordinates(900, 500))
+        table.recorder = TrajectoryRecorder(self.path, list(table.balls), capacity=capacity, keyframe_interval=10)
+        table.recorder.record(table)
+
+        # Exact state of every step, to compare with the recording
+        states = [{name: (ball.pos.x, ball.pos.y, ball.vel.x, ball.vel.y) for name, ball in table.balls.items()}]
+        Shot(0.0, BREAK_FORCE).apply(table)
+        for _ in range(steps):
+            table.time_step(aim=False)
+            states.append({name: (ball.pos.x, ball.pos.y, ball.vel.x, ball.vel.y)
+                           for name, ball in table.balls.items()})
+
+        return table, states
+
+    def test_seek(self):
+        table, states = self.record_break(200)
+        table.recorder.close()
+
+        player = TrajectoryPlayer(self.path)
+        self.assertEqual(len(player), 201)
+        self.assertEqual(player.get_steps(), range(0, 201))
+        self.assertEqual(player.names[0], 'CUE')
+
+        for step in (0, 1, 9, 10, 57, 200):
+            frame = player.get_frame(step)
+            self.assertEqual(frame['step'], step)
+
+            state = states[step]
+            for k, name in enumerate(BallType):
+                if name not in PoolTable.get_balls(table.game):
+                    continue
+                self.assertEqual(frame['present'][k], name in state)
+                if name in state:
+                    np.testing.assert_allclose(np.concatenate([frame['pos'][k], frame['vel'][k]]), state[name],
+                                               rtol=1e-6)
+
+            self.assertEqual(player.get_ball_positions(step).keys(), {name.name for name in state})
+
+        # Keyframes hold the exact state
+        keyframe = player.get_keyframe(57)
+        self.assertEqual((keyframe['step'], keyframe['frame']), (50, 50))
+        self.assertEqual(tuple(keyframe['pos'][0]) + tuple(keyframe['vel'][0]), states[50][BallType.CUE])
+
+        self.assertEqual(player.get_positions(10, 20).shape, (10, 10, 2))
+        with self.assertRaises(IndexError):
+            player.get_frame(201)
+
+    def test_live(self):
+        table, _ = self.record_break(10, capacity=64)
+
+        # Readable while still being written
+        player = TrajectoryPlayer(self.path)
+        self.assertEqual(len(player), 11)
+
+        table.time_step(aim=False)
+        self.assertEqual(player.refresh(), 12)
+        np.testing.assert_allclose(player.get_frame(11)['pos'][0], (table.cue_ball.pos.x, table.cue_ball.pos.y),
+                                   rtol=1e-6)
+
+        table.recorder.close()
+
+    def test_steps_must_follow(self):
+        table, _ = self.record_break(5)
+        snapshot = table.snapshot()
+        table.time_step(aim=False)
+
+        # Recording a step twice, or after rewinding, would break seeking
+        with self.assertRaises(ValueError):
+            table.recorder.record(table)
+        table.restore(snapshot)
+        with self.assertRaises(ValueError):
+            table.recorder.record(table)
+
+        self.assertEqual(table.recorder.count, 7)
+        table.recorder.close()
+        self.assertEqual(TrajectoryPlayer(self.path).get_steps(), range(0, 7))
+
+    def test_frame_step_checked(self):
+        table, _ = self.record_break(5)
+        table.recorder.steps[3] = 99
+        table.recorder.close()
+
+        player = TrajectoryPlayer(self.path)
+        self.assertEqual(player.get_frame(2)['step'], 2)
+        with self.assertRaises(ValueError):
+            player.get_frame(3)
+
+    def test_not_a_recording(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            TrajectoryPlayer(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()